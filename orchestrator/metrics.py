@@ -0,0 +1,161 @@
+"""
+Orchestrator 的 Prometheus metrics。
+
+全部在 event loop 上更新（不跨 thread），記錄只是一次 dict 查找與加法，
+可以直接放在逐 token 的串流路徑上；`/metrics` 被抓取時才組成文字格式。
+"""
+from __future__ import annotations
+
+import bisect
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+def _prom_escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt_prom_line(name: str, value: float, labels: Optional[Dict[str, str]] = None) -> str:
+    if labels:
+        labels_str = ",".join(f'{k}="{_prom_escape_label_value(str(v))}"' for k, v in labels.items())
+        return f"{name}{{{labels_str}}} {value}"
+    return f"{name} {value}"
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], List[float]] = {}
+        if not self.labelnames:
+            self._child({})  # 沒有 label 的 metric 一開始就輸出 0
+
+    def _width(self) -> int:
+        return 1
+
+    def _child(self, labels: Dict[str, str]) -> List[float]:
+        key = tuple(str(labels.get(k, "")) for k in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            child = self._children[key] = [0.0] * self._width()
+        return child
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for key, values in sorted(self._children.items()):
+            lines.extend(self._render_child(dict(zip(self.labelnames, key)), values))
+        return lines
+
+    def _render_child(self, labels: Dict[str, str], values: List[float]) -> List[str]:
+        return [_fmt_prom_line(self.name, values[0], labels)]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        self._child(labels)[0] += amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        self._child(labels)[0] += amount
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self._child(labels)[0] -= amount
+
+
+class Histogram(_Metric):
+    """固定 bucket 的 histogram；values 為 [各 bucket 次數..., +Inf 次數, 總和]。"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, buckets: Sequence[float], labelnames: Sequence[str] = ()):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, help_text, labelnames)
+
+    def _width(self) -> int:
+        return len(self.buckets) + 2
+
+    def observe(self, value: float, **labels: str) -> None:
+        values = self._child(labels)
+        values[bisect.bisect_left(self.buckets, value)] += 1
+        values[-1] += value
+
+    def _render_child(self, labels: Dict[str, str], values: List[float]) -> List[str]:
+        lines = []
+        cumulative = 0.0
+        for bound, count in zip(self.buckets, values):
+            cumulative += count
+            lines.append(_fmt_prom_line(f"{self.name}_bucket", cumulative, {**labels, "le": repr(float(bound))}))
+        cumulative += values[len(self.buckets)]
+        lines.append(_fmt_prom_line(f"{self.name}_bucket", cumulative, {**labels, "le": "+Inf"}))
+        lines.append(_fmt_prom_line(f"{self.name}_sum", values[-1], labels))
+        lines.append(_fmt_prom_line(f"{self.name}_count", cumulative, labels))
+        return lines
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: List[_Metric] = []
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._add(Counter(name, help_text, labelnames))
+
+    def gauge(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._add(Gauge(name, help_text, labelnames))
+
+    def histogram(self, name: str, help_text: str, buckets: Sequence[float], labelnames: Sequence[str] = ()) -> Histogram:
+        return self._add(Histogram(name, help_text, buckets, labelnames))
+
+    def _add(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render_prometheus(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# 1 ms ~ 60 s，約每 2.5 倍一格
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+TOKENS_PER_SECOND_BUCKETS = (1.0, 2.5, 5.0, 10.0, 20.0, 40.0, 60.0, 80.0, 100.0, 150.0, 200.0, 400.0, 1000.0)
+
+REGISTRY = Registry()
+
+CHATS_ACTIVE = REGISTRY.gauge("orchestrator_chats_active", "Chats currently streaming.")
+CHATS_TOTAL = REGISTRY.counter("orchestrator_chats_total", "Chats started (valid first message).")
+CANCELLATIONS_TOTAL = REGISTRY.counter("orchestrator_cancellations_total", "Chats cancelled by the client.")
+TOOL_CALLS_TOTAL = REGISTRY.counter("orchestrator_tool_calls_total", "Tool calls returned by the LLM.")
+SGLANG_ERRORS_TOTAL = REGISTRY.counter(
+    "orchestrator_sglang_errors_total",
+    "SGLang request failures by code (HTTP status, connection_error, parse_error).",
+    ("code",),
+)
+LLM_TOKENS_TOTAL = REGISTRY.counter("orchestrator_llm_tokens_total", "Streamed LLM content deltas (about one token each).")
+LLM_FIRST_TOKEN_SECONDS = REGISTRY.histogram(
+    "orchestrator_llm_first_token_seconds",
+    "Time from sending the SGLang request to the first streamed delta.",
+    LATENCY_BUCKETS,
+)
+LLM_TOKENS_PER_SECOND = REGISTRY.histogram(
+    "orchestrator_llm_tokens_per_second",
+    "Per-chat LLM decode rate after the first delta (content deltas per second).",
+    TOKENS_PER_SECOND_BUCKETS,
+)
+FIRST_TOKEN_TO_TTS_SECONDS = REGISTRY.histogram(
+    "orchestrator_first_token_to_tts_seconds",
+    "Time from the first LLM content delta to the first text_delta sent to ws_gateway_tts.",
+    LATENCY_BUCKETS,
+)
+TTFA_SECONDS = REGISTRY.histogram(
+    "orchestrator_ttfa_seconds",
+    "Time from the chat request to the first audio chunk forwarded to the client.",
+    LATENCY_BUCKETS,
+)
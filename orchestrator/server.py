@@ -5,13 +5,16 @@ import json
 import os
 import time
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Set
 
 import aiohttp
 from aiohttp import WSMsgType, web
 
+from . import metrics
+from .sse import iter_sse_data
+from .tts_pool import DirectTtsStream, TtsMuxPool, mux_url_for
+
 
-PUNCTUATION = set("，。！？；：,.!?;\n")
 
 
 def json_dumps(obj: Any) -> str:
@@ -45,6 +48,15 @@ def _optional_str(obj: Dict[str, Any], key: str) -> Optional[str]:
     return val
 
 
+def _optional_bool(obj: Dict[str, Any], key: str) -> bool:
+    val = obj.get(key)
+    if val is None:
+        return False
+    if not isinstance(val, bool):
+        raise ValueError(f"欄位 {key} 必須是布林值")
+    return val
+
+
 def _optional_int_env(name: str) -> Optional[int]:
     v = os.getenv(name)
     if v is None:
@@ -120,6 +132,8 @@ class ChatRequest:
     channels: int
     # Optional: for local debugging only (disabled by default)
     ws_tts_url: Optional[str] = None
+    # Optional: ask ws_gateway_tts for binary audio frames (forwarded to the client as-is)
+    binary_audio: bool = False
 
     @staticmethod
     def parse(obj: Dict[str, Any]) -> "ChatRequest":
@@ -130,6 +144,7 @@ class ChatRequest:
             sample_rate=_require_int(obj, "sample_rate"),
             channels=_require_int(obj, "channels"),
             ws_tts_url=_optional_str(obj, "ws_tts_url"),
+            binary_audio=_optional_bool(obj, "binary_audio"),
         )
 
 
@@ -148,6 +163,52 @@ class ToolCallAccum:
         }
 
 
+@dataclass
+class ChatTiming:
+    """一次 chat 各階段第一次發生的時間點（time.perf_counter()），發生時即寫入 histogram。"""
+
+    start_s: float
+    llm_request_s: Optional[float] = None
+    first_token_s: Optional[float] = None
+    last_token_s: Optional[float] = None
+    first_tts_text_s: Optional[float] = None
+    first_audio_s: Optional[float] = None
+    tokens: int = 0
+
+    def on_llm_request(self) -> None:
+        self.llm_request_s = time.perf_counter()
+
+    def on_output(self) -> None:
+        """LLM 第一個有內容的 delta（content 或 tool_calls；只帶 role 的開頭 delta 不算）。"""
+        if self.first_token_s is None:
+            self.first_token_s = time.perf_counter()
+            if self.llm_request_s is not None:
+                metrics.LLM_FIRST_TOKEN_SECONDS.observe(self.first_token_s - self.llm_request_s)
+
+    def on_content(self) -> None:
+        self.on_output()
+        self.tokens += 1
+        self.last_token_s = time.perf_counter()
+        metrics.LLM_TOKENS_TOTAL.inc()
+
+    def on_llm_done(self) -> None:
+        if self.tokens >= 2 and self.first_token_s is not None and self.last_token_s is not None:
+            elapsed = self.last_token_s - self.first_token_s
+            if elapsed > 0:
+                metrics.LLM_TOKENS_PER_SECOND.observe((self.tokens - 1) / elapsed)
+
+    def on_tts_text(self) -> None:
+        if self.first_tts_text_s is None:
+            self.first_tts_text_s = time.perf_counter()
+            if self.first_token_s is not None:
+                metrics.FIRST_TOKEN_TO_TTS_SECONDS.observe(self.first_tts_text_s - self.first_token_s)
+
+    def on_audio(self) -> None:
+        if self.first_audio_s is None:
+            self.first_audio_s = time.perf_counter()
+            metrics.TTFA_SECONDS.observe(self.first_audio_s - self.start_s)
+
+
 def _apply_tool_calls_delta(acc: Dict[int, ToolCallAccum], tool_calls: List[Dict[str, Any]]) -> None:
     for i, tc in enumerate(tool_calls):
         idx = tc.get("index")
@@ -184,15 +245,85 @@ def _bool_env(name: str, default: bool) -> bool:
     return v.strip().lower() in {"1", "true", "yes", "y", "on"}
 
 
+class _DeltaCoalescer:
+    """
+    把 window 內到達的 llm_delta 合併成一則送給前端，減少高併發時的 frame 數與 CPU。
+
+    第一個 delta 到達時開始計時，window 到期即送出累積的文字；window<=0 時逐則送出。
+    其他訊息（tool_calls_delta、錯誤、llm_done）送出前需先 flush()，維持前端看到的順序。
+    計時器送出失敗（例如前端已斷線）時記下例外，下一次 add()/flush() 拋出，讓串流迴圈停止。
+    """
+
+    def __init__(self, ws: web.WebSocketResponse, window_s: float) -> None:
+        self.ws = ws
+        self.window_s = window_s
+        self._parts: List[str] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set["asyncio.Task[None]"] = set()
+        self._lock = asyncio.Lock()
+        self._error: Optional[BaseException] = None
+
+    async def add(self, text: str) -> None:
+        self._raise_if_failed()
+        if self.window_s <= 0:
+            await ws_send_json(self.ws, {"type": "llm_delta", "delta": text})
+            return
+        self._parts.append(text)
+        if self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.window_s, self._on_timer)
+
+    def _on_timer(self) -> None:
+        self._timer = None
+        task = asyncio.create_task(self._send_from_timer())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _send_from_timer(self) -> None:
+        try:
+            await self._send_pending()
+        except (ConnectionResetError, RuntimeError) as e:
+            # 沒有人 await 這個 task：記下來交給串流迴圈，之後的文字不再累積
+            self._error = e
+            self._parts.clear()
+
+    def _raise_if_failed(self) -> None:
+        if self._error is not None:
+            raise self._error
+
+    async def _send_pending(self) -> None:
+        # lock 依取得順序送出；文字在取得 lock 後才取走，先到的 delta 一定先送
+        async with self._lock:
+            if not self._parts:
+                return
+            text = "".join(self._parts)
+            self._parts.clear()
+            await ws_send_json(self.ws, {"type": "llm_delta", "delta": text})
+
+    async def flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._raise_if_failed()
+        await self._send_pending()
+
+    def close(self) -> None:
+        """放棄尚未送出的文字（cancel / 連線結束）。"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._parts.clear()
+        for task in self._tasks:
+            task.cancel()
+
+
 async def _stream_sglang_deltas(
     *,
     client: aiohttp.ClientSession,
     prompt: str,
     ws: web.WebSocketResponse,
     tts_text_queue: "asyncio.Queue[Optional[str]]",
-    tts_flush_min_chars: int,
-    tts_flush_on_punct: bool,
     stop: asyncio.Event,
+    timing: ChatTiming,
 ) -> Dict[str, Any]:
     sglang_url = _build_sglang_url()
     api_key = os.getenv("SGLANG_API_KEY", "")
@@ -213,57 +344,65 @@ async def _stream_sglang_deltas(
 
     headers = {"Authorization": f"Bearer {api_key}"}
     tool_acc: Dict[int, ToolCallAccum] = {}
-    full_text = ""
-    tts_buffer = ""
+    text_parts: List[str] = []
+    deltas = _DeltaCoalescer(ws, float(os.getenv("ORCH_LLM_DELTA_COALESCE_MS", "20")) / 1000.0)
 
-    async with client.post(sglang_url, json=payload, headers=headers) as resp:
+    timing.on_llm_request()
+    try:
+        resp = await client.post(sglang_url, json=payload, headers=headers)
+    except aiohttp.ClientError:
+        metrics.SGLANG_ERRORS_TOTAL.inc(code="connection_error")
+        raise
+    async with resp:
         if resp.status != 200:
+            metrics.SGLANG_ERRORS_TOTAL.inc(code=str(resp.status))
             body = (await resp.text())[:2000]
             raise RuntimeError(f"SGLang 回應 {resp.status}: {body}")
 
-        while not stop.is_set():
-            line = await resp.content.readline()
-            if not line:
-                break
-            s = line.decode("utf-8", errors="replace").strip()
-            if not s.startswith("data: "):
-                continue
-            if s == "data: [DONE]":
-                break
+        try:
+            async for data in iter_sse_data(resp.content):
+                if stop.is_set():
+                    break
+                if data == b"[DONE]":
+                    break
 
-            try:
-                delta = json.loads(s[6:])["choices"][0]["delta"]
-            except Exception:
-                await ws_send_json(ws, {"type": "orchestrator_error", "code": "llm_parse_error", "message": s[:2000]})
-                continue
+                try:
+                    delta = json.loads(data)["choices"][0]["delta"]
+                except Exception:
+                    metrics.SGLANG_ERRORS_TOTAL.inc(code="parse_error")
+                    await deltas.flush()
+                    message = "data: " + data[:2000].decode("utf-8", errors="replace")
+                    await ws_send_json(ws, {"type": "orchestrator_error", "code": "llm_parse_error", "message": message})
+                    continue
 
-            tool_calls = delta.get("tool_calls")
-            if isinstance(tool_calls, list) and tool_calls:
-                _apply_tool_calls_delta(tool_acc, tool_calls)
-                await ws_send_json(
-                    ws,
-                    {"type": "tool_calls_delta", "tool_calls": [tool_acc[k].to_dict() for k in sorted(tool_acc)]},
-                )
+                tool_calls = delta.get("tool_calls")
+                if isinstance(tool_calls, list) and tool_calls:
+                    timing.on_output()
+                    _apply_tool_calls_delta(tool_acc, tool_calls)
+                    await deltas.flush()
+                    await ws_send_json(
+                        ws,
+                        {"type": "tool_calls_delta", "tool_calls": [tool_acc[k].to_dict() for k in sorted(tool_acc)]},
+                    )
 
-            content = delta.get("content")
-            if isinstance(content, str) and content:
-                full_text += content
-                await ws_send_json(ws, {"type": "llm_delta", "delta": content})
-                tts_buffer += content
-                if len(tts_buffer) >= tts_flush_min_chars:
-                    await tts_text_queue.put(tts_buffer)
-                    tts_buffer = ""
-                elif tts_flush_on_punct and tts_buffer and tts_buffer[-1] in PUNCTUATION:
-                    await tts_text_queue.put(tts_buffer)
-                    tts_buffer = ""
+                content = delta.get("content")
+                if isinstance(content, str) and content:
+                    timing.on_content()
+                    text_parts.append(content)
+                    # 分段交給 ws_gateway_tts 的 segmenter，這裡不再另外累積/切段；TTS 不等合併 window
+                    tts_text_queue.put_nowait(content)
+                    await deltas.add(content)
+            if not stop.is_set():
+                await deltas.flush()
+        finally:
+            deltas.close()
 
+    timing.on_llm_done()
     if not stop.is_set():
-        if tts_buffer:
-            await tts_text_queue.put(tts_buffer)
         await tts_text_queue.put(None)
 
     return {
-        "full_text": full_text,
+        "full_text": "".join(text_parts),
         "tool_calls": [tool_acc[k].to_dict() for k in sorted(tool_acc)],
     }
 
@@ -271,22 +410,20 @@ async def _stream_sglang_deltas(
 async def _tts_bridge(
     *,
     client: aiohttp.ClientSession,
+    tts_pool: Optional[TtsMuxPool],
     ws: web.WebSocketResponse,
     req: ChatRequest,
     tts_text_queue: "asyncio.Queue[Optional[str]]",
     tts_seq_start: int,
     cancel_requested: asyncio.Event,
     stop: asyncio.Event,
+    timing: ChatTiming,
 ) -> None:
     tts_url = os.getenv("WS_TTS_URL", "ws://localhost:9000/tts")
     allow_override = _bool_env("ALLOW_CLIENT_TTS_URL", False)
     if allow_override and req.ws_tts_url:
         tts_url = req.ws_tts_url
-
-    headers = {}
-    tts_api_key = os.getenv("WS_TTS_API_KEY", "").strip()
-    if tts_api_key:
-        headers["Authorization"] = f"Bearer {tts_api_key}"
+        tts_pool = None  # 覆寫的 URL 不走共用連線池
 
     async def _drain_queue():
         while True:
@@ -295,76 +432,10 @@ async def _tts_bridge(
                 break
 
     try:
-        tts_ws_ctx = client.ws_connect(tts_url, headers=headers, heartbeat=20)
-        async with tts_ws_ctx as tts_ws:
-            await tts_ws.send_str(
-                json_dumps(
-                    {
-                        "type": "start",
-                        "session_id": req.session_id,
-                        "audio_format": req.audio_format,
-                        "sample_rate": req.sample_rate,
-                        "channels": req.channels,
-                    }
-                )
-            )
-
-            tts_seq = tts_seq_start
-
-            async def sender_loop() -> None:
-                nonlocal tts_seq
-                try:
-                    while True:
-                        if stop.is_set():
-                            break
-                        text = await tts_text_queue.get()
-                        if text is None:
-                            break
-                        await tts_ws.send_str(
-                            json_dumps({"type": "text_delta", "session_id": req.session_id, "seq": tts_seq, "text": text})
-                        )
-                        tts_seq += 1
-
-                    if cancel_requested.is_set():
-                        await tts_ws.send_str(
-                            json_dumps({"type": "cancel", "session_id": req.session_id, "seq": tts_seq})
-                        )
-                        tts_seq += 1
-                    elif not stop.is_set():
-                        await tts_ws.send_str(
-                            json_dumps({"type": "text_end", "session_id": req.session_id, "seq": tts_seq})
-                        )
-                except asyncio.CancelledError:
-                    raise
-                except Exception as e:
-                    await ws_send_json(
-                        ws,
-                        {"type": "orchestrator_error", "code": "tts_send_error", "message": str(e)},
-                    )
-                    # Do not stop the whole session, just this TTS task
-                    # stop.set() 
-
-            sender_task = asyncio.create_task(sender_loop())
-            try:
-                async for msg in tts_ws:
-                    if stop.is_set():
-                        break
-                    if msg.type != WSMsgType.TEXT:
-                        continue
-                    try:
-                        obj = json.loads(msg.data)
-                    except Exception:
-                        continue
-                    await ws_send_json(ws, obj)
-                    if obj.get("type") in {"tts_end", "error"}:
-                        break
-            finally:
-                sender_task.cancel()
-                try:
-                    await sender_task
-                except Exception:
-                    pass
-
+        if tts_pool is not None:
+            tts_stream: Any = await tts_pool.open(req.session_id)
+        else:
+            tts_stream = await DirectTtsStream.connect(client, tts_url, req.session_id, headers=_tts_headers())
     except Exception as e:
         # TTS Connection failed. Log warning but proceed with LLM only.
         print(f"[Orchestrator] TTS Connection failed ({tts_url}): {e}")
@@ -375,6 +446,19 @@ async def _tts_bridge(
              pass
         # Important: Drain the queue so LLM loop doesn't block if queue has maxsize (or just to be clean)
         await _drain_queue()
+        return
+
+    try:
+        await tts_stream.send(
+            {
+                "type": "start",
+                "session_id": req.session_id,
+                "audio_format": req.audio_format,
+                "sample_rate": req.sample_rate,
+                "channels": req.channels,
+                "binary_audio": req.binary_audio,
+            }
+        )
 
         tts_seq = tts_seq_start
 
@@ -387,20 +471,28 @@ async def _tts_bridge(
                     text = await tts_text_queue.get()
                     if text is None:
                         break
-                    await tts_ws.send_str(
-                        json_dumps({"type": "text_delta", "session_id": req.session_id, "seq": tts_seq, "text": text})
+                    # 送出期間累積的 delta 合併成一則 text_delta
+                    parts = [text]
+                    ended = False
+                    while not tts_text_queue.empty():
+                        more = tts_text_queue.get_nowait()
+                        if more is None:
+                            ended = True
+                            break
+                        parts.append(more)
+                    await tts_stream.send(
+                        {"type": "text_delta", "session_id": req.session_id, "seq": tts_seq, "text": "".join(parts)}
                     )
+                    timing.on_tts_text()
                     tts_seq += 1
+                    if ended:
+                        break
 
                 if cancel_requested.is_set():
-                    await tts_ws.send_str(
-                        json_dumps({"type": "cancel", "session_id": req.session_id, "seq": tts_seq})
-                    )
+                    await tts_stream.send({"type": "cancel", "session_id": req.session_id, "seq": tts_seq})
                     tts_seq += 1
                 elif not stop.is_set():
-                    await tts_ws.send_str(
-                        json_dumps({"type": "text_end", "session_id": req.session_id, "seq": tts_seq})
-                    )
+                    await tts_stream.send({"type": "text_end", "session_id": req.session_id, "seq": tts_seq})
             except asyncio.CancelledError:
                 raise
             except Exception as e:
@@ -408,28 +500,48 @@ async def _tts_bridge(
                     ws,
                     {"type": "orchestrator_error", "code": "tts_send_error", "message": str(e)},
                 )
-                stop.set()
+                # 只結束送往 TTS 的文字；不設 stop，LLM 文字仍持續串流給前端
 
         sender_task = asyncio.create_task(sender_loop())
         try:
-            async for msg in tts_ws:
+            while not stop.is_set():
+                obj = await tts_stream.recv()
+                if obj is None:
+                    await ws_send_json(
+                        ws,
+                        {"type": "orchestrator_warning", "code": "tts_unavailable", "message": "TTS connection lost"},
+                    )
+                    break
                 if stop.is_set():
                     break
-                if msg.type != WSMsgType.TEXT:
-                    continue
-                try:
-                    obj = json.loads(msg.data)
-                except Exception:
+                # 原封不動轉送（binary audio frame 或 gateway 的 JSON 字串），不重新編碼
+                if isinstance(obj, bytes):
+                    timing.on_audio()
+                    await ws.send_bytes(obj)
                     continue
-                await ws_send_json(ws, obj)
-                if obj.get("type") in {"tts_end", "error"}:
+                if obj.type == "audio_chunk":
+                    timing.on_audio()
+                await ws.send_str(obj.data)
+                if obj.type in {"tts_end", "error"}:
                     break
         finally:
             sender_task.cancel()
             try:
                 await sender_task
-            except Exception:
+            except (asyncio.CancelledError, Exception):
                 pass
+    except Exception as e:
+        print(f"[Orchestrator] TTS stream failed ({tts_url}): {e}")
+    finally:
+        await tts_stream.close()
+
+
+def _tts_headers() -> Dict[str, str]:
+    headers = {}
+    tts_api_key = os.getenv("WS_TTS_API_KEY", "").strip()
+    if tts_api_key:
+        headers["Authorization"] = f"Bearer {tts_api_key}"
+    return headers
 
 
 async def ws_chat(request: web.Request) -> web.WebSocketResponse:
@@ -467,29 +579,28 @@ async def ws_chat(request: web.Request) -> web.WebSocketResponse:
         cancel_requested = asyncio.Event()
         tts_text_queue: "asyncio.Queue[Optional[str]]" = asyncio.Queue()
 
-        tts_flush_min_chars = int(os.getenv("TTS_FLUSH_MIN_CHARS", "12"))
-        tts_flush_on_punct = _bool_env("TTS_FLUSH_ON_PUNCT", True)
-
         start_ms = time.perf_counter()
+        timing = ChatTiming(start_s=start_ms)
+        metrics.CHATS_TOTAL.inc()
         await ws_send_json(
             ws,
             {
                 "type": "orchestrator_start",
                 "session_id": req.session_id,
-                "tts_flush_min_chars": tts_flush_min_chars,
-                "tts_flush_on_punct": tts_flush_on_punct,
             },
         )
 
         tts_task = asyncio.create_task(
             _tts_bridge(
                 client=client,
+                tts_pool=request.app["tts_pool"],
                 ws=ws,
                 req=req,
                 tts_text_queue=tts_text_queue,
                 tts_seq_start=1,
                 cancel_requested=cancel_requested,
                 stop=stop,
+                timing=timing,
             )
         )
 
@@ -511,6 +622,7 @@ async def ws_chat(request: web.Request) -> web.WebSocketResponse:
         stop_task: Optional[asyncio.Task[bool]] = None
         cancelled_by_client = False
 
+        metrics.CHATS_ACTIVE.inc()
         try:
             llm_task: "asyncio.Task[Dict[str, Any]]" = asyncio.create_task(
                 _stream_sglang_deltas(
@@ -518,9 +630,8 @@ async def ws_chat(request: web.Request) -> web.WebSocketResponse:
                     prompt=req.prompt,
                     ws=ws,
                     tts_text_queue=tts_text_queue,
-                    tts_flush_min_chars=tts_flush_min_chars,
-                    tts_flush_on_punct=tts_flush_on_punct,
                     stop=stop,
+                    timing=timing,
                 )
             )
 
@@ -530,18 +641,20 @@ async def ws_chat(request: web.Request) -> web.WebSocketResponse:
                 llm_task.cancel()
                 try:
                     await llm_task
-                except Exception:
+                except (asyncio.CancelledError, Exception):
                     pass
                 await ws_send_json(ws, {"type": "orchestrator_cancelled"})
                 cancelled_by_client = cancel_requested.is_set()
 
                 if cancelled_by_client:
+                    metrics.CANCELLATIONS_TOTAL.inc()
                     try:
                         await asyncio.wait_for(tts_task, timeout=5.0)
                     except Exception:
                         pass
             else:
                 llm_res: Dict[str, Any] = llm_task.result()
+                metrics.TOOL_CALLS_TOTAL.inc(len(llm_res.get("tool_calls", [])))
                 await ws_send_json(
                     ws,
                     {
@@ -559,6 +672,7 @@ async def ws_chat(request: web.Request) -> web.WebSocketResponse:
                 except Exception:
                     pass
         finally:
+            metrics.CHATS_ACTIVE.dec()
             try:
                 tts_text_queue.put_nowait(None)
             except Exception:
@@ -596,11 +710,29 @@ async def healthz(_: web.Request) -> web.Response:
     return web.json_response({"status": "ok"})
 
 
+async def metrics_endpoint(_: web.Request) -> web.Response:
+    return web.Response(text=metrics.REGISTRY.render_prometheus(), content_type="text/plain; version=0.0.4")
+
+
 async def on_startup(app: web.Application) -> None:
     app["client_session"] = aiohttp.ClientSession()
+    # 共用 orchestrator→gateway 多工長連線；WS_TTS_POOL_SIZE=0 代表每個 /chat 各自連線
+    pool_size = int(os.getenv("WS_TTS_POOL_SIZE", "2"))
+    app["tts_pool"] = None
+    if pool_size > 0:
+        tts_url = os.getenv("WS_TTS_MUX_URL") or mux_url_for(os.getenv("WS_TTS_URL", "ws://localhost:9000/tts"))
+        app["tts_pool"] = TtsMuxPool(
+            app["client_session"],
+            tts_url,
+            headers=_tts_headers(),
+            size=pool_size,
+            max_streams_per_conn=int(os.getenv("WS_TTS_MAX_STREAMS_PER_CONN", "256")),
+        )
 
 
 async def on_cleanup(app: web.Application) -> None:
+    if app["tts_pool"] is not None:
+        await app["tts_pool"].close()
     await app["client_session"].close()
 
 
@@ -609,6 +741,7 @@ def create_app() -> web.Application:
     app.on_startup.append(on_startup)
     app.on_cleanup.append(on_cleanup)
     app.router.add_get("/healthz", healthz)
+    app.router.add_get("/metrics", metrics_endpoint)
     app.router.add_get("/chat", ws_chat)
     return app
 
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+from typing import AsyncIterator
+
+import aiohttp
+
+_DATA = b"data:"
+
+
+async def iter_sse_data(content: aiohttp.StreamReader) -> AsyncIterator[bytes]:
+    """
+    逐一取出 SSE 的 `data:` 欄位內容（bytes，已去掉前綴與一個前導空白）。
+
+    以 readany() 整塊讀入後在 buffer 內找換行，非 data 行（空行、註解、event:）直接跳過，
+    不逐行 decode；內容可直接交給 json.loads（接受 bytes）。
+    """
+    buf = bytearray()
+    pos = 0
+    while True:
+        nl = buf.find(b"\n", pos)
+        if nl < 0:
+            del buf[:pos]
+            pos = 0
+            chunk = await content.readany()
+            if not chunk:
+                if buf.startswith(_DATA):
+                    yield _payload(buf, 0, len(buf))
+                return
+            buf += chunk
+            continue
+        if buf.startswith(_DATA, pos):
+            yield _payload(buf, pos, nl)
+        pos = nl + 1
+
+
+def _payload(buf: bytearray, start: int, end: int) -> bytes:
+    start += len(_DATA)
+    if end > start and buf[end - 1] == 0x0D:  # \r\n
+        end -= 1
+    if start < end and buf[start] == 0x20:
+        start += 1
+    return bytes(buf[start:end])
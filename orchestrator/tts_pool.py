@@ -0,0 +1,250 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import struct
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple, Union
+
+import aiohttp
+from aiohttp import WSMsgType
+
+
+def json_dumps(obj: Any) -> str:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+
+# ws_gateway_tts binary audio frame header（見 ws_gateway_tts/protocol.py）
+_AUDIO_FRAME_HEADER = struct.Struct("<2sBBIIIIHH")
+
+_TYPE_PREFIX = '{"type":"'
+_SESSION_KEY = '","session_id":"'
+
+
+class TtsText(NamedTuple):
+    """gateway 的 JSON 訊息：只取出 type/session_id，原字串原封不動轉送。"""
+
+    type: str
+    session_id: str
+    data: str
+
+
+# gateway 訊息：TtsText，或原封不動轉送給前端的 binary audio frame
+TtsMessage = Union[TtsText, bytes]
+
+
+def peek_message(data: str) -> Optional[Tuple[str, str]]:
+    """
+    取出 gateway 訊息的 (type, session_id)，不解析整個 JSON。
+
+    gateway 以緊湊 JSON 送出且 type、session_id 固定為前兩個欄位；
+    格式不符（或含跳脫字元）時退回 json.loads。
+    """
+    if data.startswith(_TYPE_PREFIX):
+        type_end = data.find('"', len(_TYPE_PREFIX))
+        if type_end > 0 and data.startswith(_SESSION_KEY, type_end):
+            sid_start = type_end + len(_SESSION_KEY)
+            sid_end = data.find('"', sid_start)
+            msg_type = data[len(_TYPE_PREFIX) : type_end]
+            session_id = data[sid_start:sid_end]
+            if sid_end > 0 and "\\" not in msg_type and "\\" not in session_id:
+                return msg_type, session_id
+    try:
+        obj = json.loads(data)
+    except Exception:
+        return None
+    if not isinstance(obj, dict):
+        return None
+    msg_type, session_id = obj.get("type"), obj.get("session_id")
+    return (msg_type if isinstance(msg_type, str) else ""), (session_id if isinstance(session_id, str) else "")
+
+
+def audio_frame_session_id(frame: bytes) -> Optional[str]:
+    """從 binary audio frame header 取出 session_id（不解碼音訊）。"""
+    if len(frame) < _AUDIO_FRAME_HEADER.size or frame[:2] != b"TA":
+        return None
+    sid_len = _AUDIO_FRAME_HEADER.unpack_from(frame)[7]
+    off = _AUDIO_FRAME_HEADER.size
+    try:
+        return frame[off : off + sid_len].decode("utf-8")
+    except UnicodeDecodeError:
+        return None
+
+
+def mux_url_for(tts_url: str) -> str:
+    """ws://host:9000/tts -> ws://host:9000/tts/mux"""
+    base = tts_url.rstrip("/")
+    return base if base.endswith("/mux") else f"{base}/mux"
+
+
+class TtsStream:
+    """單一 session 在多工連線上的收發端。"""
+
+    def __init__(self, conn: "_MuxConnection", session_id: str) -> None:
+        self.conn = conn
+        self.session_id = session_id
+        # None = 底層連線中斷
+        self.queue: "asyncio.Queue[Optional[TtsMessage]]" = asyncio.Queue()
+        self.ended = False
+
+    async def send(self, payload: Dict[str, Any]) -> None:
+        await self.conn.send(payload)
+
+    async def recv(self) -> Optional[TtsMessage]:
+        return await self.queue.get()
+
+    async def close(self) -> None:
+        """釋放 session；尚未收到 tts_end/error 時通知 gateway detach。"""
+        if self.conn.streams.get(self.session_id) is not self:
+            return
+        del self.conn.streams[self.session_id]
+        if not self.ended and not self.conn.closed:
+            try:
+                await self.conn.send({"type": "detach", "session_id": self.session_id})
+            except Exception:
+                pass
+
+
+class DirectTtsStream:
+    """單一 session 專用的 `/tts` 連線（不走連線池時使用），介面同 TtsStream。"""
+
+    def __init__(self, ws: aiohttp.ClientWebSocketResponse, session_id: str) -> None:
+        self.ws = ws
+        self.session_id = session_id
+
+    @classmethod
+    async def connect(
+        cls, client: aiohttp.ClientSession, url: str, session_id: str, *, headers: Optional[Dict[str, str]] = None
+    ) -> "DirectTtsStream":
+        ws = await client.ws_connect(url, headers=headers or {}, heartbeat=20)
+        return cls(ws, session_id)
+
+    async def send(self, payload: Dict[str, Any]) -> None:
+        await self.ws.send_str(json_dumps(payload))
+
+    async def recv(self) -> Optional[TtsMessage]:
+        async for msg in self.ws:
+            if msg.type == WSMsgType.BINARY:
+                return msg.data
+            if msg.type != WSMsgType.TEXT:
+                continue
+            peeked = peek_message(msg.data)
+            if peeked is not None:
+                return TtsText(peeked[0], peeked[1], msg.data)
+        return None
+
+    async def close(self) -> None:
+        await self.ws.close()
+
+
+class _MuxConnection:
+    def __init__(self, ws: aiohttp.ClientWebSocketResponse) -> None:
+        self.ws = ws
+        self.streams: Dict[str, TtsStream] = {}
+        self.closed = False
+        self._send_lock = asyncio.Lock()
+        self._reader_task = asyncio.create_task(self._reader())
+
+    async def send(self, payload: Dict[str, Any]) -> None:
+        data = json_dumps(payload)
+        async with self._send_lock:
+            await self.ws.send_str(data)
+
+    async def _reader(self) -> None:
+        try:
+            async for msg in self.ws:
+                if msg.type == WSMsgType.BINARY:
+                    stream = self.streams.get(audio_frame_session_id(msg.data))
+                    if stream is not None:
+                        stream.queue.put_nowait(msg.data)
+                    continue
+                if msg.type != WSMsgType.TEXT:
+                    continue
+                peeked = peek_message(msg.data)
+                if peeked is None:
+                    continue
+                msg_type, session_id = peeked
+                stream = self.streams.get(session_id)
+                if stream is None:
+                    continue  # 已 detach 的 session 殘留訊息
+                if msg_type in {"tts_end", "error"}:
+                    stream.ended = True
+                stream.queue.put_nowait(TtsText(msg_type, session_id, msg.data))
+        finally:
+            self.closed = True
+            for stream in list(self.streams.values()):
+                stream.queue.put_nowait(None)
+            self.streams.clear()
+
+    async def close(self) -> None:
+        self.closed = True
+        await self.ws.close()
+        self._reader_task.cancel()
+        try:
+            await self._reader_task
+        except (asyncio.CancelledError, Exception):
+            pass
+
+
+class TtsMuxPool:
+    """
+    Orchestrator → ws_gateway_tts 的長連線池。
+
+    每條連線以 `/tts/mux` 承載多個 session（依 session_id 分流），
+    省去每次 /chat 的 WebSocket handshake；連線中斷時會在下次 open 重建。
+    """
+
+    def __init__(
+        self,
+        client: aiohttp.ClientSession,
+        url: str,
+        *,
+        headers: Optional[Dict[str, str]] = None,
+        size: int = 2,
+        max_streams_per_conn: int = 256,
+    ) -> None:
+        self.client = client
+        self.url = url
+        self.headers = headers or {}
+        self.size = max(1, size)
+        self.max_streams_per_conn = max(1, max_streams_per_conn)
+        self._conns: List[_MuxConnection] = []
+        # 進行中的 handshake（同一時間最多一個，其他 open 共用）；連線中不阻擋可用現有連線的 open
+        self._connecting: "Optional[asyncio.Task[_MuxConnection]]" = None
+
+    async def open(self, session_id: str) -> TtsStream:
+        # 選連線與登記 stream 之間沒有 await，不需要 lock
+        while True:
+            self._conns = [c for c in self._conns if not c.closed]
+            for c in self._conns:
+                if session_id in c.streams:
+                    raise RuntimeError(f"session_id 已在使用中: {session_id}")
+            conn = min(self._conns, key=lambda c: len(c.streams), default=None)
+            # 未達 pool size 且現有連線都在忙時先開新連線；單條連線滿載時也另開
+            grow = conn is not None and conn.streams and len(self._conns) < self.size and self._connecting is None
+            if conn is not None and not grow and len(conn.streams) < self.max_streams_per_conn:
+                break
+            if self._connecting is None:
+                self._connecting = asyncio.create_task(self._connect())
+            # 連上後重新選擇（新連線是最空的）；handshake 失敗時例外交給呼叫端
+            await asyncio.shield(self._connecting)
+        stream = TtsStream(conn, session_id)
+        conn.streams[session_id] = stream
+        return stream
+
+    async def _connect(self) -> _MuxConnection:
+        try:
+            ws = await self.client.ws_connect(self.url, headers=self.headers, heartbeat=20)
+            conn = _MuxConnection(ws)
+            self._conns.append(conn)
+            return conn
+        finally:
+            self._connecting = None
+
+    def stats(self) -> Dict[str, int]:
+        live = [c for c in self._conns if not c.closed]
+        return {"connections": len(live), "streams": sum(len(c.streams) for c in live)}
+
+    async def close(self) -> None:
+        conns, self._conns = self._conns, []
+        for c in conns:
+            await c.close()
@@ -1,8 +1,12 @@
 from __future__ import annotations
 
 import logging
+import time
 from typing import Any, Dict
 
+from saga.metrics import LLM_CALL_SECONDS, record_llm_usage
+from saga.trace.spans import span
+
 try:
     from groq import Groq
 except ImportError:
@@ -45,12 +49,22 @@ class GroqAdapter:
             elif self.model == "openai/gpt-oss-120b":
                  params["reasoning_effort"] = "medium"
 
-            completion = self.client.chat.completions.create(**params)
+            with span("adapter.groq.call", model=self.model) as sp:
+                t0 = time.perf_counter()
+                try:
+                    completion = self.client.chat.completions.create(**params)
+                finally:
+                    LLM_CALL_SECONDS.observe(time.perf_counter() - t0, provider="groq")
+                if completion.usage:
+                    sp.set(
+                        prompt_tokens=completion.usage.prompt_tokens,
+                        completion_tokens=completion.usage.completion_tokens,
+                    )
             
             # Convert ChatCompletion object to dict compatible with SGLang/OpenAI response structure
             # The object has .choices[0].message.content
             
-            return {
+            result = {
                 "choices": [
                     {
                         "message": {
@@ -65,6 +79,8 @@ class GroqAdapter:
                     "total_tokens": completion.usage.total_tokens
                 } if completion.usage else {}
             }
+            record_llm_usage("groq", result["usage"])
+            return result
             
         except Exception as e:
             logger.error(f"[GroqAdapter] API call failed: {e}")
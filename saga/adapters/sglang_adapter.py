@@ -2,9 +2,13 @@ from __future__ import annotations
 
 import json
 import os
+import time
 import urllib.request
 from typing import Any, Dict
 
+from saga.metrics import LLM_CALL_SECONDS, record_llm_usage
+from saga.trace.spans import span
+
 
 class SGLangAdapter:
     """HTTP adapter for SGLang chat completions."""
@@ -33,9 +37,18 @@ class SGLangAdapter:
         if self.api_key:
             headers["Authorization"] = f"Bearer {self.api_key}"
         req = urllib.request.Request(self.url, data=data, headers=headers)
-        try:
-            with urllib.request.urlopen(req, timeout=self.timeout) as r:
-                return json.loads(r.read().decode("utf-8"))
-        except Exception as e:
-            # Re-raise with more context
-            raise RuntimeError(f"SGLang API call failed: {e}") from e
+        with span("adapter.sglang.call", model=self.model) as sp:
+            t0 = time.perf_counter()
+            try:
+                with urllib.request.urlopen(req, timeout=self.timeout) as r:
+                    resp = json.loads(r.read().decode("utf-8"))
+            except Exception as e:
+                # Re-raise with more context
+                raise RuntimeError(f"SGLang API call failed: {e}") from e
+            finally:
+                LLM_CALL_SECONDS.observe(time.perf_counter() - t0, provider="sglang")
+            usage = resp.get("usage") if isinstance(resp, dict) else None
+            if isinstance(usage, dict):
+                sp.set(**usage)
+                record_llm_usage("sglang", usage)
+            return resp
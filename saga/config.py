@@ -6,6 +6,10 @@ from dataclasses import dataclass, field
 from pathlib import Path
 
 
+# What to do with a semi-pilot review nobody is watching (see SagaConfig.unattended_review)
+UNATTENDED_REVIEW_POLICIES = ("stop", "approve")
+
+
 def _bool_from_env(key: str, default: bool = False) -> bool:
     val = os.getenv(key)
     if val is None:
@@ -42,6 +46,26 @@ class SagaConfig:
     groq_api_key: str = field(default_factory=lambda: os.getenv("GROQ_API_KEY", ""))
     groq_model: str = field(default_factory=lambda: os.getenv("GROQ_MODEL", "openai/gpt-oss-120b"))
 
+    # Stage-level spans written to runs/<run_id>/trace.json (Chrome trace-event format)
+    trace_spans: bool = field(default_factory=lambda: _bool_from_env("SAGA_TRACE_SPANS", True))
+
+    # saga_server: messages kept per run for viewers that reattach
+    event_buffer: int = field(default_factory=lambda: int(os.getenv("SAGA_EVENT_BUFFER", "2048")))
+    # saga_server: a pending review with no viewer attached is resolved after this many
+    # seconds (<= 0 waits forever) by stopping the run (default) or approving it
+    unattended_review_s: float = field(default_factory=lambda: float(os.getenv("SAGA_UNATTENDED_REVIEW_S", "300")))
+    unattended_review: str = field(default_factory=lambda: os.getenv("SAGA_UNATTENDED_REVIEW", "stop"))
+    # saga_server: REST jobs executed concurrently by the job queue
+    job_concurrency: int = field(default_factory=lambda: int(os.getenv("SAGA_JOB_CONCURRENCY", "2")))
+
+    def __post_init__(self) -> None:
+        self.unattended_review = self.unattended_review.strip().lower()
+        if self.unattended_review not in UNATTENDED_REVIEW_POLICIES:
+            raise ValueError(
+                f"SAGA_UNATTENDED_REVIEW must be one of {', '.join(UNATTENDED_REVIEW_POLICIES)}, "
+                f"got {self.unattended_review!r}"
+            )
+
     def run_path(self, run_id: str) -> Path:
         """Return run output directory for the given run_id."""
         return Path(self.run_dir) / run_id
@@ -0,0 +1,202 @@
+"""
+Process-wide Prometheus metrics for SAGA.
+
+Counters and histograms keep one value slot per writer thread, so the hot
+path (sandbox scoring threads, LLM calls in executor threads) only does a
+thread-local lookup and an in-place add; no lock is taken per observation.
+Slots are summed when `/metrics` is scraped, and slots of finished threads
+are folded into a retired total so short-lived worker threads don't pile up.
+"""
+from __future__ import annotations
+
+import bisect
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+def _prom_escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt_prom_line(name: str, value: float, labels: Optional[Dict[str, str]] = None) -> str:
+    if labels:
+        labels_str = ",".join(f'{k}="{_prom_escape_label_value(str(v))}"' for k, v in labels.items())
+        return f"{name}{{{labels_str}}} {value}"
+    return f"{name} {value}"
+
+
+class _ShardedValues:
+    """Fixed-width float vector with one slot per writer thread."""
+
+    def __init__(self, width: int):
+        self.width = width
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._live: List[Tuple[threading.Thread, List[float]]] = []
+        self._retired = [0.0] * width
+
+    def slot(self) -> List[float]:
+        v = getattr(self._local, "v", None)
+        if v is None:
+            v = [0.0] * self.width
+            with self._lock:
+                self._live.append((threading.current_thread(), v))
+            self._local.v = v
+        return v
+
+    def snapshot(self) -> List[float]:
+        with self._lock:
+            live = []
+            for thread, v in self._live:
+                if thread.is_alive():
+                    live.append((thread, v))
+                else:
+                    self._retired = [a + b for a, b in zip(self._retired, v)]
+            self._live = live
+            total = list(self._retired)
+            for _, v in live:
+                total = [a + b for a, b in zip(total, v)]
+        return total
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], _ShardedValues] = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._child({})  # unlabeled metrics are exported as 0 from the start
+
+    def _width(self) -> int:
+        return 1
+
+    def _child(self, labels: Dict[str, str]) -> _ShardedValues:
+        key = tuple(str(labels.get(k, "")) for k in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, _ShardedValues(self._width()))
+        return child
+
+    def _label_dict(self, key: Tuple[str, ...]) -> Dict[str, str]:
+        return dict(zip(self.labelnames, key))
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for key, child in sorted(self._children.items()):
+            lines.extend(self._render_child(self._label_dict(key), child.snapshot()))
+        return lines
+
+    def _render_child(self, labels: Dict[str, str], values: List[float]) -> List[str]:
+        return [_fmt_prom_line(self.name, values[0], labels)]
+
+
+class Counter(_Metric):
+    """Monotonic counter."""
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        self._child(labels).slot()[0] += amount
+
+
+class Gauge(_Metric):
+    """Up/down gauge (sum of per-thread deltas)."""
+    kind = "gauge"
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        self._child(labels).slot()[0] += amount
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self._child(labels).slot()[0] -= amount
+
+
+class Histogram(_Metric):
+    """Fixed-bucket histogram; slots are [bucket counts..., +Inf count, sum]."""
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, buckets: Sequence[float], labelnames: Sequence[str] = ()):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, help_text, labelnames)
+
+    def _width(self) -> int:
+        return len(self.buckets) + 2
+
+    def observe(self, value: float, **labels: str) -> None:
+        slot = self._child(labels).slot()
+        slot[bisect.bisect_left(self.buckets, value)] += 1
+        slot[-1] += value
+
+    def _render_child(self, labels: Dict[str, str], values: List[float]) -> List[str]:
+        lines = []
+        cumulative = 0.0
+        for bound, count in zip(self.buckets, values):
+            cumulative += count
+            lines.append(_fmt_prom_line(f"{self.name}_bucket", cumulative, {**labels, "le": repr(float(bound))}))
+        cumulative += values[len(self.buckets)]
+        lines.append(_fmt_prom_line(f"{self.name}_bucket", cumulative, {**labels, "le": "+Inf"}))
+        lines.append(_fmt_prom_line(f"{self.name}_sum", values[-1], labels))
+        lines.append(_fmt_prom_line(f"{self.name}_count", cumulative, labels))
+        return lines
+
+
+class Registry:
+    """Ordered collection of metrics rendered in Prometheus text format."""
+
+    def __init__(self) -> None:
+        self._metrics: List[_Metric] = []
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._add(Counter(name, help_text, labelnames))
+
+    def gauge(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._add(Gauge(name, help_text, labelnames))
+
+    def histogram(self, name: str, help_text: str, buckets: Sequence[float], labelnames: Sequence[str] = ()) -> Histogram:
+        return self._add(Histogram(name, help_text, buckets, labelnames))
+
+    def _add(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render_prometheus(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+RUNS_ACTIVE = REGISTRY.gauge("saga_runs_active", "SAGA runs currently executing.")
+RUNS_QUEUED = REGISTRY.gauge("saga_runs_queued", "SAGA runs waiting for a worker.")
+ITERATIONS_TOTAL = REGISTRY.counter("saga_iterations_total", "Outer-loop iterations completed.")
+CANDIDATES_SCORED_TOTAL = REGISTRY.counter(
+    "saga_candidates_scored_total", "Candidates scored in the sandbox by result status.", ("status",)
+)
+SANDBOX_TIMEOUTS_TOTAL = REGISTRY.counter("saga_sandbox_timeouts_total", "Sandbox scoring runs killed on timeout.")
+LLM_CALL_SECONDS = REGISTRY.histogram(
+    "saga_llm_call_seconds",
+    "LLM call latency in seconds.",
+    (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0),
+    ("provider",),
+)
+LLM_TOKENS_TOTAL = REGISTRY.counter(
+    "saga_llm_tokens_total", "LLM tokens reported in response usage.", ("provider", "kind")
+)
+SCORE_CACHE_TOTAL = REGISTRY.counter(
+    "saga_score_cache_requests_total", "Optimizer score cache lookups by result.", ("result",)
+)
+
+
+def record_llm_usage(provider: str, usage: Optional[Dict[str, object]]) -> None:
+    """Add prompt/completion token counts from an OpenAI-style `usage` dict."""
+    if not isinstance(usage, dict):
+        return
+    for kind in ("prompt_tokens", "completion_tokens"):
+        val = usage.get(kind)
+        if isinstance(val, (int, float)):
+            LLM_TOKENS_TOTAL.inc(float(val), provider=provider, kind=kind.split("_", 1)[0])
@@ -20,7 +20,9 @@ from saga.search.generators import (
     Selector,
     ParetoSelector,
 )
+from saga.metrics import SCORE_CACHE_TOTAL
 from saga.scoring.sandbox import run_scoring
+from saga.trace.spans import bind, span
 
 logger = logging.getLogger(__name__)
 
@@ -119,6 +121,9 @@ class AdvancedOptimizer:
         context = context or {}
         population = candidates.copy()
         best_results: List[Tuple[str, List[float]]] = []
+        # Scoring code and context are fixed for this call, so survivors carried
+        # between inner iterations don't need another sandbox process.
+        score_cache: Dict[str, List[float]] = {}
         
         # Create fake analysis report for generator
         feedback = AnalysisReport(
@@ -135,18 +140,21 @@ class AdvancedOptimizer:
             logger.info(f"[AdvancedOptimizer] Inner iteration {inner_iter + 1}/{self.inner_iterations}")
             
             # Step 1: Generation
-            new_candidates = self.generator.generate(population, feedback, self.batch_size)
+            with span("optimizer.generate", inner_iteration=inner_iter + 1, generator=self.generator.get_name()):
+                new_candidates = self.generator.generate(population, feedback, self.batch_size)
             all_candidates = list(set(population + new_candidates))  # Deduplicate
             
             logger.debug(f"[AdvancedOptimizer] Generated {len(new_candidates)} new candidates, total={len(all_candidates)}")
             
             # Step 2: Evaluation
-            scores = self._batch_evaluate(all_candidates, scoring_code, context)
+            with span("optimizer.evaluate", inner_iteration=inner_iter + 1, candidates=len(all_candidates)):
+                scores = self._batch_evaluate(all_candidates, scoring_code, context, cache=score_cache)
             
             # Step 3: Selection
-            selected = self.selector.select(
-                all_candidates, scores, weights, self.batch_size
-            )
+            with span("optimizer.select", inner_iteration=inner_iter + 1):
+                selected = self.selector.select(
+                    all_candidates, scores, weights, self.batch_size
+                )
             
             # Update population and feedback
             population = [c for c, _ in selected]
@@ -168,9 +176,14 @@ class AdvancedOptimizer:
         self,
         candidates: List[str],
         scoring_code: str,
-        context: Dict[str, Any]
+        context: Dict[str, Any],
+        cache: Optional[Dict[str, List[float]]] = None,
     ) -> List[List[float]]:
-        """Evaluate all candidates using sandbox in parallel."""
+        """Evaluate all candidates using sandbox in parallel.
+        
+        If a cache dict is given, cached candidates are not re-scored and new
+        successful scores are stored in it.
+        """
         import concurrent.futures
         
         def _eval_one(cand: str) -> Optional[List[float]]:
@@ -182,9 +195,26 @@ class AdvancedOptimizer:
             except Exception:
                 return None
 
+        raw_results: List[Optional[List[float]]] = [None] * len(candidates)
+        misses: List[int] = []
+        for i, cand in enumerate(candidates):
+            cached = cache.get(cand) if cache is not None else None
+            if cached is not None:
+                raw_results[i] = cached
+            else:
+                misses.append(i)
+        if cache is not None:
+            SCORE_CACHE_TOTAL.inc(len(candidates) - len(misses), result="hit")
+            SCORE_CACHE_TOTAL.inc(len(misses), result="miss")
+
         # Use ThreadPoolExecutor to run scoring in parallel
-        with concurrent.futures.ThreadPoolExecutor(max_workers=min(len(candidates), 20)) as executor:
-            raw_results = list(executor.map(_eval_one, candidates))
+        if misses:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=min(len(misses), 20)) as executor:
+                fresh = list(executor.map(bind(_eval_one), [candidates[i] for i in misses]))
+            for i, r in zip(misses, fresh):
+                raw_results[i] = r
+                if cache is not None and r is not None:
+                    cache[candidates[i]] = r
             
         # Infer dimensions from any successful result
         dims = 3
@@ -16,8 +16,10 @@ from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 from enum import Enum
 
 from saga.config import SagaConfig
+from saga.metrics import ITERATIONS_TOTAL
 from saga.search.generators import AnalysisReport, CandidateGenerator, Selector
 from saga.trace.graph import write_graph, write_mermaid
+from saga.trace.spans import NULL_TRACER, Tracer
 
 logger = logging.getLogger(__name__)
 
@@ -135,6 +137,7 @@ class OuterLoop:
         self.optimizer = optimizer
         self.terminator = terminator
         self.mode = mode_controller
+        self.tracer = Tracer() if config.trace_spans else NULL_TRACER
         
         logger.info(f"[OuterLoop] Initialized with mode={mode_controller.mode.value}")
     
@@ -147,7 +150,21 @@ class OuterLoop:
         
         Yields iteration results, review requests, and final report.
         This allows the caller to handle human reviews and stream progress.
+        Stage spans are written to trace.json even if the caller stops early.
         """
+        run_span = self.tracer.span("outer.run", run_id=run_id)
+        try:
+            async for event in self._run(initial_state, run_id):
+                yield event
+        finally:
+            run_span.end()
+            self._write_trace(run_id)
+
+    async def _run(
+        self,
+        initial_state: LoopState,
+        run_id: str
+    ) -> AsyncIterator[IterationResult | HumanReviewRequest | FinalReport | LogEvent]:
         state = initial_state
         start_time = time.perf_counter()
         
@@ -157,6 +174,7 @@ class OuterLoop:
         # Seed scoring: Initialize current_scores if candidates exist but scores don't
         if state.candidates and not state.current_scores:
             yield LogEvent("info", "Initializing seed scores for initial candidates...")
+            seed_span = self.tracer.span("outer.seed_scoring", candidates=len(state.candidates))
             try:
                 # Generate basic implementation for scoring
                 impl_result = await self._run_async(self.implementer.run, {
@@ -168,11 +186,11 @@ class OuterLoop:
                 # Score initial candidates using evaluate only (no generation loop)
                 context = {"keywords": state.keywords}
                 if hasattr(self.optimizer, "evaluate"):
-                    seed_results = self.optimizer.evaluate(
+                    seed_results = self.tracer.bind(self.optimizer.evaluate)(
                         state.candidates, scoring_code, context
                     )
                 else:
-                    seed_results = self.optimizer.optimize(
+                    seed_results = self.tracer.bind(self.optimizer.optimize)(
                         state.candidates, scoring_code, state.weights, context
                     )
                 if seed_results:
@@ -188,10 +206,12 @@ class OuterLoop:
                 num_dims = len(state.weights) if state.weights else 3
                 state.current_scores = [[0.5] * num_dims for _ in state.candidates]
                 yield LogEvent("warning", f"Seed scoring failed, using defaults: {e}")
+            seed_span.end()
         
         while not self.terminator.should_stop(state):
             iteration_start = time.perf_counter()
             state.iteration += 1
+            iter_span = self.tracer.span("outer.iteration", iteration=state.iteration)
             
             logger.info(f"[OuterLoop] === Iteration {state.iteration} ===")
             yield LogEvent("info", f"Starting Iteration {state.iteration}...")
@@ -200,7 +220,8 @@ class OuterLoop:
             logger.info(f"[OuterLoop] Step 1: Analyzing...")
             yield LogEvent("info", "Step 1: Analyzing current state metrics...")
             try:
-                analysis_result = await self._run_async(self.analyzer.run, state)
+                with self.tracer.span("outer.analyze", iteration=state.iteration):
+                    analysis_result = await self._run_async(self.analyzer.run, state)
                 # Inject dataset into analysis result so generators can see it
                 analysis_result["dataset"] = state.dataset
                 report = self._build_analysis_report(analysis_result, state.iteration)
@@ -221,22 +242,24 @@ class OuterLoop:
                 )
                 logger.info(f"[OuterLoop] Requesting human review for analysis")
                 yield LogEvent("warning", "Waiting for human review of analysis report...")
-                yield review_request
+                with self.tracer.span("outer.human_review", review_type="analyze"):
+                    yield review_request
                 yield LogEvent("success", "Analysis approved.")
             
             # Step 2: Plan
             logger.info(f"[OuterLoop] Step 2: Planning...")
             yield LogEvent("info", "Step 2: Planning optimization strategy...")
             try:
-                plan_result = await self._run_async(self.planner.run, {
-                    "analysis": analysis_result,
-                    "constraints": state.constraints,
-                    "iteration": state.iteration,
-                    "weights": state.weights,
-                    "keywords": state.keywords,
-                    "task": state.task,
-                    "text": state.text,
-                })
+                with self.tracer.span("outer.plan", iteration=state.iteration):
+                    plan_result = await self._run_async(self.planner.run, {
+                        "analysis": analysis_result,
+                        "constraints": state.constraints,
+                        "iteration": state.iteration,
+                        "weights": state.weights,
+                        "keywords": state.keywords,
+                        "task": state.task,
+                        "text": state.text,
+                    })
                 new_constraints = plan_result.get("new_constraints", [])
                 state.constraints.extend(new_constraints)
                 state.weights = plan_result.get("weights", state.weights)
@@ -259,20 +282,22 @@ class OuterLoop:
                 )
                 logger.info(f"[OuterLoop] Requesting human review for plan")
                 yield LogEvent("warning", "Waiting for human review of plan...")
-                yield review_request
+                with self.tracer.span("outer.human_review", review_type="plan"):
+                    yield review_request
                 yield LogEvent("success", "Plan approved.")
             
             # Step 3: Implement
             logger.info(f"[OuterLoop] Step 3: Implementing...")
             yield LogEvent("info", "Step 3: Generating scoring code (Implementer)...")
             try:
-                impl_result = await self._run_async(self.implementer.run, {
-                    "plan": plan_result,
-                    "constraints": state.constraints,
-                    "objectives": plan_result.get("objectives"),
-                    "keywords": state.keywords,
-                    "task": state.task,
-                })
+                with self.tracer.span("outer.implement", iteration=state.iteration):
+                    impl_result = await self._run_async(self.implementer.run, {
+                        "plan": plan_result,
+                        "constraints": state.constraints,
+                        "objectives": plan_result.get("objectives"),
+                        "keywords": state.keywords,
+                        "task": state.task,
+                    })
                 scoring_code = impl_result.get("scoring_code", "")
             except Exception as e:
                 logger.error(f"[OuterLoop] Implementer failed: {e}")
@@ -289,13 +314,14 @@ class OuterLoop:
                     "task": state.task,
                     "dataset": state.dataset,
                 }
-                optimized = await self._run_async(
-                    self.optimizer.optimize,
-                    state.candidates,
-                    scoring_code,
-                    state.weights,
-                    context,
-                )
+                with self.tracer.span("outer.optimize", iteration=state.iteration, candidates=len(state.candidates)):
+                    optimized = await self._run_async(
+                        self.optimizer.optimize,
+                        state.candidates,
+                        scoring_code,
+                        state.weights,
+                        context,
+                    )
                 state.update(optimized)
                 yield LogEvent("success", f"Optimization complete. Best score: {state.best_score:.4f}")
                 
@@ -312,6 +338,9 @@ class OuterLoop:
                 yield LogEvent("error", f"Optimizer failed: {e}")
             
             iteration_elapsed = int((time.perf_counter() - iteration_start) * 1000)
+            iter_span.set(best_score=state.best_score)
+            iter_span.end()
+            ITERATIONS_TOTAL.inc()
             
             # Yield iteration result
             result = IterationResult(
@@ -366,7 +395,18 @@ class OuterLoop:
         """Run a synchronous function in an async context."""
         import asyncio
         loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(None, func, *args)
+        return await loop.run_in_executor(None, self.tracer.bind(func), *args)
+
+    def _write_trace(self, run_id: str) -> None:
+        """Write stage spans as trace.json next to graph.json."""
+        if not self.tracer.enabled:
+            return
+        try:
+            run_dir = self.config.run_path(run_id)
+            run_dir.mkdir(parents=True, exist_ok=True)
+            self.tracer.write_chrome_trace(run_dir / "trace.json")
+        except Exception as e:
+            logger.warning(f"[OuterLoop] Failed to write trace.json: {e}")
 
     def _build_analysis_report(self, result: Dict[str, Any], iteration: int) -> AnalysisReport:
         """Build AnalysisReport from analyzer output."""
@@ -4,6 +4,9 @@ import ast
 import multiprocessing as mp
 from typing import Any, Dict, Tuple
 
+from saga.metrics import CANDIDATES_SCORED_TOTAL, SANDBOX_TIMEOUTS_TOTAL
+from saga.trace.spans import span
+
 
 SAFE_BUILTINS: Dict[str, Any] = {
     "len": len,
@@ -44,14 +47,23 @@ def _worker(code: str, text: str, ctx: Dict[str, Any], q: mp.Queue) -> None:
 
 def run_scoring(code: str, text: str, ctx: Dict[str, Any], timeout_s: float) -> Tuple[bool, Any]:
     """Run scoring code with timeout; returns (ok, result_or_error)."""
-    q: mp.Queue = mp.Queue()
-    p = mp.Process(target=_worker, args=(code, text, ctx, q))
-    p.start()
-    p.join(timeout_s)
-    if p.is_alive():
-        p.terminate()
-        return False, "timeout"
-    if q.empty():
-        return False, "no-result"
-    status, payload = q.get()
-    return (status == "ok"), payload
+    with span("sandbox.run_scoring") as sp:
+        q: mp.Queue = mp.Queue()
+        p = mp.Process(target=_worker, args=(code, text, ctx, q))
+        with span("sandbox.spawn"):
+            p.start()
+        p.join(timeout_s)
+        if p.is_alive():
+            p.terminate()
+            sp.set(status="timeout")
+            SANDBOX_TIMEOUTS_TOTAL.inc()
+            CANDIDATES_SCORED_TOTAL.inc(status="timeout")
+            return False, "timeout"
+        if q.empty():
+            sp.set(status="no-result")
+            CANDIDATES_SCORED_TOTAL.inc(status="no-result")
+            return False, "no-result"
+        status, payload = q.get()
+        sp.set(status=status)
+        CANDIDATES_SCORED_TOTAL.inc(status=status)
+        return (status == "ok"), payload
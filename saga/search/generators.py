@@ -11,6 +11,8 @@ from abc import ABC, abstractmethod
 from dataclasses import dataclass
 from typing import Any, Dict, List, Protocol
 
+from saga.trace.spans import span
+
 logger = logging.getLogger(__name__)
 
 
@@ -134,16 +136,20 @@ class LLMGenerator(CandidateGenerator):
         logger.debug(f"[LLMGenerator] Population size: {len(population)}, Iteration: {feedback.iteration}")
         
         # Build prompt using strategy
-        prompt = strategy.build_prompt(population, feedback, num_candidates)
+        with span("llm_generator.build_prompt", strategy=strategy.__class__.__name__):
+            prompt = strategy.build_prompt(population, feedback, num_candidates)
         self.last_prompt = prompt  # Store for logging
         
         try:
-            response = self.client.call(prompt, temperature=0.8) # Increase temp for Math exploration
+            with span("llm_generator.call", prompt_chars=len(prompt)):
+                response = self.client.call(prompt, temperature=0.8) # Increase temp for Math exploration
             raw_content = response.get("choices", [{}])[0].get("message", {}).get("content", "")
             self.last_response = raw_content  # Store for logging
             
             # Parse using strategy
-            candidates = strategy.parse_candidates(raw_content, num_candidates)
+            with span("llm_generator.parse") as sp:
+                candidates = strategy.parse_candidates(raw_content, num_candidates)
+                sp.set(candidates=len(candidates))
             self.last_parsed_candidates = candidates
             
             logger.info(f"[LLMGenerator] Generated {len(candidates)} candidates successfully")
@@ -1 +1 @@
-__all__ = ["sqlite", "graph"]
+__all__ = ["sqlite", "graph", "columnar", "spans"]
@@ -0,0 +1,195 @@
+"""
+Columnar export of SAGA trace databases.
+
+Each `runs/<run_id>/trace.db` is flattened into a single NumPy `.npz` archive
+holding one array per column (`nodes.*`, `candidates.*`). Aggregate queries
+then load only the columns they need and work on whole arrays instead of
+scanning SQLite row by row, which keeps them fast across hundreds of runs.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import re
+import sqlite3
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_ITERATION_RE = re.compile(r"_(\d+)$")
+_BEST_SCORE_RE = re.compile(r"best_score=([-+0-9.eE]+|nan|inf)")
+
+
+def stage_of(node_name: str) -> str:
+    """Return the stage name of a node (`Iteration_3` -> `Iteration`)."""
+    return _ITERATION_RE.sub("", node_name)
+
+
+def _iteration_of(node_name: str) -> int:
+    m = _ITERATION_RE.search(node_name)
+    return int(m.group(1)) if m else -1
+
+
+def _best_score_of(input_summary: str) -> float:
+    m = _BEST_SCORE_RE.search(input_summary or "")
+    if not m:
+        return float("nan")
+    try:
+        return float(m.group(1))
+    except ValueError:
+        return float("nan")
+
+
+def _score_matrix(raw_vectors: List[str]) -> np.ndarray:
+    """Parse JSON score vectors into an (n, dims) float matrix padded with NaN."""
+    parsed: List[List[float]] = []
+    for raw in raw_vectors:
+        try:
+            vec = json.loads(raw) if raw else []
+            parsed.append([float(x) for x in vec] if isinstance(vec, list) else [])
+        except (ValueError, TypeError):
+            parsed.append([])
+    dims = max((len(v) for v in parsed), default=0)
+    out = np.full((len(parsed), dims), np.nan, dtype=np.float64)
+    for i, vec in enumerate(parsed):
+        out[i, : len(vec)] = vec
+    return out
+
+
+def export_trace(db_path: Path, out_path: Path) -> Path:
+    """Export one trace.db into a columnar `.npz` archive at out_path."""
+    db_path = Path(db_path)
+    out_path = Path(out_path)
+    conn = sqlite3.connect(db_path)
+    try:
+        cur = conn.cursor()
+        nodes = cur.execute("select node_name, input_summary, elapsed_ms from nodes").fetchall()
+        candidates = cur.execute("select candidate_id, text, score_vector from candidates").fetchall()
+    finally:
+        conn.close()
+
+    node_names = [r[0] or "" for r in nodes]
+    columns: Dict[str, np.ndarray] = {
+        "nodes.node_name": np.array(node_names, dtype=np.str_),
+        "nodes.stage": np.array([stage_of(n) for n in node_names], dtype=np.str_),
+        "nodes.iteration": np.array([_iteration_of(n) for n in node_names], dtype=np.int32),
+        "nodes.best_score": np.array([_best_score_of(r[1]) for r in nodes], dtype=np.float64),
+        "nodes.elapsed_ms": np.array([r[2] or 0 for r in nodes], dtype=np.int64),
+        "candidates.candidate_id": np.array([r[0] or "" for r in candidates], dtype=np.str_),
+        "candidates.text": np.array([r[1] or "" for r in candidates], dtype=np.str_),
+        "candidates.score_vector": _score_matrix([r[2] for r in candidates]),
+    }
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    # np.savez appends ".npz" when missing; write to the exact name we return.
+    with open(out_path, "wb") as f:
+        np.savez_compressed(f, **columns)
+    return out_path
+
+
+def export_runs(run_dirs: Iterable[Path], out_dir: Path, force: bool = False) -> List[Path]:
+    """Export every `<run_dir>/trace.db` into `<out_dir>/<run_id>.npz`.
+
+    Archives newer than their trace.db are reused, so re-exporting a growing
+    runs/ directory only touches new or updated runs.
+    """
+    out_dir = Path(out_dir)
+    written: List[Path] = []
+    for run_dir in run_dirs:
+        db_path = Path(run_dir) / "trace.db"
+        if not db_path.exists():
+            continue
+        out_path = out_dir / f"{Path(run_dir).name}.npz"
+        if not force and out_path.exists() and out_path.stat().st_mtime >= db_path.stat().st_mtime:
+            written.append(out_path)
+            continue
+        try:
+            written.append(export_trace(db_path, out_path))
+        except sqlite3.Error as e:
+            logger.warning(f"[columnar] Skipping {db_path}: {e}")
+    return written
+
+
+@dataclass
+class TraceColumns:
+    """Columns of many exported runs concatenated into flat arrays."""
+    run_ids: List[str]
+    node_run: np.ndarray
+    node_stage: np.ndarray
+    node_iteration: np.ndarray
+    node_best_score: np.ndarray
+    node_elapsed_ms: np.ndarray
+    candidate_run: np.ndarray
+
+    @classmethod
+    def load(cls, paths: Iterable[Path]) -> "TraceColumns":
+        """Load exported archives, reading only the columns queries need."""
+        run_ids: List[str] = []
+        node_run, stage, iteration, best, elapsed, cand_run = [], [], [], [], [], []
+        for idx, path in enumerate(paths):
+            path = Path(path)
+            run_ids.append(path.stem)
+            with np.load(path) as z:
+                n = len(z["nodes.iteration"])
+                node_run.append(np.full(n, idx, dtype=np.int32))
+                stage.append(z["nodes.stage"])
+                iteration.append(z["nodes.iteration"])
+                best.append(z["nodes.best_score"])
+                elapsed.append(z["nodes.elapsed_ms"])
+                cand_run.append(np.full(len(z["candidates.candidate_id"]), idx, dtype=np.int32))
+
+        def cat(parts: List[np.ndarray], dtype: object) -> np.ndarray:
+            return np.concatenate(parts) if parts else np.array([], dtype=dtype)
+
+        return cls(
+            run_ids=run_ids,
+            node_run=cat(node_run, np.int32),
+            node_stage=cat(stage, np.str_),
+            node_iteration=cat(iteration, np.int32),
+            node_best_score=cat(best, np.float64),
+            node_elapsed_ms=cat(elapsed, np.int64),
+            candidate_run=cat(cand_run, np.int32),
+        )
+
+    def best_per_iteration(self) -> List[Dict[str, float]]:
+        """Best score per outer-loop iteration, aggregated across runs."""
+        mask = (self.node_iteration >= 0) & ~np.isnan(self.node_best_score)
+        iters = self.node_iteration[mask]
+        scores = self.node_best_score[mask]
+        rows: List[Dict[str, float]] = []
+        for it in np.unique(iters):
+            s = scores[iters == it]
+            rows.append({
+                "iteration": int(it),
+                "runs": int(s.size),
+                "max": float(s.max()),
+                "mean": float(s.mean()),
+                "min": float(s.min()),
+            })
+        return rows
+
+    def candidates_per_second(self, run_id: Optional[str] = None) -> float:
+        """Candidates recorded per second of traced elapsed time."""
+        if run_id is None:
+            count = self.candidate_run.size
+            elapsed_ms = self.node_elapsed_ms.sum()
+        else:
+            idx = self.run_ids.index(run_id)
+            count = int(np.count_nonzero(self.candidate_run == idx))
+            elapsed_ms = self.node_elapsed_ms[self.node_run == idx].sum()
+        return float(count) / (float(elapsed_ms) / 1000.0) if elapsed_ms > 0 else 0.0
+
+    def stage_latency_percentiles(self, percentiles: Iterable[float] = (50, 95, 99)) -> Dict[str, Dict[str, float]]:
+        """Latency percentiles (ms) of each stage across all runs."""
+        pcts = list(percentiles)
+        out: Dict[str, Dict[str, float]] = {}
+        for stage in np.unique(self.node_stage):
+            values = self.node_elapsed_ms[self.node_stage == stage]
+            qs = np.percentile(values, pcts)
+            row = {f"p{p:g}": float(q) for p, q in zip(pcts, qs)}
+            row["count"] = float(values.size)
+            out[str(stage)] = row
+        return out
@@ -0,0 +1,172 @@
+"""
+Lightweight stage-level tracing spans for SAGA runs.
+
+A `Tracer` records nested, attributed spans and writes them as Chrome /
+Perfetto trace events (`trace.json`). Components that are shared across runs
+(optimizer, generators, adapters, sandbox) look up the tracer of the current
+run through a context variable, so concurrent runs never mix their spans.
+
+When no tracer is active, `span()` returns a shared no-op object, so the
+instrumentation costs one context-variable lookup per call site.
+"""
+from __future__ import annotations
+
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple, TypeVar
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+# (name, start_ns, end_ns, thread_id, args)
+_Event = Tuple[str, int, int, int, Dict[str, Any]]
+
+
+class _NullSpan:
+    """No-op span returned when tracing is disabled."""
+    __slots__ = ()
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        return False
+
+    def set(self, **attrs: Any) -> None:
+        pass
+
+    def end(self) -> None:
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Span:
+    """A started span; ends on `end()` or when leaving a `with` block."""
+    __slots__ = ("_tracer", "name", "args", "_start_ns", "_ended")
+
+    def __init__(self, tracer: "Tracer", name: str, args: Dict[str, Any]):
+        self._tracer = tracer
+        self.name = name
+        self.args = args
+        self._start_ns = time.perf_counter_ns()
+        self._ended = False
+
+    def __enter__(self) -> "Span":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        self.end()
+        return False
+
+    def set(self, **attrs: Any) -> None:
+        """Attach attributes to the span."""
+        self.args.update(attrs)
+
+    def end(self) -> None:
+        """Finish the span and record it (idempotent)."""
+        if self._ended:
+            return
+        self._ended = True
+        self._tracer._record(self.name, self._start_ns, time.perf_counter_ns(), self.args)
+
+
+class NullTracer:
+    """Tracer used when span tracing is disabled."""
+    enabled = False
+
+    def span(self, name: str, **attrs: Any) -> _NullSpan:
+        return _NULL_SPAN
+
+    def bind(self, fn: F) -> F:
+        return fn
+
+    def write_chrome_trace(self, path: Path) -> None:
+        pass
+
+
+class Tracer:
+    """Collects spans of one run and exports Chrome trace-event JSON."""
+    enabled = True
+
+    def __init__(self, max_events: int = 200_000):
+        self.max_events = max_events
+        self.dropped = 0
+        self._origin_ns = time.perf_counter_ns()
+        self._events: List[_Event] = []
+        self._thread_names: Dict[int, str] = {}
+
+    def span(self, name: str, **attrs: Any) -> Span:
+        """Start a span; use as a context manager or call `end()`."""
+        return Span(self, name, attrs)
+
+    def bind(self, fn: F) -> F:
+        """Wrap fn so it runs with this tracer active (e.g. in executor threads)."""
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            token = _current.set(self)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                _current.reset(token)
+        return wrapper  # type: ignore[return-value]
+
+    def _record(self, name: str, start_ns: int, end_ns: int, args: Dict[str, Any]) -> None:
+        # list.append is atomic under the GIL, so spans from worker threads need no lock.
+        if len(self._events) >= self.max_events:
+            self.dropped += 1
+            return
+        tid = threading.get_ident()
+        if tid not in self._thread_names:
+            self._thread_names[tid] = threading.current_thread().name
+        self._events.append((name, start_ns, end_ns, tid, args))
+
+    def to_chrome_trace(self) -> Dict[str, Any]:
+        """Return the Chrome/Perfetto trace-event payload."""
+        pid = os.getpid()
+        events: List[Dict[str, Any]] = [
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": tname}}
+            for tid, tname in list(self._thread_names.items())
+        ]
+        for name, start_ns, end_ns, tid, args in list(self._events):
+            events.append({
+                "name": name,
+                "cat": name.split(".", 1)[0],
+                "ph": "X",
+                "ts": (start_ns - self._origin_ns) / 1000.0,
+                "dur": (end_ns - start_ns) / 1000.0,
+                "pid": pid,
+                "tid": tid,
+                "args": args,
+            })
+        return {"traceEvents": events, "displayTimeUnit": "ms", "otherData": {"dropped_events": self.dropped}}
+
+    def write_chrome_trace(self, path: Path) -> None:
+        """Write trace.json (open in chrome://tracing or ui.perfetto.dev)."""
+        Path(path).write_text(json.dumps(self.to_chrome_trace(), ensure_ascii=False, default=str), encoding="utf-8")
+
+
+NULL_TRACER = NullTracer()
+_current: contextvars.ContextVar[Tracer | NullTracer] = contextvars.ContextVar("saga_tracer", default=NULL_TRACER)
+
+
+def current_tracer() -> Tracer | NullTracer:
+    """Return the tracer of the current run (NULL_TRACER if none)."""
+    return _current.get()
+
+
+def span(name: str, **attrs: Any) -> Span | _NullSpan:
+    """Start a span on the current run's tracer."""
+    return _current.get().span(name, **attrs)
+
+
+def bind(fn: F) -> F:
+    """Bind fn to the current tracer so it can run on another thread."""
+    return _current.get().bind(fn)
@@ -1,91 +1,33 @@
 """
 SAGA Server - WebSocket endpoint for streaming OuterLoop events.
 Enhanced with pause/stop control and agent-level logging.
+Runs execute in the background and survive disconnects; clients reattach
+with {"type": "attach", "run_id": ..., "last_seq": n}.
 """
 from __future__ import annotations
 
 import asyncio
 import logging
 import time
+from typing import Any, Optional
 from contextlib import asynccontextmanager
 from pathlib import Path
-from dataclasses import asdict
-from enum import Enum
-from typing import Optional
 
-from fastapi import FastAPI, WebSocket
+from fastapi import Body, FastAPI, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import PlainTextResponse
 from fastapi.staticfiles import StaticFiles
 
 from saga.config import SagaConfig
+from saga.metrics import REGISTRY
 from saga.runner import SagaRunner
-from saga.outer_loop import IterationResult, FinalReport, HumanReviewRequest, LogEvent, HumanReviewType
+from saga_server.events import EventSink, parse_levels
+from saga_server.jobs import JobQueue, JobStore
+from saga_server.runs import RunManager, RunSession
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-class RunState(Enum):
-    """State of a SAGA run."""
-    IDLE = "idle"
-    RUNNING = "running"
-    PAUSED = "paused"
-    STOPPING = "stopping"
-    COMPLETED = "completed"
-
-
-class RunController:
-    """Controller for managing run state (pause/stop)."""
-    
-    def __init__(self):
-        self.state = RunState.IDLE
-        self._pause_event = asyncio.Event()
-        self._pause_event.set()  # Not paused initially
-        self._stop_requested = False
-        self._current_result: Optional[dict] = None
-    
-    def start(self):
-        self.state = RunState.RUNNING
-        self._stop_requested = False
-        self._pause_event.set()
-        self._current_result = None
-    
-    def pause(self):
-        if self.state == RunState.RUNNING:
-            self.state = RunState.PAUSED
-            self._pause_event.clear()
-            return True
-        return False
-    
-    def resume(self):
-        if self.state == RunState.PAUSED:
-            self.state = RunState.RUNNING
-            self._pause_event.set()
-            return True
-        return False
-    
-    def stop(self):
-        self._stop_requested = True
-        self.state = RunState.STOPPING
-        self._pause_event.set()  # Unblock if paused
-        return True
-    
-    def complete(self):
-        self.state = RunState.COMPLETED
-    
-    def should_stop(self) -> bool:
-        return self._stop_requested
-    
-    async def wait_if_paused(self):
-        """Wait if the run is paused."""
-        await self._pause_event.wait()
-    
-    def set_current_result(self, result: dict):
-        self._current_result = result
-    
-    def get_current_result(self) -> Optional[dict]:
-        return self._current_result
-
-
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """App lifespan context manager."""
@@ -93,15 +35,25 @@ async def lifespan(app: FastAPI):
     cfg = SagaConfig()
     runner = SagaRunner(cfg)
     app.state.runner = runner
-    app.state.controllers = {}  # run_id -> RunController
+    app.state.runs = RunManager(
+        runner,
+        buffer_size=cfg.event_buffer,
+        unattended_review_s=cfg.unattended_review_s,
+        unattended_review=cfg.unattended_review,
+    )
+    app.state.jobs = JobQueue(app.state.runs, JobStore(Path(cfg.run_dir) / "jobs.db"), cfg.job_concurrency)
     
     # Ensure run directory exists before mounting
     run_dir_path = Path(cfg.run_dir)
     run_dir_path.mkdir(parents=True, exist_ok=True)
     app.mount("/runs", StaticFiles(directory=run_dir_path), name="runs")
+    app.state.jobs.start()
     
     yield
     # Shutdown
+    await app.state.jobs.stop()
+    await app.state.runs.shutdown()
+    app.state.jobs.store.close()
 
 
 app = FastAPI(lifespan=lifespan)
@@ -113,175 +65,181 @@ def healthz():
     return {"ok": True}
 
 
+@app.get("/metrics")
+def metrics():
+    """Prometheus metrics endpoint."""
+    return PlainTextResponse(REGISTRY.render_prometheus(), media_type="text/plain; version=0.0.4")
+
+
+@app.post("/api/runs")
+async def submit_runs(request: Request, body: Any = Body(...)):
+    """Queue one run or a batch: a start message, a list of them, or {"runs": [...]}."""
+    runs = body.get("runs", [body]) if isinstance(body, dict) else body
+    if not isinstance(runs, list) or not runs or not all(isinstance(r, dict) for r in runs):
+        raise HTTPException(status_code=400, detail="expected a run object, a list of runs or {\"runs\": [...]}")
+    try:
+        run_ids = request.app.state.jobs.submit(runs)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {"runs": [{"run_id": run_id, "status": "queued"} for run_id in run_ids]}
+
+
+@app.get("/api/runs")
+async def list_runs(request: Request, status: Optional[str] = None, limit: int = 100, offset: int = 0):
+    """List queued/running/finished jobs, newest first."""
+    limit = max(1, min(limit, 1000))
+    return {"runs": request.app.state.jobs.store.list(status, limit, max(0, offset))}
+
+
+@app.get("/api/runs/{run_id}")
+async def get_run(request: Request, run_id: str):
+    """Job status; live runs also report controller state and event seq."""
+    job = request.app.state.jobs.store.get(run_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown run_id: {run_id}")
+    session = request.app.state.runs.get(run_id)
+    if session is not None and not session.done:
+        job["state"] = session.controller.state.value
+        job["last_seq"] = session.last_seq
+    return job
+
+
+@app.post("/api/runs/{run_id}/cancel")
+async def cancel_run(request: Request, run_id: str):
+    """Cancel a queued job or stop a running one."""
+    status = request.app.state.jobs.cancel(run_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail=f"Unknown run_id: {run_id}")
+    return {"run_id": run_id, "status": status}
+
+
+@app.get("/api/runs/{run_id}/report")
+async def get_run_report(request: Request, run_id: str):
+    """FinalReport of a finished job."""
+    store = request.app.state.jobs.store
+    job = store.get(run_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown run_id: {run_id}")
+    report = store.result(run_id)
+    if report is None:
+        raise HTTPException(status_code=409, detail=f"Run {run_id} has no report (status: {job['status']})")
+    return report
+
+
 @app.websocket("/ws/run")
 async def ws_run(ws: WebSocket):
-    runner: SagaRunner = ws.app.state.runner
-    controllers: dict = ws.app.state.controllers
+    manager: RunManager = ws.app.state.runs
     await ws.accept()
     
-    controller = RunController()
-    run_id = None
+    sink = EventSink(ws)
+    reader = streamer = None
+    session: Optional[RunSession] = None
     
     try:
         data = await ws.receive_json()
-        text = data.get("text", "")
-        keywords = data.get("keywords", [])
-        mode = data.get("mode", "semi-pilot")
-        run_id = data.get("run_id") or None
-        config_overrides = data.get("config", {})
-        
-        # Register controller
-        if run_id:
-            controllers[run_id] = controller
+        # Framing options: coalescing window, log-level subscription, binary frames
+        sink = EventSink(
+            ws,
+            batch_ms=data.get("batch_ms", 0) or 0,
+            levels=parse_levels(data.get("levels")),
+            binary=bool(data.get("binary", False)),
+        )
         
-        controller.start()
-        await ws.send_json({"type": "run_started", "run_id": run_id or "pending", "state": controller.state.value})
-        
-        # Start listening for control messages in background
-        control_task = asyncio.create_task(_handle_control_messages(ws, controller))
-        
-        # Execute SAGA Runner (Async Iterator)
-        async for event in runner.run(
-            text=text, 
-            keywords=keywords, 
-            mode=mode, 
-            run_id=run_id,
-            config_overrides=config_overrides
-        ):
-            # Check if stop requested
-            if controller.should_stop():
-                logger.info(f"Stop requested for run {run_id}")
-                await ws.send_json({
-                    "type": "run_stopped",
-                    "run_id": run_id,
-                    "current_result": controller.get_current_result()
-                })
-                break
-            
-            # Wait if paused
-            if controller.state == RunState.PAUSED:
-                await ws.send_json({"type": "run_paused", "run_id": run_id})
-            await controller.wait_if_paused()
-            
-            if isinstance(event, IterationResult):
-                # Save current result for potential stop
-                controller.set_current_result({
-                    "iteration": event.iteration,
-                    "best_candidate": event.best_candidate,
-                    "best_score": event.best_score
-                })
-                
-                # Send iteration update
-                await ws.send_json({
-                    "type": "iteration_update",
-                    "iteration": event.iteration
-                })
-                
-                # Send analysis report (convert dataclass to dict)
-                report_dict = asdict(event.analysis_report)
-                await ws.send_json({
-                    "type": "analysis_report",
-                    "report": report_dict
-                })
-
-            elif isinstance(event, HumanReviewRequest):
-                # Send review request
-                report_data = None
-                if event.review_type == "analyze" or event.review_type == HumanReviewType.ANALYZE:
-                    report_data = event.data.get("report")
-                
-                await ws.send_json({
-                    "type": "need_review",
-                    "message": event.message,
-                    "report": asdict(report_data) if report_data else None
-                })
-                
-                # Wait for user approval (handled by control task)
-                logger.info(f"Waiting for human review for iteration {event.iteration}")
-                while True:
-                    if controller.should_stop():
-                        break
-                    try:
-                        # Short timeout to allow checking stop flag
-                        await asyncio.wait_for(controller.wait_if_paused(), timeout=0.5)
-                        # Check if approved via control messages
-                        msg = await asyncio.wait_for(ws.receive_json(), timeout=0.5)
-                        msg_type = msg.get("type")
-                        if msg_type == "approve":
-                            logger.info("Received approval from user.")
-                            break
-                        elif msg_type == "cancel" or msg_type == "stop":
-                            logger.info("Received stop from user during review.")
-                            controller.stop()
-                            break
-                    except asyncio.TimeoutError:
-                        continue
-                    except Exception as e:
-                        logger.error(f"Error waiting for review response: {e}")
-                        break
-
-            elif isinstance(event, LogEvent):
-                await ws.send_json({
-                    "type": "system_log",
-                    "level": event.level,
-                    "message": event.message,
-                    "timestamp": event.timestamp
-                })
-
-            elif isinstance(event, FinalReport):
-                controller.complete()
-                await ws.send_json({
-                    "type": "run_finished",
-                    "run_id": event.run_id,
-                    "best_candidate": event.best_candidate,
-                    "best_score": event.best_score,
-                    "termination_reason": event.termination_reason,
-                    "total_iterations": event.total_iterations,
-                    "elapsed_ms": event.elapsed_ms
-                })
+        if data.get("type") == "attach":
+            # Reattach to a background run and replay what was missed
+            session = manager.get(str(data.get("run_id") or ""))
+            if session is None:
+                await sink.send({"type": "ui_error", "message": f"Unknown run_id: {data.get('run_id')}"})
+                return
+            last_seq = int(data.get("last_seq") or 0)
+            await sink.send({
+                "type": "attached",
+                "run_id": session.run_id,
+                "state": session.controller.state.value,
+                "last_seq": session.last_seq,
+            })
+        else:
+            try:
+                session = manager.start(data)
+            except ValueError as e:
+                await sink.send({"type": "ui_error", "message": str(e)})
+                return
+            last_seq = 0
         
-        control_task.cancel()
+        # The run keeps going when this viewer leaves; only its stream ends.
+        session.attach()
+        reader = asyncio.create_task(_handle_control_messages(ws, session, sink))
+        streamer = asyncio.create_task(_stream_session(session, sink, last_seq))
+        await asyncio.wait({reader, streamer}, return_when=asyncio.FIRST_COMPLETED)
 
     except Exception as e:
         logger.error(f"WebSocket error: {e}")
-        await ws.send_json({"type": "ui_error", "message": str(e)})
+        await sink.send({"type": "ui_error", "message": str(e)})
     finally:
-        if run_id and run_id in controllers:
-            del controllers[run_id]
+        for task in (reader, streamer):
+            if task is not None:
+                task.cancel()
+        if reader is not None and session is not None:
+            session.detach()
         try:
+            await sink.aclose()
             await ws.close()
         except:
             pass
 
 
-async def _handle_control_messages(ws: WebSocket, controller: RunController):
-    """Background task to handle control messages (pause/resume/stop)."""
-    try:
-        while True:
-            try:
-                msg = await asyncio.wait_for(ws.receive_json(), timeout=1.0)
-                msg_type = msg.get("type")
-                
-                if msg_type == "pause":
-                    if controller.pause():
-                        logger.info("Run paused")
-                        await ws.send_json({"type": "pause_ack", "state": "paused"})
-                
-                elif msg_type == "resume":
-                    if controller.resume():
-                        logger.info("Run resumed")
-                        await ws.send_json({"type": "resume_ack", "state": "running"})
-                
-                elif msg_type == "stop":
-                    controller.stop()
-                    logger.info("Stop requested")
-                    await ws.send_json({"type": "stop_ack", "state": "stopping"})
-                    break
-                
-            except asyncio.TimeoutError:
-                continue
-            except Exception as e:
-                logger.error(f"Control message error: {e}")
-                break
-    except asyncio.CancelledError:
-        pass
+async def _stream_session(session: RunSession, sink: EventSink, last_seq: int):
+    """Forward run messages newer than last_seq to one viewer until the run ends."""
+    cursor = last_seq
+    while not sink.closed:
+        events, missed = session.events_after(cursor)
+        if missed:
+            await sink.send({"type": "replay_gap", "run_id": session.run_id, "missed": missed})
+        for msg in events:
+            # Filter before encoding so unsubscribed levels cost nothing
+            if msg["type"] != "system_log" or sink.wants(msg["level"]):
+                await sink.send(msg)
+            cursor = max(cursor, msg["seq"])
+        if session.done and cursor >= session.last_seq:
+            return
+        await session.wait(cursor)
+
+
+async def _handle_control_messages(ws: WebSocket, session: RunSession, sink: EventSink):
+    """Read client messages for the whole connection and dispatch them to the run."""
+    controller = session.controller
+    while True:
+        try:
+            msg = await ws.receive_json()
+        except WebSocketDisconnect:
+            logger.info(f"Viewer detached from run {session.run_id}")
+            return
+        except (ValueError, KeyError) as e:
+            # Malformed JSON or a binary frame: skip it, the viewer stays attached
+            logger.warning(f"Ignoring malformed control message: {e}")
+            continue
+
+        msg_type = msg.get("type") if isinstance(msg, dict) else None
+
+        if msg_type == "pause":
+            if controller.pause():
+                logger.info("Run paused")
+                session.publish({"type": "pause_ack", "state": "paused"})
+
+        elif msg_type == "resume":
+            if controller.resume():
+                logger.info("Run resumed")
+                session.publish({"type": "resume_ack", "state": "running"})
+
+        elif msg_type in ("stop", "cancel"):
+            if not session.done:
+                controller.stop()
+                logger.info("Stop requested")
+                session.publish({"type": "stop_ack", "state": "stopping"})
+
+        elif msg_type == "approve":
+            if not controller.approve():
+                logger.info("Ignoring approve: no review pending")
+
+        elif msg_type == "subscribe":
+            sink.subscribe(parse_levels(msg.get("levels")))
@@ -0,0 +1,139 @@
+"""
+Outgoing event framing for the SAGA WebSocket.
+
+`EventSink` coalesces the events of one connection: events produced within
+`batch_ms` of each other leave as a single `{"type": "batch", "events": [...]}`
+frame, encoded in one pass with orjson when it is installed. Clients choose
+which `system_log` levels they want, so filtered events are never encoded.
+"""
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+import json
+import logging
+from enum import Enum
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from fastapi import WebSocket
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+# Messages that end a wait on the client side are flushed without delay.
+URGENT_TYPES = {
+    "need_review",
+    "run_finished",
+    "run_stopped",
+    "ui_error",
+    "pause_ack",
+    "resume_ack",
+    "stop_ack",
+    "run_paused",
+}
+
+
+def _default(obj: Any) -> Any:
+    # Shallow conversion; the encoder recurses into the result (unlike asdict's deep copy).
+    # orjson serializes dataclasses natively, the stdlib fallback lands here.
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return {f.name: getattr(obj, f.name) for f in dataclasses.fields(obj)}
+    if isinstance(obj, Enum):
+        return obj.value
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    return str(obj)
+
+
+def encode_json(obj: Any) -> bytes:
+    """Encode obj as UTF-8 JSON, using orjson when available."""
+    if orjson is not None:
+        return orjson.dumps(
+            obj,
+            default=_default,
+            option=orjson.OPT_NON_STR_KEYS,
+        )
+    return json.dumps(obj, ensure_ascii=False, default=_default).encode("utf-8")
+
+
+def parse_levels(value: Any) -> Optional[Set[str]]:
+    """Parse a `levels` subscription (list or comma-separated string); None = all."""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = value.split(",")
+    if not isinstance(value, Iterable):
+        return None
+    levels = {str(v).strip() for v in value if str(v).strip()}
+    return levels or None
+
+
+class EventSink:
+    """Per-connection event writer with time-window coalescing."""
+
+    def __init__(
+        self,
+        ws: WebSocket,
+        *,
+        batch_ms: float = 0.0,
+        levels: Optional[Set[str]] = None,
+        binary: bool = False,
+    ):
+        self.ws = ws
+        self.batch_s = max(0.0, float(batch_ms)) / 1000.0
+        self.levels = levels
+        self.binary = binary
+        self._buffer: List[Dict[str, Any]] = []
+        self._flush_task: Optional[asyncio.Task] = None
+        self._send_lock = asyncio.Lock()
+        self.closed = False
+
+    def wants(self, level: str) -> bool:
+        """True if the client subscribed to this system_log level."""
+        return self.levels is None or level in self.levels
+
+    def subscribe(self, levels: Optional[Set[str]]) -> None:
+        self.levels = levels
+
+    async def send(self, msg: Dict[str, Any]) -> None:
+        """Queue msg; urgent messages and unbatched sinks flush immediately."""
+        if self.closed:
+            return
+        self._buffer.append(msg)
+        if self.batch_s <= 0 or msg.get("type") in URGENT_TYPES:
+            await self.flush()
+        elif self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.batch_s)
+        self._flush_task = None
+        await self.flush()
+
+    async def flush(self) -> None:
+        """Send everything buffered as one frame."""
+        if self._flush_task is not None and self._flush_task is not asyncio.current_task():
+            self._flush_task.cancel()
+            self._flush_task = None
+        if not self._buffer or self.closed:
+            return
+        events, self._buffer = self._buffer, []
+        payload = events[0] if len(events) == 1 else {"type": "batch", "events": events}
+        data = encode_json(payload)
+        async with self._send_lock:
+            try:
+                if self.binary:
+                    await self.ws.send_bytes(data)
+                else:
+                    await self.ws.send_text(data.decode("utf-8"))
+            except Exception as e:
+                logger.info(f"EventSink send failed, closing sink: {e}")
+                self.closed = True
+
+    async def aclose(self) -> None:
+        await self.flush()
+        self.closed = True
@@ -0,0 +1,206 @@
+"""
+Persistent job queue for batch SAGA runs submitted over REST.
+
+Jobs are stored in SQLite (`<run_dir>/jobs.db`) so a restart picks up what
+was queued or interrupted. A fixed pool of asyncio workers pulls job ids from
+the queue and executes each one as a background run of `RunManager`, so REST
+jobs can also be watched or reviewed over `/ws/run` with `attach`.
+"""
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+import json
+import logging
+import sqlite3
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from saga.metrics import RUNS_QUEUED
+from saga_server.runs import RunManager
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+FINISHED = "finished"
+STOPPED = "stopped"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+_COLUMNS = "run_id, status, params, submitted_at, started_at, finished_at, result, error"
+
+
+class JobStore:
+    """SQLite-backed job records."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Only used from the event loop thread (the REST handlers are async)
+        self._conn = sqlite3.connect(self.path)
+        self._conn.execute(
+            "create table if not exists jobs (run_id text primary key, status text, params text, "
+            "submitted_at real, started_at real, finished_at real, result text, error text)"
+        )
+        self._conn.execute("create index if not exists jobs_status on jobs (status, submitted_at)")
+        self._conn.commit()
+
+    def insert(self, run_ids: List[str], params: List[Dict[str, Any]]) -> None:
+        now = time.time()
+        self._conn.executemany(
+            "insert into jobs (run_id, status, params, submitted_at) values (?, ?, ?, ?)",
+            [(rid, QUEUED, json.dumps(p, ensure_ascii=False), now) for rid, p in zip(run_ids, params)],
+        )
+        self._conn.commit()
+
+    def update(self, run_id: str, **fields: Any) -> None:
+        cols = ", ".join(f"{k} = ?" for k in fields)
+        self._conn.execute(f"update jobs set {cols} where run_id = ?", (*fields.values(), run_id))
+        self._conn.commit()
+
+    def get(self, run_id: str) -> Optional[Dict[str, Any]]:
+        row = self._conn.execute(f"select {_COLUMNS} from jobs where run_id = ?", (run_id,)).fetchone()
+        return self._row(row) if row else None
+
+    def list(self, status: Optional[str] = None, limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
+        sql = f"select {_COLUMNS} from jobs"
+        args: List[Any] = []
+        if status:
+            sql += " where status = ?"
+            args.append(status)
+        sql += " order by submitted_at desc, rowid desc limit ? offset ?"
+        args += [limit, offset]
+        return [self._row(r) for r in self._conn.execute(sql, args).fetchall()]
+
+    def pending(self) -> List[str]:
+        """Run ids to (re)queue on startup: queued jobs and jobs cut off by a restart."""
+        rows = self._conn.execute(
+            "select run_id from jobs where status in (?, ?) order by submitted_at, rowid", (QUEUED, RUNNING)
+        ).fetchall()
+        return [r[0] for r in rows]
+
+    def params(self, run_id: str) -> Dict[str, Any]:
+        row = self._conn.execute("select params from jobs where run_id = ?", (run_id,)).fetchone()
+        return json.loads(row[0]) if row else {}
+
+    def result(self, run_id: str) -> Optional[Dict[str, Any]]:
+        row = self._conn.execute("select result from jobs where run_id = ?", (run_id,)).fetchone()
+        return json.loads(row[0]) if row and row[0] else None
+
+    def close(self) -> None:
+        self._conn.close()
+
+    @staticmethod
+    def _row(row: tuple) -> Dict[str, Any]:
+        run_id, status, _params, submitted_at, started_at, finished_at, result, error = row
+        summary = None
+        if result:
+            report = json.loads(result)
+            summary = {k: report.get(k) for k in ("best_candidate", "best_score", "termination_reason", "total_iterations")}
+        return {
+            "run_id": run_id,
+            "status": status,
+            "submitted_at": submitted_at,
+            "started_at": started_at,
+            "finished_at": finished_at,
+            "summary": summary,
+            "error": error,
+        }
+
+
+class JobQueue:
+    """Bounded-concurrency worker pool over persisted jobs."""
+
+    def __init__(self, manager: RunManager, store: JobStore, concurrency: int = 2):
+        self.manager = manager
+        self.store = store
+        self.concurrency = max(1, int(concurrency))
+        self._queue: asyncio.Queue[str] = asyncio.Queue()
+        self._workers: List[asyncio.Task] = []
+
+    def start(self) -> None:
+        """Requeue persisted jobs and start the workers."""
+        pending = self.store.pending()
+        for run_id in pending:
+            self.store.update(run_id, status=QUEUED, started_at=None)
+            self._enqueue(run_id)
+        if pending:
+            logger.info(f"Requeued {len(pending)} persisted job(s)")
+        self._workers = [asyncio.create_task(self._worker(i)) for i in range(self.concurrency)]
+
+    async def stop(self) -> None:
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def submit(self, runs: List[Dict[str, Any]]) -> List[str]:
+        """Persist and enqueue runs (WS start-message shape); returns their run ids."""
+        run_ids: List[str] = []
+        params: List[Dict[str, Any]] = []
+        for run in runs:
+            run = dict(run)
+            run_id = str(run.get("run_id") or uuid.uuid4().hex)
+            if run_id in run_ids or self.store.get(run_id) is not None:
+                raise ValueError(f"run_id already exists: {run_id}")
+            # Nobody is attached to approve reviews in a batch job unless asked for
+            run.setdefault("mode", "autopilot")
+            run["run_id"] = run_id
+            run_ids.append(run_id)
+            params.append(run)
+        self.store.insert(run_ids, params)
+        for run_id in run_ids:
+            self._enqueue(run_id)
+        return run_ids
+
+    def cancel(self, run_id: str) -> Optional[str]:
+        """Cancel a queued or running job; returns its resulting status (None if unknown)."""
+        job = self.store.get(run_id)
+        if job is None:
+            return None
+        if job["status"] == QUEUED:
+            self.store.update(run_id, status=CANCELLED, finished_at=time.time())
+            return CANCELLED
+        if job["status"] == RUNNING:
+            session = self.manager.get(run_id)
+            if session is not None and not session.done:
+                session.controller.stop()
+            return "stopping"
+        return job["status"]
+
+    def _enqueue(self, run_id: str) -> None:
+        RUNS_QUEUED.inc()
+        self._queue.put_nowait(run_id)
+
+    async def _worker(self, index: int) -> None:
+        while True:
+            run_id = await self._queue.get()
+            RUNS_QUEUED.dec()
+            try:
+                await self._execute(run_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Job worker {index} failed on {run_id}: {e}")
+                self.store.update(run_id, status=FAILED, finished_at=time.time(), error=str(e))
+
+    async def _execute(self, run_id: str) -> None:
+        job = self.store.get(run_id)
+        if job is None or job["status"] != QUEUED:
+            return  # cancelled while queued
+        self.store.update(run_id, status=RUNNING, started_at=time.time())
+        session = self.manager.start(self.store.params(run_id))
+        try:
+            await asyncio.shield(session.task)
+        except asyncio.CancelledError:
+            # Server shutdown: leave the job as running so it is requeued on restart
+            raise
+        if session.final_report is not None:
+            status = FINISHED
+            result = json.dumps(dataclasses.asdict(session.final_report), ensure_ascii=False, default=str)
+        else:
+            status, result = (FAILED if session.error else STOPPED), None
+        self.store.update(run_id, status=status, finished_at=time.time(), result=result, error=session.error)
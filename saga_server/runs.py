@@ -0,0 +1,389 @@
+"""
+Server-side SAGA runs that outlive their WebSocket connections.
+
+Each run executes as a background task owned by `RunManager`. Outgoing
+messages get a monotonically increasing `seq` and are kept in a bounded
+per-run ring buffer; viewers read from the buffer with their own cursor, so
+any number of connections can watch one run and a client that reconnects
+with `{"type": "attach", "run_id": ..., "last_seq": n}` replays what it missed.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import uuid
+from collections import deque
+from enum import Enum
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from saga.config import UNATTENDED_REVIEW_POLICIES
+from saga.metrics import RUNS_ACTIVE
+from saga.outer_loop import FinalReport, HumanReviewRequest, HumanReviewType, IterationResult, LogEvent
+from saga.runner import SagaRunner
+
+logger = logging.getLogger(__name__)
+
+
+class RunState(Enum):
+    """State of a SAGA run."""
+    IDLE = "idle"
+    RUNNING = "running"
+    PAUSED = "paused"
+    STOPPING = "stopping"
+    COMPLETED = "completed"
+
+
+class RunController:
+    """Controller for managing run state (pause/stop/review).
+
+    Control messages are dispatched into asyncio primitives, so a paused run
+    or a run waiting for human review sleeps until the message arrives.
+    """
+
+    def __init__(self):
+        self.state = RunState.IDLE
+        self._pause_event = asyncio.Event()
+        self._pause_event.set()  # Not paused initially
+        self._review_event = asyncio.Event()  # Set on approve or stop
+        self._review_pending = False
+        self._stop_requested = False
+        self._current_result: Optional[dict] = None
+
+    def start(self):
+        self.state = RunState.RUNNING
+        self._stop_requested = False
+        self._pause_event.set()
+        self._review_event.clear()
+        self._review_pending = False
+        self._current_result = None
+
+    def pause(self):
+        if self.state == RunState.RUNNING:
+            self.state = RunState.PAUSED
+            self._pause_event.clear()
+            return True
+        return False
+
+    def resume(self):
+        if self.state == RunState.PAUSED:
+            self.state = RunState.RUNNING
+            self._pause_event.set()
+            return True
+        return False
+
+    def stop(self):
+        self._stop_requested = True
+        self.state = RunState.STOPPING
+        self._pause_event.set()  # Unblock if paused
+        self._review_event.set()  # Unblock if waiting for review
+        return True
+
+    def begin_review(self):
+        """Mark a human review as pending; call before sending need_review."""
+        self._review_pending = True
+        self._review_event.clear()
+
+    def approve(self) -> bool:
+        """Approve the pending review; False if no review is pending."""
+        if not self._review_pending:
+            return False
+        self._review_event.set()
+        return True
+
+    @property
+    def review_pending(self) -> bool:
+        return self._review_pending
+
+    async def wait_for_review(self) -> bool:
+        """Wait until the pending review is approved or the run is stopped.
+
+        Returns True if approved, False if stopped.
+        """
+        await self._review_event.wait()
+        self._review_pending = False
+        return not self._stop_requested
+
+    def complete(self):
+        self.state = RunState.COMPLETED
+
+    def should_stop(self) -> bool:
+        return self._stop_requested
+
+    async def wait_if_paused(self):
+        """Wait if the run is paused."""
+        await self._pause_event.wait()
+
+    def set_current_result(self, result: dict):
+        self._current_result = result
+
+    def get_current_result(self) -> Optional[dict]:
+        return self._current_result
+
+
+class RunSession:
+    """One background run: controller, event ring buffer and viewer wake-up.
+
+    A review requested while no viewer is attached does not hold the run (and
+    its job slot) forever: after `unattended_review_s` it is resolved by the
+    `unattended_review` policy ("stop" or "approve"). Attaching a viewer
+    cancels the countdown.
+    """
+
+    def __init__(
+        self,
+        run_id: str,
+        buffer_size: int = 2048,
+        *,
+        unattended_review_s: float = 300.0,
+        unattended_review: str = "stop",
+    ):
+        if unattended_review not in UNATTENDED_REVIEW_POLICIES:
+            raise ValueError(f"unknown unattended_review policy: {unattended_review!r}")
+        self.run_id = run_id
+        self.controller = RunController()
+        self.events: Deque[Dict[str, Any]] = deque(maxlen=max(1, buffer_size))
+        self.last_seq = 0
+        self.done = False
+        self.final_report: Optional[FinalReport] = None
+        self.error: Optional[str] = None
+        self.task: Optional[asyncio.Task] = None
+        self._review_msg: Optional[Dict[str, Any]] = None
+        self._changed = asyncio.Event()
+        self.viewers = 0
+        self.unattended_review_s = unattended_review_s
+        self.unattended_review = unattended_review
+        self._review_timer: Optional[asyncio.TimerHandle] = None
+
+    def publish(self, msg: Dict[str, Any]) -> Dict[str, Any]:
+        """Append msg to the ring buffer with the next seq and wake viewers."""
+        self.last_seq += 1
+        msg["seq"] = self.last_seq
+        self.events.append(msg)
+        self._wake()
+        return msg
+
+    def _wake(self) -> None:
+        # Swap the event so viewers that wake up re-arm on a fresh one.
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    def events_after(self, last_seq: int) -> Tuple[List[Dict[str, Any]], int]:
+        """Return buffered messages with seq > last_seq and how many were evicted."""
+        if not self.events or last_seq >= self.last_seq:
+            return [], 0
+        first_seq = self.events[0]["seq"]
+        missed = max(0, first_seq - last_seq - 1)
+        skip = max(0, last_seq + 1 - first_seq)
+        out = [self.events[i] for i in range(skip, len(self.events))]
+        if missed and self._review_msg is not None and self._review_msg["seq"] < first_seq:
+            # The open review request fell out of the buffer; the viewer still needs it.
+            out.insert(0, self._review_msg)
+        return out, missed
+
+    async def wait(self, last_seq: int) -> None:
+        """Sleep until a message newer than last_seq exists or the run is done."""
+        while self.last_seq <= last_seq and not self.done:
+            await self._changed.wait()
+
+    def finish(self) -> None:
+        self.done = True
+        self._review_msg = None
+        self._cancel_review_timer()
+        self._wake()
+
+    def attach(self) -> None:
+        """A viewer started watching; a pending review now waits for it."""
+        self.viewers += 1
+        self._cancel_review_timer()
+
+    def detach(self) -> None:
+        self.viewers = max(0, self.viewers - 1)
+        self._arm_review_timer()
+
+    def _arm_review_timer(self) -> None:
+        if (
+            self.viewers == 0
+            and self.controller.review_pending
+            and self._review_timer is None
+            and self.unattended_review_s > 0
+        ):
+            self._review_timer = asyncio.get_running_loop().call_later(
+                self.unattended_review_s, self._resolve_unattended_review
+            )
+
+    def _cancel_review_timer(self) -> None:
+        if self._review_timer is not None:
+            self._review_timer.cancel()
+            self._review_timer = None
+
+    def _resolve_unattended_review(self) -> None:
+        self._review_timer = None
+        if self.viewers or self.done or not self.controller.review_pending:
+            return
+        action = self.unattended_review
+        logger.info(f"Review for run {self.run_id} unattended for {self.unattended_review_s}s; {action}")
+        self.publish({"type": "review_timeout", "run_id": self.run_id, "action": action})
+        if action == "stop":
+            self.controller.stop()
+        else:
+            self.controller.approve()
+
+    async def drive(self, runner: SagaRunner, params: Dict[str, Any]) -> None:
+        """Run SAGA and publish its events; this is the run's background task."""
+        controller = self.controller
+        controller.start()
+        RUNS_ACTIVE.inc()
+        self.publish({"type": "run_started", "run_id": self.run_id, "state": controller.state.value})
+        try:
+            async for event in runner.run(
+                text=params.get("text", ""),
+                keywords=params.get("keywords", []),
+                mode=params.get("mode", "semi-pilot"),
+                run_id=self.run_id,
+                config_overrides=params.get("config", {}),
+            ):
+                # Check if stop requested
+                if controller.should_stop():
+                    logger.info(f"Stop requested for run {self.run_id}")
+                    self.publish({
+                        "type": "run_stopped",
+                        "run_id": self.run_id,
+                        "current_result": controller.get_current_result()
+                    })
+                    break
+
+                # Wait if paused
+                if controller.state == RunState.PAUSED:
+                    self.publish({"type": "run_paused", "run_id": self.run_id})
+                await controller.wait_if_paused()
+
+                if isinstance(event, IterationResult):
+                    # Save current result for potential stop
+                    controller.set_current_result({
+                        "iteration": event.iteration,
+                        "best_candidate": event.best_candidate,
+                        "best_score": event.best_score
+                    })
+                    self.publish({"type": "iteration_update", "iteration": event.iteration})
+                    # Dataclass is encoded directly by each viewer's sink
+                    self.publish({"type": "analysis_report", "report": event.analysis_report})
+
+                elif isinstance(event, HumanReviewRequest):
+                    report_data = None
+                    if event.review_type == "analyze" or event.review_type == HumanReviewType.ANALYZE:
+                        report_data = event.data.get("report")
+
+                    controller.begin_review()
+                    self._review_msg = self.publish({
+                        "type": "need_review",
+                        "message": event.message,
+                        "report": report_data
+                    })
+
+                    # Wait for approve/stop from any attached viewer (or the unattended policy)
+                    logger.info(f"Waiting for human review for iteration {event.iteration}")
+                    self._arm_review_timer()
+                    approved = await controller.wait_for_review()
+                    self._cancel_review_timer()
+                    self._review_msg = None
+                    if approved:
+                        logger.info("Received approval from user.")
+                        await controller.wait_if_paused()
+                    else:
+                        logger.info("Received stop from user during review.")
+
+                elif isinstance(event, LogEvent):
+                    self.publish({
+                        "type": "system_log",
+                        "level": event.level,
+                        "message": event.message,
+                        "timestamp": event.timestamp
+                    })
+
+                elif isinstance(event, FinalReport):
+                    controller.complete()
+                    self.final_report = event
+                    self.publish({
+                        "type": "run_finished",
+                        "run_id": event.run_id,
+                        "best_candidate": event.best_candidate,
+                        "best_score": event.best_score,
+                        "termination_reason": event.termination_reason,
+                        "total_iterations": event.total_iterations,
+                        "elapsed_ms": event.elapsed_ms
+                    })
+        except asyncio.CancelledError:
+            self.publish({"type": "run_stopped", "run_id": self.run_id, "current_result": controller.get_current_result()})
+            raise
+        except Exception as e:
+            logger.error(f"Run {self.run_id} failed: {e}")
+            self.error = str(e)
+            self.publish({"type": "ui_error", "message": str(e)})
+        finally:
+            RUNS_ACTIVE.dec()
+            if controller.state != RunState.COMPLETED:
+                controller.complete()
+            self.finish()
+
+
+class RunManager:
+    """Registry of background runs; finished runs are kept for late viewers."""
+
+    def __init__(
+        self,
+        runner: SagaRunner,
+        *,
+        buffer_size: int = 2048,
+        keep_finished: int = 64,
+        unattended_review_s: float = 300.0,
+        unattended_review: str = "stop",
+    ):
+        self.runner = runner
+        self.buffer_size = buffer_size
+        self.unattended_review_s = unattended_review_s
+        self.unattended_review = unattended_review
+        self.keep_finished = keep_finished
+        self._runs: Dict[str, RunSession] = {}
+        self._finished: Deque[str] = deque()
+
+    def get(self, run_id: str) -> Optional[RunSession]:
+        return self._runs.get(run_id)
+
+    def start(self, params: Dict[str, Any]) -> RunSession:
+        """Start a run in the background; raises ValueError if run_id is live."""
+        run_id = params.get("run_id") or uuid.uuid4().hex
+        existing = self._runs.get(run_id)
+        if existing is not None and not existing.done:
+            raise ValueError(f"run {run_id} is already running")
+        session = RunSession(
+            run_id,
+            self.buffer_size,
+            unattended_review_s=self.unattended_review_s,
+            unattended_review=self.unattended_review,
+        )
+        self._runs[run_id] = session
+        session.task = asyncio.create_task(self._drive(session, params))
+        return session
+
+    async def _drive(self, session: RunSession, params: Dict[str, Any]) -> None:
+        try:
+            await session.drive(self.runner, params)
+        finally:
+            self._retire(session.run_id)
+
+    def _retire(self, run_id: str) -> None:
+        if run_id in self._finished:
+            self._finished.remove(run_id)
+        self._finished.append(run_id)
+        while len(self._finished) > self.keep_finished:
+            old = self._finished.popleft()
+            session = self._runs.get(old)
+            if session is not None and session.done:
+                del self._runs[old]
+
+    async def shutdown(self) -> None:
+        """Cancel all live runs (server shutdown)."""
+        tasks = [s.task for s in self._runs.values() if s.task is not None and not s.task.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
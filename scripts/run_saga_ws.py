@@ -60,6 +60,29 @@ async def run() -> int:
         default=None,
         help="Optional JSON string for config overrides (e.g. '{\"max_iters\":2}').",
     )
+    parser.add_argument(
+        "--batch-ms",
+        type=float,
+        default=0,
+        help="Ask the server to coalesce events within this window (ms) into batch frames.",
+    )
+    parser.add_argument(
+        "--levels",
+        default=None,
+        help="Comma-separated system_log levels to receive (e.g. 'info,success,error'; default: all).",
+    )
+    parser.add_argument(
+        "--attach",
+        default=None,
+        metavar="RUN_ID",
+        help="Reattach to a background run instead of starting a new one.",
+    )
+    parser.add_argument(
+        "--last-seq",
+        type=int,
+        default=0,
+        help="With --attach: last event seq already seen (replay starts after it).",
+    )
     parser.add_argument(
         "--auto-approve",
         action="store_true",
@@ -73,7 +96,12 @@ async def run() -> int:
         "mode": args.mode,
         "run_id": args.run_id,
         "config": _parse_json_or_empty(args.config),
+        "batch_ms": args.batch_ms,
     }
+    if args.attach:
+        payload = {"type": "attach", "run_id": args.attach, "last_seq": args.last_seq, "batch_ms": args.batch_ms}
+    if args.levels:
+        payload["levels"] = _parse_keywords([args.levels])
 
     # Disable client keepalive pings: the server can be CPU/LLM bound and may not respond in time.
     async with websockets.connect(
@@ -92,27 +120,30 @@ async def run() -> int:
                 print(f"[client] connection closed: code={e.code} reason={e.reason!r}")
                 return 1
             try:
-                msg = json.loads(raw)
+                frame = json.loads(raw)
             except Exception:
                 print(f"[server] {raw}")
                 continue
 
-            msg_type = msg.get("type")
-            print(f"[server] {json.dumps(msg, ensure_ascii=False)}")
-
-            if msg_type == "need_review":
-                if args.auto_approve:
-                    await ws.send(json.dumps({"type": "approve"}))
-                    print("[client] auto approve sent")
-                else:
-                    ans = (await _ainput("Review needed. Type 'approve' or 'cancel': ")).strip().lower()
-                    if ans not in {"approve", "cancel"}:
-                        ans = "approve"
-                    await ws.send(json.dumps({"type": ans}))
-                    print(f"[client] {ans} sent")
-
-            if msg_type == "run_finished":
-                return 0
+            for msg in frame["events"] if frame.get("type") == "batch" else [frame]:
+                msg_type = msg.get("type")
+                print(f"[server] {json.dumps(msg, ensure_ascii=False)}")
+
+                if msg_type == "need_review":
+                    if args.auto_approve:
+                        await ws.send(json.dumps({"type": "approve"}))
+                        print("[client] auto approve sent")
+                    else:
+                        ans = (await _ainput("Review needed. Type 'approve' or 'cancel': ")).strip().lower()
+                        if ans not in {"approve", "cancel"}:
+                            ans = "approve"
+                        await ws.send(json.dumps({"type": ans}))
+                        print(f"[client] {ans} sent")
+
+                if msg_type in {"run_finished", "run_stopped"}:
+                    return 0
+                if msg_type == "ui_error" and args.attach:
+                    return 1
 
     return 0
 
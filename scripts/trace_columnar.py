@@ -0,0 +1,78 @@
+"""Export SAGA trace.db files to columnar .npz archives and run aggregate queries.
+
+Examples:
+    python scripts/trace_columnar.py export --runs-dir runs --out runs_columnar
+    python scripts/trace_columnar.py query --in runs_columnar best-per-iteration
+    python scripts/trace_columnar.py query --in runs_columnar throughput
+    python scripts/trace_columnar.py query --in runs_columnar stage-latency
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+from typing import List, Optional
+
+sys.path.append(os.getcwd())
+
+from saga.trace.columnar import TraceColumns, export_runs
+
+
+def _cmd_export(args: argparse.Namespace) -> int:
+    if args.run_id:
+        run_dirs = [Path(args.runs_dir) / rid for rid in args.run_id]
+    else:
+        run_dirs = sorted(p for p in Path(args.runs_dir).iterdir() if p.is_dir())
+    written = export_runs(run_dirs, Path(args.out), force=args.force)
+    print(f"exported {len(written)} run(s) to {args.out}")
+    return 0
+
+
+def _cmd_query(args: argparse.Namespace) -> int:
+    in_dir = Path(args.in_dir)
+    if args.run_id:
+        paths = [in_dir / f"{rid}.npz" for rid in args.run_id]
+    else:
+        paths = sorted(in_dir.glob("*.npz"))
+    cols = TraceColumns.load(paths)
+
+    if args.query == "best-per-iteration":
+        result: object = cols.best_per_iteration()
+    elif args.query == "throughput":
+        result = {
+            "runs": len(cols.run_ids),
+            "candidates_per_s": cols.candidates_per_second(),
+            "per_run": {rid: cols.candidates_per_second(rid) for rid in cols.run_ids},
+        }
+    else:
+        result = cols.stage_latency_percentiles()
+
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Columnar export and aggregate queries for SAGA trace data.")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p_export = sub.add_parser("export", help="Export runs/*/trace.db to <out>/<run_id>.npz")
+    p_export.add_argument("--runs-dir", default=os.getenv("SAGA_RUN_DIR", "runs"), help="Run directory root.")
+    p_export.add_argument("--out", default="runs_columnar", help="Output directory for .npz archives.")
+    p_export.add_argument("--run-id", action="append", help="Only export these run ids (repeatable).")
+    p_export.add_argument("--force", action="store_true", help="Re-export even if the archive is up to date.")
+    p_export.set_defaults(func=_cmd_export)
+
+    p_query = sub.add_parser("query", help="Aggregate queries over exported archives")
+    p_query.add_argument("query", choices=["best-per-iteration", "throughput", "stage-latency"])
+    p_query.add_argument("--in", dest="in_dir", default="runs_columnar", help="Directory with .npz archives.")
+    p_query.add_argument("--run-id", action="append", help="Only query these run ids (repeatable).")
+    p_query.set_defaults(func=_cmd_query)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -5,6 +5,7 @@ import json
 import os
 import random
 import statistics
+import struct
 import sys
 import time
 import uuid
@@ -60,6 +61,7 @@ class SessionConfig:
     backpressure_percent: float
     backpressure_pause_s: float
     reconnect_delay_s: float
+    binary_audio: bool = False
 
 
 @dataclass
@@ -108,7 +110,36 @@ def safe_parse_json(data: str) -> Tuple[Optional[Dict[str, Any]], Optional[str]]
         return None, f"JSON 解析失敗: {e}"
 
 
+# ws_gateway_tts binary audio frame header（見 ws_gateway_tts/protocol.py）
+AUDIO_FRAME_HEADER = struct.Struct("<2sBBIIIIHH")
+
+
+def parse_audio_frame(data: bytes) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """把 binary audio frame 轉成與 audio_chunk JSON 相同欄位（audio 為 raw bytes）。"""
+    if len(data) < AUDIO_FRAME_HEADER.size or data[:2] != b"TA":
+        return None, "binary frame 格式不合法"
+    _magic, _ver, _flags, seq, chunk_seq, start, end, sid_len, text_len = AUDIO_FRAME_HEADER.unpack_from(data)
+    off = AUDIO_FRAME_HEADER.size
+    try:
+        session_id = data[off : off + sid_len].decode("utf-8")
+        units_text = data[off + sid_len : off + sid_len + text_len].decode("utf-8")
+    except UnicodeDecodeError as e:
+        return None, f"binary frame 解碼失敗: {e}"
+    return {
+        "type": "audio_chunk",
+        "session_id": session_id,
+        "seq": seq,
+        "chunk_seq": chunk_seq,
+        "unit_index_start": start,
+        "unit_index_end": end,
+        "units_text": units_text,
+        "audio_bytes": data[off + sid_len + text_len :],
+    }, None
+
+
 def normalize_audio_bytes(message: Dict[str, Any]) -> Optional[bytes]:
+    if "audio_bytes" in message:
+        return message["audio_bytes"]
     audio_b64 = message.get("audio_base64")
     if not audio_b64:
         return None
@@ -193,6 +224,7 @@ class WsTtsSessionRunner:
                 "audio_format": self.cfg.audio_format,
                 "sample_rate": self.cfg.sample_rate,
                 "channels": self.cfg.channels,
+                "binary_audio": self.cfg.binary_audio,
             },
         )
         return ws
@@ -325,6 +357,13 @@ class WsTtsSessionRunner:
             if msg.type == aiohttp.WSMsgType.ERROR:
                 self.metrics.errors.append(f"WebSocket ERROR: {ws.exception()}")
                 break
+            if msg.type == aiohttp.WSMsgType.BINARY:
+                parsed, err = parse_audio_frame(msg.data)
+                if err:
+                    self.metrics.errors.append(err)
+                else:
+                    self._handle_audio_chunk(parsed)
+                continue
             if msg.type != aiohttp.WSMsgType.TEXT:
                 continue
 
@@ -455,6 +494,7 @@ async def run_benchmark(args: argparse.Namespace) -> int:
         backpressure_percent=args.backpressure_percent,
         backpressure_pause_s=args.backpressure_pause_s,
         reconnect_delay_s=args.reconnect_delay_s,
+        binary_audio=args.binary_audio,
     )
 
     runners = []
@@ -530,6 +570,7 @@ def build_parser() -> argparse.ArgumentParser:
     parser.add_argument("--audio-format", default="pcm16_wav", help="期望音訊格式（建議 pcm16_wav）")
     parser.add_argument("--sample-rate", type=int, default=16000, help="取樣率")
     parser.add_argument("--channels", type=int, default=1, help="聲道數")
+    parser.add_argument("--binary-audio", action="store_true", help="協商 binary audio frame（取代 audio_base64 JSON）")
 
     parser.add_argument("--scenario", default="mixed", choices=["baseline", "mixed"], help="測試情境")
     parser.add_argument("--disconnect-percent", type=float, default=0.10, help="斷線並 resume 的 session 比例")
@@ -0,0 +1,68 @@
+import math
+import struct
+import warnings
+
+import pytest
+
+from ws_gateway_tts.audio_codec import AdpcmEncoder
+
+with warnings.catch_warnings():
+    warnings.simplefilter("ignore", DeprecationWarning)
+    audioop = pytest.importorskip("audioop")
+
+
+def _decode(chunk: bytes, channels: int) -> list:
+    """依 AdpcmEncoder 的 chunk 格式解碼（client 端做法）；回傳各聲道的 sample 陣列。"""
+    (n,) = struct.unpack_from("<I", chunk)
+    off = 4
+    headers = []
+    for _ in range(channels):
+        headers.append(struct.unpack_from("<hBB", chunk, off))
+        off += 4
+    size = (n + 1) // 2
+    planes = []
+    for predictor, index, _ in headers:
+        pcm, _ = audioop.adpcm2lin(chunk[off : off + size], 2, (predictor, index))
+        planes.append(list(struct.unpack(f"<{len(pcm) // 2}h", pcm))[:n])
+        off += size
+    return planes
+
+
+def _signal(n, channels):
+    out = []
+    for i in range(n):
+        for c in range(channels):
+            out.append(int(12000 * math.sin(2 * math.pi * (440 + 220 * c) * i / 16000)))
+    return out
+
+
+@pytest.mark.parametrize("channels", [1, 2])
+def test_chunks_decode_independently_within_error_bound(channels):
+    samples = _signal(3001, channels)
+    pcm = struct.pack(f"<{len(samples)}h", *samples)
+    enc = AdpcmEncoder(channels)
+    frame = 2 * channels
+    # 不同長度（含奇數 sample 數）的 chunk；預測狀態跨 chunk 延續
+    bounds = [0, 101 * frame, 1600 * frame, 2999 * frame, len(pcm)]
+    chunks = [enc.encode(pcm[a:b]) for a, b in zip(bounds, bounds[1:])]
+
+    decoded = [[] for _ in range(channels)]
+    for chunk in chunks:
+        for c, plane in enumerate(_decode(chunk, channels)):
+            decoded[c] += plane
+
+    for c in range(channels):
+        original = samples[c::channels]
+        assert len(decoded[c]) == len(original)
+        # 起始的 step 很小，前幾十個 sample 在追趕；之後誤差受 step 大小限制
+        errors = [a - b for a, b in zip(decoded[c][64:], original[64:])]
+        assert max(abs(e) for e in errors) < 1024
+        snr_db = 10 * math.log10(sum(v * v for v in original[64:]) / sum(e * e for e in errors))
+        assert snr_db > 30
+
+
+def test_chunk_is_about_a_quarter_of_pcm16():
+    pcm = struct.pack("<1600h", *_signal(1600, 1))
+    chunk = AdpcmEncoder(1).encode(pcm)
+    assert len(chunk) == 4 + 4 + 800
+    assert AdpcmEncoder(1).encode(b"") == struct.pack("<I", 0) + struct.pack("<hBB", 0, 0, 0)
@@ -0,0 +1,65 @@
+import asyncio
+
+from ws_gateway_tts.audio_cache import CachedTtsEngine, PcmCache
+from ws_gateway_tts.tts_engines.base import AudioSpec
+
+SPEC = AudioSpec(audio_format="pcm16", sample_rate=22050, channels=1)
+
+
+def test_lru_evicts_oldest_and_tracks_bytes():
+    async def scenario():
+        cache = PcmCache(max_bytes=10)
+        await cache.put("a", b"1234")
+        await cache.put("b", b"5678")
+        assert await cache.get("a") == b"1234"  # a 變成最近使用
+        await cache.put("c", b"90ab")  # 超過 10 bytes：淘汰最久未用的 b
+        await cache.put("a", b"xy")  # 覆寫：扣掉舊值
+        await cache.put("big", b"z" * 11)  # 單筆超過上限不收
+        return cache, [await cache.get(k) for k in ("a", "b", "c", "big")]
+
+    cache, values = asyncio.run(scenario())
+    assert values == [b"xy", None, b"90ab", None]
+    assert cache.bytes == 6 == sum(len(v) for v in cache._entries.values())
+    assert (cache.hits, cache.misses) == (3, 2)
+
+
+def test_key_ignores_audio_format_but_not_engine_or_rate():
+    key = PcmCache.make_key("piper", "v", SPEC, "你好  世界")
+    assert key == PcmCache.make_key("piper", "v", AudioSpec("pcm16_wav", 22050, 1), "你好 世界")
+    assert key != PcmCache.make_key("riva", "v", SPEC, "你好 世界")
+    assert key != PcmCache.make_key("piper", "v", AudioSpec("pcm16", 16000, 1), "你好 世界")
+
+
+def test_disk_layer_survives_restart_and_prunes_to_limit(tmp_path):
+    async def scenario():
+        cache = PcmCache(max_bytes=1 << 20, disk_dir=str(tmp_path), disk_max_bytes=100)
+        await asyncio.gather(*(cache.put(f"k{i}", bytes([i]) * 30) for i in range(5)))
+        restarted = PcmCache(max_bytes=1 << 20, disk_dir=str(tmp_path), disk_max_bytes=100)
+        return cache, restarted
+
+    cache, restarted = asyncio.run(scenario())
+    on_disk = sum(p.stat().st_size for p in tmp_path.glob("*.pcm"))
+    assert on_disk <= 100
+    assert restarted.disk_bytes == on_disk
+    assert cache.disk_bytes >= on_disk
+
+
+class _CountingEngine:
+    def __init__(self):
+        self.calls = 0
+
+    async def synthesize_pcm16(self, text, *, spec):
+        self.calls += 1
+        return text.encode("utf-8")
+
+
+def test_cached_engine_shares_pcm_across_audio_formats():
+    async def scenario():
+        engine = _CountingEngine()
+        cached = CachedTtsEngine(engine, PcmCache(max_bytes=1024), engine_name="dummy", voice="")
+        first = await cached.synthesize_pcm16("哈囉", spec=SPEC)
+        second = await cached.synthesize_pcm16("哈囉", spec=AudioSpec("mulaw", 22050, 1))
+        return engine.calls, first, second
+
+    calls, first, second = asyncio.run(scenario())
+    assert calls == 1 and first == second
@@ -0,0 +1,65 @@
+import bisect
+import math
+import random
+
+import pytest
+
+from ws_gateway_tts.histogram import Histogram, LogBuckets, render_histogram
+
+BUCKETS = [
+    LogBuckets(1.0, 60000.0),
+    LogBuckets(0.01, 10000.0),
+    LogBuckets(16.0, 16 * 1024 * 1024, per_decade=5),
+    LogBuckets(0.001, 100.0),
+]
+
+
+def _reference(buckets, value):
+    return bisect.bisect_left(buckets.bounds, value)
+
+
+@pytest.mark.parametrize("buckets", BUCKETS)
+def test_index_matches_bisect_at_and_around_rounded_bounds(buckets):
+    for bound in buckets.bounds:
+        # 上界經四捨五入後 log 位置可能落在隔壁格：剛好等於、略小、略大都要和 bisect 一致
+        for value in (bound, math.nextafter(bound, 0), math.nextafter(bound, math.inf), bound * 0.9999, bound * 1.0001):
+            assert buckets.index(value) == _reference(buckets, value), value
+
+
+@pytest.mark.parametrize("buckets", BUCKETS)
+def test_index_matches_bisect_on_random_values(buckets):
+    rng = random.Random(0)
+    lo, hi = math.log10(buckets.lo) - 1, math.log10(buckets.hi) + 1
+    for _ in range(20000):
+        value = 10 ** rng.uniform(lo, hi)
+        assert buckets.index(value) == _reference(buckets, value)
+    assert buckets.index(0.0) == 0
+    assert buckets.index(buckets.hi * 10) == len(buckets.bounds)
+
+
+def test_bounds_are_rounded_log_spaced():
+    buckets = LogBuckets(1.0, 1000.0)
+    assert len(buckets.bounds) == 31
+    assert buckets.bounds[:4] == (1.0, 1.259, 1.585, 1.995)
+    assert buckets.bounds[10] == 10.0 and buckets.bounds[-1] == 1000.0
+
+
+def test_histogram_snapshot_and_prometheus_rendering():
+    buckets = LogBuckets(1.0, 100.0, per_decade=1)  # 上界 1, 10, 100
+    hist = Histogram(buckets)
+    for value in (0.5, 1.0, 5.0, 10.0, 50.0, 500.0):
+        hist.observe(value)
+    snap = hist.snapshot()
+    assert snap == {"counts": [2, 2, 1, 1], "sum": 566.5}
+
+    lines = render_histogram("x_ms", "help", buckets, snap)
+    assert lines[2:] == [
+        'x_ms_bucket{le="1.0"} 2.0',
+        'x_ms_bucket{le="10.0"} 4.0',
+        'x_ms_bucket{le="100.0"} 5.0',
+        'x_ms_bucket{le="+Inf"} 6.0',
+        "x_ms_sum 566.5",
+        "x_ms_count 6.0",
+    ]
+    # 沒有資料（例如 worker 尚未回報）時輸出全 0
+    assert render_histogram("x_ms", "help", buckets, None)[-1] == "x_ms_count 0.0"
@@ -0,0 +1,23 @@
+import threading
+
+from saga.metrics import Registry
+
+
+def test_counter_sums_thread_slots_and_histogram_renders():
+    reg = Registry()
+    counter = reg.counter("t_total", "test", ("status",))
+    hist = reg.histogram("t_seconds", "test", (0.1, 1.0))
+
+    threads = [threading.Thread(target=lambda: [counter.inc(status="ok") for _ in range(100)]) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    hist.observe(0.05)
+    hist.observe(5.0)
+
+    text = reg.render_prometheus()
+    assert 't_total{status="ok"} 400.0' in text
+    assert 't_seconds_bucket{le="0.1"} 1.0' in text
+    assert 't_seconds_bucket{le="+Inf"} 2.0' in text
+    assert "t_seconds_sum 5.05" in text
@@ -0,0 +1,53 @@
+import asyncio
+import json
+
+import pytest
+
+from orchestrator.server import _DeltaCoalescer
+
+
+class _FakeWs:
+    def __init__(self, fail_after=None):
+        self.sent = []
+        self.fail_after = fail_after
+
+    async def send_str(self, data):
+        if self.fail_after is not None and len(self.sent) >= self.fail_after:
+            raise ConnectionResetError("Cannot write to closing transport")
+        self.sent.append(json.loads(data))
+
+
+def test_deltas_within_window_are_sent_as_one_frame():
+    async def scenario():
+        ws = _FakeWs()
+        deltas = _DeltaCoalescer(ws, 0.01)
+        for text in ("你", "好", "！"):
+            await deltas.add(text)
+        await asyncio.sleep(0.05)
+        await deltas.add("再見")
+        await deltas.flush()
+        deltas.close()
+        return ws.sent
+
+    assert asyncio.run(scenario()) == [{"type": "llm_delta", "delta": "你好！"}, {"type": "llm_delta", "delta": "再見"}]
+
+
+def test_timer_send_failure_stops_the_stream():
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        unhandled = []
+        loop.set_exception_handler(lambda _loop, ctx: unhandled.append(ctx))
+        ws = _FakeWs(fail_after=0)
+        deltas = _DeltaCoalescer(ws, 0.01)
+        await deltas.add("a")
+        await asyncio.sleep(0.05)  # 計時器送出時前端已斷線
+        with pytest.raises(ConnectionResetError):
+            await deltas.add("b")
+        with pytest.raises(ConnectionResetError):
+            await deltas.flush()
+        deltas.close()
+        return unhandled, deltas._parts
+
+    unhandled, parts = asyncio.run(scenario())
+    assert unhandled == []  # 不是「Task exception was never retrieved」
+    assert parts == []
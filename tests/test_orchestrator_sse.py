@@ -0,0 +1,64 @@
+import asyncio
+import json
+
+from orchestrator.sse import iter_sse_data
+
+
+class _FakeContent:
+    """aiohttp.StreamReader 的替身：readany() 依序交出預先切好的 bytes，讀完回 b""。"""
+
+    def __init__(self, chunks):
+        self.chunks = list(chunks)
+
+    async def readany(self):
+        return self.chunks.pop(0) if self.chunks else b""
+
+
+def _collect(chunks):
+    async def scenario():
+        return [data async for data in iter_sse_data(_FakeContent(chunks))]
+
+    return asyncio.run(scenario())
+
+
+STREAM = (
+    b": keep-alive\n\n"
+    b'data: {"choices":[{"delta":{"content":"\xe4\xbd\xa0\xe5\xa5\xbd"}}]}\n\n'
+    b"event: ping\n"
+    b'data:{"choices":[{"delta":{"content":"!"}}]}\n\n'
+    b"data: [DONE]\n\n"
+)
+EXPECTED = [
+    '{"choices":[{"delta":{"content":"你好"}}]}'.encode("utf-8"),
+    b'{"choices":[{"delta":{"content":"!"}}]}',
+    b"[DONE]",
+]
+
+
+def test_data_lines_only_with_prefix_and_one_space_stripped():
+    out = _collect([STREAM])
+    assert out == EXPECTED
+    assert json.loads(out[0])["choices"][0]["delta"]["content"] == "你好"
+
+
+def test_crlf_line_endings():
+    assert _collect([STREAM.replace(b"\n", b"\r\n")]) == EXPECTED
+
+
+def test_chunks_split_anywhere_give_the_same_events():
+    # 逐 byte 切開（含切在 \r 與 \n 之間、UTF-8 多 byte 字元中間）
+    crlf = STREAM.replace(b"\n", b"\r\n")
+    assert _collect([crlf[i : i + 1] for i in range(len(crlf))]) == EXPECTED
+    for size in (2, 3, 7, 16):
+        assert _collect([STREAM[i : i + size] for i in range(0, len(STREAM), size)]) == EXPECTED
+
+
+def test_final_line_without_trailing_newline():
+    assert _collect([b"data: a\n", b"data: [DO", b"NE]"]) == [b"a", b"[DONE]"]
+    assert _collect([b"data: a\r\n", b"event: x"]) == [b"a"]
+    assert _collect([]) == []
+
+
+def test_data_field_edge_cases():
+    # 只去掉一個前導空白；空的 data 行交出 b""
+    assert _collect([b"data:  two\ndata:\ndata: \n"]) == [b" two", b"", b""]
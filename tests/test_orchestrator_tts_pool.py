@@ -0,0 +1,89 @@
+import asyncio
+
+import pytest
+
+from orchestrator.tts_pool import TtsMuxPool, peek_message
+
+
+class _FakeWs:
+    def __init__(self):
+        self.sent = []
+        self._closed = asyncio.Event()
+
+    async def send_str(self, data):
+        self.sent.append(data)
+
+    async def close(self):
+        self._closed.set()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        await self._closed.wait()
+        raise StopAsyncIteration
+
+
+class _FakeClient:
+    """ws_connect 在 gate 打開前不回傳（模擬慢 handshake）。"""
+
+    def __init__(self):
+        self.gate = asyncio.Event()
+        self.gate.set()
+        self.connects = 0
+
+    async def ws_connect(self, url, *, headers, heartbeat):
+        self.connects += 1
+        await self.gate.wait()
+        return _FakeWs()
+
+
+def test_slow_handshake_does_not_block_opens_on_existing_connections():
+    async def scenario():
+        client = _FakeClient()
+        pool = TtsMuxPool(client, "ws://gw/tts/mux", size=2)
+        a = await pool.open("a")
+
+        client.gate.clear()
+        growing = asyncio.create_task(pool.open("b"))  # 現有連線在忙：開第二條（卡在 handshake）
+        await asyncio.sleep(0)
+        c = await asyncio.wait_for(pool.open("c"), 1)  # 不等 handshake，直接用第一條
+        assert not growing.done()
+        assert c.conn is a.conn
+
+        client.gate.set()
+        b = await asyncio.wait_for(growing, 1)
+        stats = pool.stats()
+        await pool.close()
+        return client.connects, a, b, stats
+
+    connects, a, b, stats = asyncio.run(scenario())
+    assert connects == 2
+    assert b.conn is not a.conn
+    assert stats == {"connections": 2, "streams": 3}
+
+
+def test_concurrent_opens_share_one_handshake_and_reject_duplicates():
+    async def scenario():
+        client = _FakeClient()
+        client.gate.clear()
+        pool = TtsMuxPool(client, "ws://gw/tts/mux", size=1)
+        opens = [asyncio.create_task(pool.open(sid)) for sid in ("a", "b", "c")]
+        await asyncio.sleep(0)
+        client.gate.set()
+        streams = await asyncio.wait_for(asyncio.gather(*opens), 1)
+        with pytest.raises(RuntimeError):
+            await pool.open("a")
+        await pool.close()
+        return client.connects, streams
+
+    connects, streams = asyncio.run(scenario())
+    assert connects == 1
+    assert len({id(s.conn) for s in streams}) == 1
+
+
+def test_peek_message_fast_path_and_fallback():
+    assert peek_message('{"type":"tts_end","session_id":"s1","seq":2}') == ("tts_end", "s1")
+    assert peek_message('{"session_id":"s1","type":"error"}') == ("error", "s1")
+    assert peek_message('{"type":"x","session_id":"a\\"b"}') == ("x", 'a"b')
+    assert peek_message("[1]") is None
@@ -0,0 +1,17 @@
+import pytest
+
+from ws_gateway_tts.tts_engines.piper import PiperConfig, PiperTtsEngine
+from ws_gateway_tts.tts_engines.piper_pool import log_suppressing_args
+
+
+def test_log_suppressing_args_matches_flag_and_assignment_forms():
+    args = ["--length_scale", "1.1", "-q", "--log-level=warn", "--log_level", "error", "--quiet-ish"]
+    assert log_suppressing_args(args) == ["-q", "--log-level=warn", "--log_level"]
+
+
+def test_pool_mode_rejects_log_suppressing_extra_args():
+    with pytest.raises(RuntimeError, match="--quiet"):
+        PiperTtsEngine(PiperConfig(bin_path="piper", model_path="m.onnx", extra_args=("--quiet",)))
+    # 每段各啟動一次 piper 的模式不依賴 stderr 結束標記
+    engine = PiperTtsEngine(PiperConfig(bin_path="piper", model_path="m.onnx", extra_args=("--quiet",), output_mode="file"))
+    assert engine.pool is None
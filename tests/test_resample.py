@@ -0,0 +1,118 @@
+import math
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from ws_gateway_tts.resample import PcmConverter  # noqa: E402
+
+
+def _tone(rate, seconds, freq=1000.0, amp=16000.0):
+    t = np.arange(int(rate * seconds)) / rate
+    return (np.sin(2 * np.pi * freq * t) * amp).astype("<i2").tobytes()
+
+
+def _converter(in_rate, out_rate, in_channels=1, out_channels=1):
+    return PcmConverter(in_rate=in_rate, in_channels=in_channels, out_rate=out_rate, out_channels=out_channels)
+
+
+@pytest.mark.parametrize("in_rate,out_rate", [(22050, 16000), (22050, 48000), (16000, 22050)])
+def test_chunked_output_matches_one_shot(in_rate, out_rate):
+    pcm = _tone(in_rate, 0.5)
+    one_shot = _converter(in_rate, out_rate)
+    expected = one_shot.convert(pcm) + one_shot.flush()
+
+    chunked = _converter(in_rate, out_rate)
+    out = b""
+    pos = 0
+    for size in (2, 98, 1000, 14, 4410, 666):  # 不規則的 chunk 邊界（bytes，含單一 sample）
+        out += chunked.convert(pcm[pos : pos + size])
+        pos += size
+    out += chunked.convert(pcm[pos:]) + chunked.flush()
+    assert out == expected
+
+
+@pytest.mark.parametrize("in_rate,out_rate", [(22050, 16000), (22050, 48000), (16000, 22050)])
+def test_flush_emits_delayed_tail_and_resets(in_rate, out_rate):
+    conv = _converter(in_rate, out_rate)
+    body = conv.convert(_tone(in_rate, 0.25))
+    tail = conv.flush()
+    n_in = int(in_rate * 0.25)
+    n_out = (len(body) + len(tail)) // 2
+    # 補零後輸出涵蓋整段輸入再加上濾波器延遲（8 個輸入 sample）
+    assert abs(n_out - (n_in + 8) * out_rate / in_rate) <= 1
+    assert np.abs(np.frombuffer(tail, "<i2")).max() > 1000  # 尾端仍是音訊，不是靜音
+    assert conv.flush() == b""  # 已重設：沒有新輸入就沒有尾端
+
+
+@pytest.mark.parametrize("in_rate,out_rate", [(22050, 16000), (22050, 48000), (16000, 22050)])
+def test_tone_snr(in_rate, out_rate):
+    conv = _converter(in_rate, out_rate)
+    y = np.frombuffer(conv.convert(_tone(in_rate, 1.0)), "<i2").astype(np.float64)
+    # 濾波器延遲為 8 個輸入 sample
+    t = np.arange(len(y)) / out_rate - 8 / in_rate
+    ref = np.sin(2 * np.pi * 1000.0 * t) * 16000.0
+    body = slice(200, len(y) - 200)
+    snr_db = 10 * math.log10(np.sum(ref[body] ** 2) / np.sum((y[body] - ref[body]) ** 2))
+    assert snr_db > 60
+
+
+def test_channel_conversion_with_resampling():
+    mono = _tone(22050, 0.1)
+    stereo = np.repeat(np.frombuffer(mono, "<i2"), 2).astype("<i2").tobytes()
+
+    down = _converter(22050, 16000, in_channels=2, out_channels=1)
+    ref = _converter(22050, 16000)
+    assert down.convert(stereo) + down.flush() == ref.convert(mono) + ref.flush()
+
+    up = _converter(22050, 16000, in_channels=1, out_channels=2)
+    out = np.frombuffer(up.convert(mono) + up.flush(), "<i2").reshape(-1, 2)
+    assert (out[:, 0] == out[:, 1]).all()
+
+
+def test_channel_only_conversion_has_no_tail():
+    conv = _converter(16000, 16000, in_channels=1, out_channels=2)
+    assert conv.convert(b"\x01\x00\x02\x00") == b"\x01\x00\x01\x00\x02\x00\x02\x00"
+    assert conv.flush() == b""
+
+
+@pytest.fixture
+def ratecv_only(monkeypatch):
+    import ws_gateway_tts.resample as resample
+
+    if resample.audioop is None:
+        pytest.skip("audioop 不可用")
+    monkeypatch.setattr(resample, "np", None)
+    assert resample.resampler_name() == "ratecv"
+
+
+@pytest.mark.parametrize("in_rate,out_rate", [(22050, 16000), (16000, 48000)])
+def test_ratecv_fallback_is_continuous_across_chunks(ratecv_only, in_rate, out_rate):
+    pcm = _tone(in_rate, 0.5)
+    expected = _converter(in_rate, out_rate).convert(pcm)
+    n_in = len(pcm) // 2
+    assert abs(len(expected) // 2 - n_in * out_rate / in_rate) <= 2
+
+    chunked = _converter(in_rate, out_rate)
+    out = b""
+    pos = 0
+    for size in (2, 98, 1000, 14, 4410, 666):
+        out += chunked.convert(pcm[pos : pos + size])
+        pos += size
+    out += chunked.convert(pcm[pos:])
+    assert out == expected
+    assert chunked.flush() == b""
+
+    # chunk 邊界沒有跳動：相鄰 sample 差不超過 1 kHz 正弦波本身的最大斜率
+    y = np.frombuffer(out, "<i2").astype(np.int64)
+    max_step = 16000 * 2 * math.pi * 1000 / out_rate
+    assert np.abs(np.diff(y)).max() <= max_step * 1.05 + 2
+
+
+def test_ratecv_fallback_with_channel_conversion(ratecv_only):
+    mono = _tone(22050, 0.1)
+    stereo = np.repeat(np.frombuffer(mono, "<i2"), 2).astype("<i2").tobytes()
+    down = _converter(22050, 16000, in_channels=2, out_channels=1)
+    assert down.convert(stereo) == _converter(22050, 16000).convert(mono)
+    up = np.frombuffer(_converter(22050, 16000, in_channels=1, out_channels=2).convert(mono), "<i2").reshape(-1, 2)
+    assert (up[:, 0] == up[:, 1]).all()
@@ -0,0 +1,72 @@
+import time
+
+from ws_gateway_tts.session import CachedChunk, ResumeCache
+
+
+def _chunk(chunk_seq, unit_start, unit_end, *, created_s=None, size=10):
+    return CachedChunk(
+        created_s=time.monotonic() if created_s is None else created_s,
+        chunk_seq=chunk_seq,
+        unit_index_start=unit_start,
+        unit_index_end=unit_end,
+        units_text="字" * (unit_end - unit_start + 1),
+        audio_format="pcm16",
+        sample_rate=22050,
+        channels=1,
+        audio_bytes=b"\0" * size,
+    )
+
+
+def _seqs(chunks):
+    return [c.chunk_seq for c in chunks]
+
+
+def test_after_unit_returns_chunks_past_the_last_received_unit():
+    cache = ResumeCache(ttl_s=1e9, max_bytes=1 << 20)
+    for seq, (start, end) in enumerate([(0, 3), (4, 9), (10, 10), (11, 20)], start=1):
+        cache.append(_chunk(seq, start, end))
+
+    assert _seqs(cache.after_unit(-1)) == [1, 2, 3, 4]
+    assert _seqs(cache.after_unit(3)) == [2, 3, 4]
+    # 收到 chunk 的一部分（unit 5 落在 4..9 內）：從該 chunk 整個重送
+    assert _seqs(cache.after_unit(5)) == [2, 3, 4]
+    assert _seqs(cache.after_unit(10)) == [4]
+    assert cache.after_unit(20) == []
+
+
+def test_byte_limit_evicts_oldest_but_keeps_newest():
+    cache = ResumeCache(ttl_s=1e9, max_bytes=25)
+    for seq in range(1, 5):
+        cache.append(_chunk(seq, seq * 10, seq * 10 + 9))
+    assert _seqs(cache) == [3, 4] and cache.bytes == 20
+    # 被淘汰的 chunk 不再出現在 resume 結果；查詢從 head 開始
+    assert _seqs(cache.after_unit(0)) == [3, 4]
+
+    cache.append(_chunk(5, 50, 59, size=100))  # 單獨超過上限：仍保留最新一個
+    assert _seqs(cache) == [5] and cache.bytes == 100
+
+
+def test_ttl_evicts_expired_chunks_including_the_last():
+    # append 以目前時間淘汰，created_s 需相對於 time.monotonic()
+    t0 = time.monotonic()
+    cache = ResumeCache(ttl_s=10.0, max_bytes=1 << 20)
+    cache.append(_chunk(1, 0, 1, created_s=t0))
+    cache.append(_chunk(2, 2, 3, created_s=t0 + 5))
+    cache.append(_chunk(3, 4, 5, created_s=t0 + 8))
+
+    cache.evict(now_s=t0 + 12)
+    assert _seqs(cache) == [2, 3] and cache.bytes == 20
+    cache.evict(now_s=t0 + 20)
+    assert len(cache) == 0 and cache.bytes == 0
+    assert cache.after_unit(-1) == []
+
+
+def test_head_compaction_keeps_bisect_aligned():
+    cache = ResumeCache(ttl_s=1e9, max_bytes=30)
+    for seq in range(1, 50):
+        cache.append(_chunk(seq, seq * 2, seq * 2 + 1))
+        assert len(cache._chunks) == len(cache._unit_ends)
+        assert len(cache._chunks) <= 2 * len(cache) + 1
+    assert _seqs(cache) == [47, 48, 49]
+    assert _seqs(cache.after_unit(95)) == [48, 49]
+    assert _seqs(cache.after_unit(0)) == [47, 48, 49]
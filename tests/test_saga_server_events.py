@@ -0,0 +1,53 @@
+import asyncio
+import json
+
+from saga.search.generators import AnalysisReport
+from saga_server.events import EventSink
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.frames = []
+
+    async def send_text(self, data):
+        self.frames.append(json.loads(data))
+
+
+def test_sink_coalesces_events_and_flushes_urgent():
+    async def scenario():
+        ws = FakeWebSocket()
+        sink = EventSink(ws, batch_ms=20, levels={"success"})
+        report = AnalysisReport({}, {}, 1, 0.0, "dim_0", [], 1)
+        await sink.send({"type": "iteration_update", "iteration": 1})
+        await sink.send({"type": "analysis_report", "report": report})
+        assert ws.frames == []
+        await sink.send({"type": "need_review", "message": "review"})
+        return ws.frames, sink.wants("llm")
+
+    frames, wants_llm = asyncio.run(scenario())
+    assert len(frames) == 1 and frames[0]["type"] == "batch"
+    assert [e["type"] for e in frames[0]["events"]] == ["iteration_update", "analysis_report", "need_review"]
+    assert frames[0]["events"][1]["report"]["bottleneck"] == "dim_0"
+    assert wants_llm is False
+
+
+def test_run_controller_review_wakes_on_approve_or_stop():
+    from saga_server.runs import RunController
+
+    async def scenario():
+        ctl = RunController()
+        ctl.start()
+        assert ctl.approve() is False  # nothing pending
+        ctl.begin_review()
+        waiter = asyncio.create_task(ctl.wait_for_review())
+        await asyncio.sleep(0)
+        assert not waiter.done()
+        assert ctl.approve() is True
+        assert await waiter is True
+
+        ctl.begin_review()
+        waiter = asyncio.create_task(ctl.wait_for_review())
+        ctl.stop()
+        return await waiter
+
+    assert asyncio.run(scenario()) is False
@@ -0,0 +1,75 @@
+import asyncio
+
+from saga_server.jobs import JobQueue, JobStore
+
+
+def test_job_queue_persists_and_requeues(tmp_path):
+    async def scenario():
+        store = JobStore(tmp_path / "jobs.db")
+        queue = JobQueue(manager=None, store=store, concurrency=1)
+        ids = queue.submit([{"text": "a", "run_id": "job-a"}, {"text": "b"}])
+        assert queue.cancel("job-a") == "cancelled"
+        store.update(ids[1], status="running")  # cut off by a restart
+        store.close()
+
+        reopened = JobStore(tmp_path / "jobs.db")
+        return ids, reopened.pending(), reopened.params(ids[1]), [j["status"] for j in reopened.list()]
+
+    ids, pending, params, statuses = asyncio.run(scenario())
+    assert ids[0] == "job-a"
+    assert pending == [ids[1]]
+    assert params["mode"] == "autopilot" and params["run_id"] == ids[1]
+    assert statuses == ["running", "cancelled"]
+
+
+class _FakeRunner:
+    """Yields a FinalReport, or blocks until stopped for run_ids starting with "slow"."""
+
+    async def run(self, *, text, keywords, mode, run_id, config_overrides):
+        from saga.outer_loop import FinalReport, LogEvent
+
+        if run_id.startswith("slow"):
+            while True:
+                yield LogEvent(level="info", message="tick")
+                await asyncio.sleep(0.01)
+        yield FinalReport(
+            run_id=run_id,
+            total_iterations=1,
+            termination_reason="done",
+            best_candidate=text,
+            best_score=1.0,
+            score_evolution=[1.0],
+            all_reports=[],
+            elapsed_ms=1,
+        )
+
+
+def test_job_queue_runs_jobs_and_stops_running_ones(tmp_path):
+    from saga_server.runs import RunManager
+
+    async def wait_status(store, run_id, status):
+        for _ in range(200):
+            if store.get(run_id)["status"] == status:
+                return True
+            await asyncio.sleep(0.01)
+        return False
+
+    async def scenario():
+        store = JobStore(tmp_path / "jobs.db")
+        queue = JobQueue(RunManager(_FakeRunner()), store, concurrency=2)
+        queue.start()
+        try:
+            done_id, slow_id = queue.submit([{"text": "x"}, {"text": "y", "run_id": "slow-1"}])
+            finished = await wait_status(store, done_id, "finished")
+            running = await wait_status(store, slow_id, "running")
+            cancel_status = queue.cancel(slow_id)
+            stopped = await wait_status(store, slow_id, "stopped")
+            return finished, running, cancel_status, stopped, store.result(done_id)
+        finally:
+            await queue.stop()
+            store.close()
+
+    finished, running, cancel_status, stopped, report = asyncio.run(scenario())
+    assert finished and running and stopped
+    assert cancel_status == "stopping"
+    assert report["best_candidate"] == "x"
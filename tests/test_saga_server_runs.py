@@ -0,0 +1,124 @@
+import asyncio
+
+from saga_server.runs import RunSession
+
+
+def test_ring_buffer_replays_after_seq_and_keeps_open_review():
+    async def scenario():
+        session = RunSession("r1", buffer_size=3)
+        session.publish({"type": "run_started"})
+        session._review_msg = session.publish({"type": "need_review"})
+        for i in range(3):
+            session.publish({"type": "system_log", "level": "info", "message": str(i)})
+
+        recent, missed_recent = session.events_after(3)
+        replay, missed = session.events_after(0)
+
+        waiter = asyncio.create_task(session.wait(session.last_seq))
+        await asyncio.sleep(0)
+        assert not waiter.done()
+        session.publish({"type": "run_finished"})
+        await asyncio.wait_for(waiter, 1)
+        return recent, missed_recent, replay, missed
+
+    recent, missed_recent, replay, missed = asyncio.run(scenario())
+    assert [m["seq"] for m in recent] == [4, 5] and missed_recent == 0
+    assert missed == 2
+    assert [m["seq"] for m in replay] == [2, 3, 4, 5]
+    assert replay[0]["type"] == "need_review"
+
+
+class _ScriptedSocket:
+    """Minimal stand-in for a Starlette WebSocket: replays receive_json outcomes."""
+
+    def __init__(self, script):
+        self.script = list(script)
+
+    async def receive_json(self):
+        item = self.script.pop(0)
+        if isinstance(item, BaseException):
+            raise item
+        return item
+
+
+def test_control_messages_skip_malformed_frames_and_end_on_disconnect():
+    from fastapi import WebSocketDisconnect
+
+    from saga_server.app import _handle_control_messages
+    from saga_server.events import EventSink
+
+    async def scenario():
+        session = RunSession("r1")
+        session.controller.start()
+        ws = _ScriptedSocket([ValueError("bad json"), {"type": "pause"}, WebSocketDisconnect(1001)])
+        await asyncio.wait_for(_handle_control_messages(ws, session, EventSink(ws)), 1)
+        return session
+
+    session = asyncio.run(scenario())
+    assert [m["type"] for m in session.events] == ["pause_ack"]
+    # A dropped viewer detaches; the run itself is not stopped
+    assert not session.controller.should_stop()
+
+
+def test_unattended_review_resolves_by_policy_only_without_viewers():
+    async def review(policy, attach):
+        session = RunSession("r1", unattended_review_s=0.01, unattended_review=policy)
+        session.controller.start()
+        if attach:
+            session.attach()
+        session.controller.begin_review()
+        session._arm_review_timer()
+        try:
+            return await asyncio.wait_for(session.controller.wait_for_review(), 0.2), session
+        except asyncio.TimeoutError:
+            return None, session
+
+    async def scenario():
+        approved, s1 = await review("approve", attach=False)
+        stopped, s2 = await review("stop", attach=False)
+        watched, s3 = await review("approve", attach=True)
+        # The last viewer leaving starts the countdown
+        s3.detach()
+        late = await asyncio.wait_for(s3.controller.wait_for_review(), 0.2)
+        return approved, stopped, watched, late, s1, s2
+
+    approved, stopped, watched, late, s1, s2 = asyncio.run(scenario())
+    assert approved is True and not s1.controller.should_stop()
+    assert stopped is False and s2.controller.should_stop()
+    assert watched is None
+    assert late is True
+    assert [m["action"] for m in s1.events if m["type"] == "review_timeout"] == ["approve"]
+
+
+def test_unattended_review_defaults_to_stopping_the_run(monkeypatch):
+    from saga.config import SagaConfig
+
+    monkeypatch.delenv("SAGA_UNATTENDED_REVIEW", raising=False)
+    cfg = SagaConfig()
+    assert cfg.unattended_review == "stop"
+
+    async def scenario():
+        session = RunSession("r1", unattended_review_s=0.01)
+        session.controller.start()
+        session.controller.begin_review()
+        session._arm_review_timer()
+        return await asyncio.wait_for(session.controller.wait_for_review(), 0.2), session
+
+    approved, session = asyncio.run(scenario())
+    assert approved is False and session.controller.should_stop()
+    assert [m["action"] for m in session.events if m["type"] == "review_timeout"] == ["stop"]
+
+
+def test_unattended_review_policy_is_validated(monkeypatch):
+    import pytest
+
+    from saga.config import SagaConfig
+
+    monkeypatch.setenv("SAGA_UNATTENDED_REVIEW", " Approve ")
+    assert SagaConfig().unattended_review == "approve"
+    for bad in ("reject", "", "approved"):
+        monkeypatch.setenv("SAGA_UNATTENDED_REVIEW", bad)
+        with pytest.raises(ValueError):
+            SagaConfig()
+    with pytest.raises(ValueError):
+        RunSession("r1", unattended_review="Stop")
@@ -0,0 +1,72 @@
+from ws_gateway_tts.segmenter import SegmenterConfig, TextSegmenter
+
+CFG = SegmenterConfig(first_min_chars=4, first_max_chars=8, min_chars=6, max_chars=12)
+
+
+def _drain(seg, *, final=False):
+    out = []
+    while True:
+        piece = seg.pop(final=final)
+        if piece is None:
+            return out
+        out.append(piece["text"])
+
+
+def _feed(deltas, config=CFG):
+    seg = TextSegmenter(config)
+    out = []
+    for delta in deltas:
+        seg.push(delta)
+        out += _drain(seg)
+    return out + _drain(seg, final=True)
+
+
+def test_long_latin_word_is_extended_not_split():
+    # 第一段上限 8：單字超過上限時延伸到單字結尾，不從中間切開
+    assert _feed(["Supercalifragilistic is long"]) == ["Supercalifragilistic", " is long"]
+
+
+def test_word_arriving_in_pieces_is_held_until_complete():
+    seg = TextSegmenter(CFG)
+    seg.push("Antidisestab")
+    assert _drain(seg) == []  # 可能還沒收完，不切
+    seg.push("lishment ok")
+    assert _drain(seg) == ["Antidisestablishment"]
+
+
+def test_pathological_token_is_cut_at_hard_cap():
+    out = _feed(["x" * 100])
+    assert "".join(out) == "x" * 100
+    assert len(out[0]) == 8 * 4 and all(len(p) <= 12 * 4 for p in out)
+
+
+def test_numbers_with_separators_are_not_split():
+    for number in ("3.14159265358979", "1,000,000,000,000", "12:30:45:67:89:01"):
+        out = _feed([number])
+        assert out == [number], out
+        # 逐字送入也一樣
+        assert _feed(list(number)) == [number]
+
+
+def test_forced_cut_prefers_position_outside_numbers():
+    assert _feed(["價格1,000,000元"]) == ["價格", "1,000,000元"]
+    assert _feed(["ab 3.14159265"]) == ["ab ", "3.14159265"]
+
+
+def test_cjk_punctuation_cuts_and_cjk_text_cuts_anywhere():
+    assert _feed(["你好，", "今天天氣很好。", "我們出去走走吧！"]) == ["你好，", "今天天氣很好。", "我們出去走走吧！"]
+    # 無標點的中文在上限內切（不切在 pending 結尾）
+    assert _feed(["一二三四五六七八九十一二三四五六七八九十"]) == ["一二三四五六七八", "九十一二三四五六七八九", "十"]
+
+
+def test_ascii_punctuation_inside_numbers_is_not_a_boundary():
+    # 3.14 的 . 不是句末；句末的 . 後接空白才是
+    assert _feed(["Pi is 3.14. Next one"]) == ["Pi is ", "3.14.", " Next one"]
+
+
+def test_force_pop_does_not_split_numbers():
+    seg = TextSegmenter(CFG)
+    seg.push("約3.5")
+    assert seg.pop(force=True)["text"] == "約"
+    seg.push("公里 ok")
+    assert _drain(seg, final=True) == ["3.5公里 ok"]
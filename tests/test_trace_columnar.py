@@ -0,0 +1,26 @@
+from saga.trace.columnar import TraceColumns, export_runs
+from saga.trace.sqlite import TraceDB
+
+
+def _make_run(root, run_id, scores):
+    run_dir = root / run_id
+    run_dir.mkdir()
+    db = TraceDB(run_dir / "trace.db")
+    db.init()
+    for i, s in enumerate(scores, 1):
+        db.write_node({"node_name": f"Iteration_{i}", "input_summary": f"best_score={s:.4f}", "elapsed_ms": 100 * i})
+    db.write_candidate("c1", "x**2", "[0.1, 0.2, 0.3]", "[0.33, 0.34, 0.33]")
+    return run_dir
+
+
+def test_export_and_query(tmp_path):
+    runs = [_make_run(tmp_path, "a", [0.5, 0.7]), _make_run(tmp_path, "b", [0.6, 0.9])]
+    paths = export_runs(runs, tmp_path / "out")
+    cols = TraceColumns.load(paths)
+
+    best = cols.best_per_iteration()
+    assert [r["iteration"] for r in best] == [1, 2]
+    assert best[1]["max"] == 0.9
+
+    assert cols.candidates_per_second("a") == 1 / 0.3
+    assert cols.stage_latency_percentiles()["Iteration"]["count"] == 4
@@ -0,0 +1,29 @@
+import json
+import threading
+
+from saga.trace.spans import Tracer, current_tracer, span
+
+
+def test_spans_write_chrome_trace(tmp_path):
+    tracer = Tracer()
+
+    def work():
+        with span("optimizer.evaluate", candidates=3) as sp:
+            sp.set(ok=True)
+
+    with tracer.span("outer.iteration", iteration=1):
+        t = threading.Thread(target=tracer.bind(work))
+        t.start()
+        t.join()
+
+    tracer.write_chrome_trace(tmp_path / "trace.json")
+    events = json.loads((tmp_path / "trace.json").read_text(encoding="utf-8"))["traceEvents"]
+    spans = {e["name"]: e for e in events if e["ph"] == "X"}
+    assert spans["optimizer.evaluate"]["args"] == {"candidates": 3, "ok": True}
+    assert spans["outer.iteration"]["dur"] >= spans["optimizer.evaluate"]["dur"]
+
+
+def test_span_is_noop_without_tracer():
+    assert current_tracer().enabled is False
+    with span("sandbox.run_scoring") as sp:
+        sp.set(status="ok")
@@ -0,0 +1,30 @@
+import pytest
+
+from ws_gateway_tts.protocol import AudioFrame, audio_frame_session_id
+
+
+def test_audio_frame_round_trip_keeps_fields_and_payload():
+    frame = AudioFrame(
+        session_id="會話-1",
+        seq=7,
+        chunk_seq=3,
+        unit_index_start=12,
+        unit_index_end=19,
+        units_text="你好，world。",
+        audio=bytes(range(256)) * 4,
+    )
+    data = frame.encode()
+
+    assert AudioFrame.decode(data) == frame
+    assert audio_frame_session_id(data) == "會話-1"
+    # 解碼接受 memoryview（aiohttp 以外的來源），不需先複製
+    assert AudioFrame.decode(memoryview(data)) == frame
+
+
+def test_audio_frame_decode_rejects_short_or_foreign_frames():
+    data = AudioFrame("s", 1, 0, 0, 0, "", b"").encode()
+    with pytest.raises(ValueError):
+        AudioFrame.decode(data[:-1] if len(data) > 1 else b"")
+    with pytest.raises(ValueError):
+        AudioFrame.decode(b"XX" + data[2:])
+    assert audio_frame_session_id(b"XX" + data[2:]) is None
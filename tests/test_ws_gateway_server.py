@@ -0,0 +1,60 @@
+import asyncio
+
+from aiohttp.test_utils import TestClient, TestServer
+
+from ws_gateway_tts.server import create_app
+
+
+def _start(session_id, **extra):
+    return {"type": "start", "session_id": session_id, "audio_format": "pcm16", "sample_rate": 22050, "channels": 1, **extra}
+
+
+def test_single_session_errors_carry_current_session_id_and_seq(monkeypatch):
+    monkeypatch.setenv("WS_TTS_ENGINE", "dummy")
+    monkeypatch.delenv("WS_TTS_CACHE_DIR", raising=False)
+
+    async def scenario():
+        async with TestClient(TestServer(create_app())) as client:
+            ws = await client.ws_connect("/tts")
+            await ws.send_json(_start("s1"))
+            assert (await ws.receive_json())["type"] == "start_ack"
+            await ws.send_json({"type": "text_delta", "session_id": "s1", "seq": 4, "text": "你好"})
+            await ws.send_json({"type": "bogus", "session_id": "s1"})
+            while True:
+                msg = await ws.receive(timeout=5)
+                if msg.type.name != "TEXT":
+                    return None, msg
+                obj = msg.json()
+                if obj["type"] == "error":
+                    return obj, await ws.receive(timeout=5)
+
+    error, closed = asyncio.run(scenario())
+    assert error["type"] == "error" and error["code"] == "bad_request"
+    assert (error["session_id"], error["seq"]) == ("s1", 4)
+    assert closed.type.name in ("CLOSE", "CLOSED", "CLOSING")
+
+
+def test_error_before_start_has_empty_session(monkeypatch):
+    monkeypatch.setenv("WS_TTS_ENGINE", "dummy")
+
+    async def scenario():
+        async with TestClient(TestServer(create_app())) as client:
+            ws = await client.ws_connect("/tts")
+            await ws.send_json({"type": "text_end", "session_id": "s1", "seq": 1})
+            return await ws.receive_json(timeout=5)
+
+    error = asyncio.run(scenario())
+    assert (error["code"], error["session_id"], error["seq"]) == ("bad_request", "", 0)
+
+
+def test_healthz_reports_resampler(monkeypatch):
+    from ws_gateway_tts.resample import resampler_name
+
+    monkeypatch.setenv("WS_TTS_ENGINE", "dummy")
+
+    async def scenario():
+        async with TestClient(TestServer(create_app())) as client:
+            resp = await client.get("/healthz")
+            return await resp.json()
+
+    assert asyncio.run(scenario())["resampler"] == resampler_name()
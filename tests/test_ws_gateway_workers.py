@@ -0,0 +1,31 @@
+import uuid
+
+from ws_gateway_tts.workers import WorkerTopology, owner_of
+
+SESSIONS = [uuid.UUID(int=i * 7919 + 1).hex for i in range(4000)]
+
+
+def test_owner_is_stable_and_in_range():
+    assert owner_of("s", 1) == 0
+    for sid in SESSIONS[:200]:
+        owner = owner_of(sid, 4)
+        assert 0 <= owner < 4
+        assert owner_of(sid, 4) == owner
+    # 固定值：各 worker 行程（不同 PYTHONHASHSEED）與重啟後都必須算出相同 owner
+    assert [owner_of(f"session-{i}", 3) for i in range(8)] == [0, 1, 0, 1, 2, 2, 1, 2]
+    topology = WorkerTopology(index=1, count=4, socket_dir="/tmp")
+    assert topology.owner_of(SESSIONS[0]) == owner_of(SESSIONS[0], 4)
+
+
+def test_sessions_spread_evenly():
+    counts = [0] * 4
+    for sid in SESSIONS:
+        counts[owner_of(sid, 4)] += 1
+    assert min(counts) > len(SESSIONS) / 4 * 0.85
+
+
+def test_adding_a_worker_moves_only_its_share():
+    moved = [sid for sid in SESSIONS if owner_of(sid, 4) != owner_of(sid, 5)]
+    # 只有改由新 worker 負責的 session 換手（約 1/5），其餘 owner 不變
+    assert all(owner_of(sid, 5) == 4 for sid in moved)
+    assert 0.15 < len(moved) / len(SESSIONS) < 0.25
@@ -151,6 +151,10 @@ export default function App() {
 
   const handleCancel = useCallback(() => {
     if (wsRef.current) {
+      // Closing alone only detaches; the server-side run keeps going
+      if (wsRef.current.readyState === WebSocket.OPEN) {
+        wsRef.current.send(JSON.stringify({ type: "stop" }));
+      }
       wsRef.current.close();
       wsRef.current = null;
     }
@@ -227,124 +231,158 @@ export default function App() {
     setCurrentResult(null);
     setUiState(UI_STATES.RUNNING);
 
-    const ws = new WebSocket(wsUrl);
-    wsRef.current = ws;
-
-    ws.onopen = () => {
-      ws.send(
-        JSON.stringify({
-          type: "start_run",
-          text,
-          keywords: keywordList,
-          mode,
-          config: {
-            max_iters: maxIters,
-            convergence_eps: convergenceEps,
-            convergence_patience: patience,
-            weights: weightList,
-            goal_thresholds: thresholdList,
-            inner_iterations: innerIterations,
-            batch_size: batchSize,
-            scoring_timeout_s: scoringTimeoutS,
-          },
-        }),
-      );
+    // Runs continue on the server when the socket drops; reattach from the last seq seen
+    const stream = { runId: null, lastSeq: 0, finished: false };
+
+    const startPayload = {
+      type: "start_run",
+      batch_ms: 25,
+      text,
+      keywords: keywordList,
+      mode,
+      config: {
+        max_iters: maxIters,
+        convergence_eps: convergenceEps,
+        convergence_patience: patience,
+        weights: weightList,
+        goal_thresholds: thresholdList,
+        inner_iterations: innerIterations,
+        batch_size: batchSize,
+        scoring_timeout_s: scoringTimeoutS,
+      },
     };
 
-    ws.onmessage = (ev) => {
-      try {
-        const msg = JSON.parse(ev.data);
-        appendEvent(msg);
+    const handleMessage = (msg) => {
+      appendEvent(msg);
 
-        // Handle different message types
-        if (msg.run_id) {
-          setRunId(msg.run_id);
-        }
+      if (msg.seq) {
+        stream.lastSeq = Math.max(stream.lastSeq, msg.seq);
+      }
+      if (msg.type === "run_finished" || msg.type === "run_stopped" || msg.type === "ui_error") {
+        stream.finished = true;
+      }
 
-        if (msg.type === "iteration_update") {
-          startTransition(() => {
-            setIteration(msg.iteration || 0);
-          });
-        }
+      // Handle different message types
+      if (msg.run_id) {
+        stream.runId = msg.run_id;
+        setRunId(msg.run_id);
+      }
 
-        if (msg.type === "analysis_report") {
-          startTransition(() => {
-            setAnalysisReport(msg.report);
-          });
-        }
+      if (msg.type === "iteration_update") {
+        startTransition(() => {
+          setIteration(msg.iteration || 0);
+        });
+      }
 
-        if (msg.type === "need_review") {
-          setUiState(UI_STATES.WAITING_REVIEW);
-          if (msg.report) {
-            setAnalysisReport(msg.report);
-          }
-        }
+      if (msg.type === "analysis_report") {
+        startTransition(() => {
+          setAnalysisReport(msg.report);
+        });
+      }
 
-        if (msg.type === "mode_changed") {
-          setMode(msg.mode);
+      if (msg.type === "need_review") {
+        setUiState(UI_STATES.WAITING_REVIEW);
+        if (msg.report) {
+          setAnalysisReport(msg.report);
         }
+      }
 
-        // Handle pause/resume states
-        if (msg.type === "pause_ack" || msg.type === "run_paused") {
-          setUiState(UI_STATES.PAUSED);
-        }
+      if (msg.type === "mode_changed") {
+        setMode(msg.mode);
+      }
+
+      // Handle pause/resume states
+      if (msg.type === "pause_ack" || msg.type === "run_paused") {
+        setUiState(UI_STATES.PAUSED);
+      }
+
+      if (msg.type === "resume_ack") {
+        setUiState(UI_STATES.RUNNING);
+      }
 
-        if (msg.type === "resume_ack") {
-          setUiState(UI_STATES.RUNNING);
+      // Handle stop and export result
+      if (msg.type === "run_stopped") {
+        setUiState(UI_STATES.COMPLETED);
+        if (msg.current_result) {
+          setCurrentResult(msg.current_result);
         }
+      }
 
-        // Handle stop and export result
-        if (msg.type === "run_stopped") {
-          setUiState(UI_STATES.COMPLETED);
-          if (msg.current_result) {
-            setCurrentResult(msg.current_result);
-          }
+      if (msg.type === "run_finished") {
+        setUiState(UI_STATES.COMPLETED);
+        setCurrentResult({
+          run_id: msg.run_id,
+          best_candidate: msg.best_candidate,
+          best_score: msg.best_score,
+          termination_reason: msg.termination_reason,
+          total_iterations: msg.total_iterations,
+        });
+        if (msg.run_id) {
+          fetchArtifacts(msg.run_id);
         }
+      }
 
-        if (msg.type === "run_finished") {
-          setUiState(UI_STATES.COMPLETED);
-          setCurrentResult({
-            run_id: msg.run_id,
-            best_candidate: msg.best_candidate,
-            best_score: msg.best_score,
-            termination_reason: msg.termination_reason,
-            total_iterations: msg.total_iterations,
-          });
-          if (msg.run_id) {
-            fetchArtifacts(msg.run_id);
+      if (msg.type === "system_log") {
+        startTransition(() => {
+          setLogs((prev) => [...prev, msg].slice(-100)); // Keep last 100 logs
+        });
+        // Scroll to bottom using container ref to prevent page jumping
+        setTimeout(() => {
+          if (logsContainerRef.current) {
+            const { scrollHeight, clientHeight } = logsContainerRef.current;
+            logsContainerRef.current.scrollTo({
+              top: scrollHeight - clientHeight,
+              behavior: "smooth"
+            });
           }
+        }, 100);
+      }
+    };
+
+    const connect = (payload) => {
+      const ws = new WebSocket(wsUrl);
+      wsRef.current = ws;
+
+      ws.onopen = () => {
+        ws.send(JSON.stringify(payload));
+      };
+
+      ws.onmessage = (ev) => {
+        try {
+          const msg = JSON.parse(ev.data);
+          // Server coalesces events within batch_ms into one "batch" frame
+          const msgs = msg.type === "batch" ? msg.events : [msg];
+          msgs.forEach(handleMessage);
+        } catch {
+          appendEvent({ type: "raw", message: ev.data });
         }
+      };
 
-        if (msg.type === "system_log") {
-          startTransition(() => {
-            setLogs((prev) => [...prev, msg].slice(-100)); // Keep last 100 logs
-          });
-          // Scroll to bottom using container ref to prevent page jumping
+      ws.onclose = () => {
+        if (wsRef.current !== ws) {
+          return; // replaced by a new run
+        }
+        if (!stream.finished && stream.runId) {
+          appendEvent({ type: "ws_reconnecting", last_seq: stream.lastSeq });
           setTimeout(() => {
-            if (logsContainerRef.current) {
-              const { scrollHeight, clientHeight } = logsContainerRef.current;
-              logsContainerRef.current.scrollTo({
-                top: scrollHeight - clientHeight,
-                behavior: "smooth"
-              });
+            if (wsRef.current === ws) {
+              connect({ type: "attach", run_id: stream.runId, last_seq: stream.lastSeq, batch_ms: 25 });
             }
-          }, 100);
+          }, 1000);
+          return;
         }
-      } catch {
-        appendEvent({ type: "raw", message: ev.data });
-      }
-    };
+        if (uiState === UI_STATES.RUNNING) {
+          setUiState(UI_STATES.IDLE);
+        }
+        appendEvent({ type: "ws_closed" });
+      };
 
-    ws.onclose = () => {
-      if (uiState === UI_STATES.RUNNING) {
-        setUiState(UI_STATES.IDLE);
-      }
-      appendEvent({ type: "ws_closed" });
+      ws.onerror = () => {
+        appendEvent({ type: "ws_error" });
+      };
     };
 
-    ws.onerror = () => {
-      appendEvent({ type: "ws_error" });
-    };
+    connect(startPayload);
   }, [wsUrl, text, keywordList, mode, maxIters, convergenceEps, patience, innerIterations, batchSize, scoringTimeoutS, weightList, thresholdList, fetchArtifacts, appendEvent, uiState]);
 
   const isRunning = uiState === UI_STATES.RUNNING;
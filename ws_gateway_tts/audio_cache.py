@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from .tts_engines.base import AudioSpec, TtsEngine, engine_output_spec, iter_pcm16
+
+
+def normalize_text(text: str) -> str:
+    # 只合併空白；標點會影響韻律，保留原樣
+    return " ".join(text.split())
+
+
+class PcmCache:
+    """
+    跨 session 共用的合成音訊 LRU cache：(engine, voice, sample_rate, channels, 正規化文字) → PCM。
+
+    快取的是引擎輸出的 PCM16，與 client 的 audio_format 無關（編碼在送出前才做），不同格式的 session 共用同一份。
+
+    - 記憶體層以 byte 上限（max_bytes）做 LRU 淘汰
+    - disk_dir 有設定時另存一份到磁碟（<sha1>.pcm），重啟後仍可命中；磁碟層以 disk_max_bytes 依 mtime 淘汰
+    """
+
+    def __init__(self, *, max_bytes: int, disk_dir: Optional[str] = None, disk_max_bytes: int = 0) -> None:
+        self.max_bytes = max(0, max_bytes)
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.disk_max_bytes = max(0, disk_max_bytes)
+        self.disk_bytes = 0
+        # _disk_write/_disk_prune 在 to_thread 的 worker thread 上執行，disk_bytes 的更新需互斥
+        self._disk_lock = threading.Lock()
+        if self.disk_dir is not None:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+            self.disk_bytes = sum(p.stat().st_size for p in self.disk_dir.glob("*.pcm"))
+
+    @staticmethod
+    def make_key(engine: str, voice: str, spec: AudioSpec, text: str) -> str:
+        raw = "\x1f".join([engine, voice, str(spec.sample_rate), str(spec.channels), normalize_text(text)])
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    async def get(self, key: str) -> Optional[bytes]:
+        pcm = self._entries.get(key)
+        if pcm is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return pcm
+        if self.disk_dir is not None:
+            pcm = await asyncio.to_thread(self._disk_read, key)
+            if pcm is not None:
+                self.hits += 1
+                self._remember(key, pcm)
+                return pcm
+        self.misses += 1
+        return None
+
+    async def put(self, key: str, pcm: bytes) -> None:
+        if not pcm:
+            return
+        self._remember(key, pcm)
+        if self.disk_dir is not None:
+            await asyncio.to_thread(self._disk_write, key, pcm)
+
+    def _remember(self, key: str, pcm: bytes) -> None:
+        if len(pcm) > self.max_bytes:
+            return
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self.bytes -= len(old)
+        self._entries[key] = pcm
+        self.bytes += len(pcm)
+        while self.bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.bytes -= len(evicted)
+
+    def _disk_read(self, key: str) -> Optional[bytes]:
+        assert self.disk_dir is not None
+        path = self.disk_dir / f"{key}.pcm"
+        try:
+            pcm = path.read_bytes()
+            os.utime(path)  # 磁碟層 LRU 依 mtime
+            return pcm
+        except OSError:
+            return None
+
+    def _disk_write(self, key: str, pcm: bytes) -> None:
+        assert self.disk_dir is not None
+        path = self.disk_dir / f"{key}.pcm"
+        if path.exists():
+            return
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            tmp.write_bytes(pcm)
+            os.replace(tmp, path)
+        except OSError:
+            return
+        with self._disk_lock:
+            self.disk_bytes += len(pcm)
+            if self.disk_max_bytes and self.disk_bytes > self.disk_max_bytes:
+                self._disk_prune()
+
+    def _disk_prune(self) -> None:
+        # 呼叫端持有 _disk_lock：同時只有一個 thread 掃描與刪除
+        assert self.disk_dir is not None
+        files = []
+        for p in self.disk_dir.glob("*.pcm"):
+            try:
+                st = p.stat()
+            except OSError:
+                continue
+            files.append((st.st_mtime, st.st_size, p))
+        files.sort()
+        total = sum(size for _, size, _ in files)
+        # 淘汰到上限的 90%，避免每次寫入都重掃目錄
+        target = int(self.disk_max_bytes * 0.9)
+        for _, size, p in files:
+            if total <= target:
+                break
+            try:
+                p.unlink()
+                total -= size
+            except OSError:
+                pass
+        self.disk_bytes = total
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "disk_bytes": self.disk_bytes,
+        }
+
+
+class CachedTtsEngine:
+    """包住實際引擎：cache 命中時完全不呼叫引擎。"""
+
+    def __init__(self, engine: TtsEngine, cache: PcmCache, *, engine_name: str, voice: str) -> None:
+        self.engine = engine
+        self.cache = cache
+        self.engine_name = engine_name
+        self.voice = voice
+
+    def output_spec(self, spec: AudioSpec) -> AudioSpec:
+        return engine_output_spec(self.engine, spec)
+
+    async def synthesize_pcm16(self, text: str, *, spec: AudioSpec) -> bytes:
+        key = self.cache.make_key(self.engine_name, self.voice, spec, text)
+        pcm = await self.cache.get(key)
+        if pcm is not None:
+            return pcm
+        pcm = await self.engine.synthesize_pcm16(text, spec=spec)
+        await self.cache.put(key, pcm)
+        return pcm
+
+    async def synthesize_pcm16_stream(self, text: str, *, spec: AudioSpec) -> AsyncIterator[bytes]:
+        key = self.cache.make_key(self.engine_name, self.voice, spec, text)
+        pcm = await self.cache.get(key)
+        if pcm is not None:
+            yield pcm
+            return
+        pieces: List[bytes] = []
+        async for piece in iter_pcm16(self.engine, text, spec=spec):
+            pieces.append(piece)
+            yield piece
+        # 只快取完整合成的結果（中途取消不寫入）
+        await self.cache.put(key, b"".join(pieces))
+
+
+def cache_from_env() -> Optional[PcmCache]:
+    max_mb = float(os.getenv("WS_TTS_AUDIO_CACHE_MB", "64"))
+    if max_mb <= 0:
+        return None
+    disk_dir = os.getenv("WS_TTS_AUDIO_CACHE_DIR", "").strip() or None
+    disk_mb = float(os.getenv("WS_TTS_AUDIO_CACHE_DISK_MB", "512"))
+    return PcmCache(max_bytes=int(max_mb * 1024 * 1024), disk_dir=disk_dir, disk_max_bytes=int(disk_mb * 1024 * 1024))
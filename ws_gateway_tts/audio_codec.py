@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import asyncio
+import struct
+import warnings
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Tuple
+
+try:
+    # audioop 在 3.11/3.12 為標準庫（3.13 移除）；沒有時不提供壓縮格式
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", DeprecationWarning)
+        import audioop
+except ImportError:  # pragma: no cover
+    audioop = None  # type: ignore[assignment]
+
+from .tts_engines.base import AudioSpec
+
+PCM_FORMATS = frozenset({"pcm16", "pcm16_wav"})
+ADPCM_FORMAT = "adpcm_ima"
+
+_CHUNK_HEADER = struct.Struct("<I")
+_CHANNEL_HEADER = struct.Struct("<hBB")
+
+
+class AdpcmEncoder:
+    """
+    IMA ADPCM 編碼器（4 bit/sample，約 PCM16 的 1/4）；每個 session 一個，預測狀態跨 chunk 延續。
+
+    chunk 格式（little-endian）：u32 每聲道 sample 數 n，接著每個聲道
+    (i16 predictor, u8 step_index, u8 保留) + ceil(n/2) bytes（先高 nibble）。
+    每個 chunk 帶有解碼起始狀態，可獨立解碼（resume 從任一 chunk 開始播放）。
+    """
+
+    def __init__(self, channels: int) -> None:
+        if audioop is None:
+            raise RuntimeError("此 Python 版本沒有 audioop，無法使用 adpcm_ima")
+        self.channels = max(1, channels)
+        self._states: List[Optional[Tuple[int, int]]] = [None] * self.channels
+
+    def encode(self, pcm: bytes) -> bytes:
+        samples = array("h", pcm[: len(pcm) - len(pcm) % (2 * self.channels)])
+        n = len(samples) // self.channels
+        out = [_CHUNK_HEADER.pack(n)]
+        planes = []
+        for c in range(self.channels):
+            plane = samples[c :: self.channels] if self.channels > 1 else samples
+            if n % 2:
+                plane.append(plane[-1])  # 補到偶數個 sample；解碼端依 n 截掉
+            state = self._states[c]
+            predictor, index = state if state is not None else (0, 0)
+            out.append(_CHANNEL_HEADER.pack(predictor, index, 0))
+            data, self._states[c] = audioop.lin2adpcm(plane.tobytes(), 2, state)
+            planes.append(data)
+        return b"".join(out + planes)
+
+
+def is_supported_format(audio_format: str) -> bool:
+    if audio_format == ADPCM_FORMAT:
+        return audioop is not None
+    return True  # 其餘格式一律送 raw PCM16（相容既有 client）
+
+
+def new_encoder(spec: AudioSpec) -> Optional[AdpcmEncoder]:
+    """需要壓縮的格式回傳該 session 的編碼器；raw PCM16 回傳 None。"""
+    if spec.audio_format == ADPCM_FORMAT:
+        return AdpcmEncoder(spec.channels)
+    return None
+
+
+class AudioEncodePool:
+    """在 worker thread 上做音訊轉換/編碼，避免大量 session 同時處理時佔住 event loop。"""
+
+    def __init__(self, *, threads: int = 2) -> None:
+        self.threads = max(1, threads)
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    async def run(self, fn: Callable[[bytes], bytes], pcm: bytes) -> bytes:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix="ws-tts-encode")
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, pcm)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import time
+from typing import Optional
+
+from .segmenter import SegmenterConfig
+
+
+def _ewma(prev: Optional[float], x: float, alpha: float) -> float:
+    return x if prev is None else prev + alpha * (x - prev)
+
+
+class AdaptiveChunkPolicy:
+    """
+    每個 session 的自適應分段策略。
+
+    - 第一段：有文字後最多等 first_wait_s 就強制切出（不等標點），壓低 TTFA
+    - 之後：依「已送出但尚未播完的音訊」(lead) 決定下一段最少字數，讓合成剛好領先播放：
+      lead 越多、段落越大（減少引擎呼叫）；lead 快用完時改切小段
+    - 以模擬的播放時鐘偵測 underrun（新 chunk 送出時前面的音訊已播完）
+
+    估計值（EWMA）：輸入速率（units/s）、每 unit 音訊秒數、引擎 real-time factor。
+    """
+
+    def __init__(self, config: SegmenterConfig, *, first_wait_s: float = 0.12, safety: float = 0.6) -> None:
+        self.config = config
+        self.first_wait_s = first_wait_s
+        self.safety = safety
+        self.input_rate: Optional[float] = None  # units/s
+        self.audio_s_per_unit: Optional[float] = None
+        self.rtf: Optional[float] = None  # 合成耗時 / 音訊長度
+        self.first_text_s: Optional[float] = None
+        self.play_end_s: Optional[float] = None  # 模擬播放：目前已送出音訊播完的時間點
+        self.underruns = 0
+        self.underrun_s = 0.0
+        self._last_text_s: Optional[float] = None
+
+    def on_text(self, units: int, now_s: Optional[float] = None) -> None:
+        now_s = time.monotonic() if now_s is None else now_s
+        if self.first_text_s is None:
+            self.first_text_s = now_s
+        if self._last_text_s is not None:
+            dt = now_s - self._last_text_s
+            if dt > 1e-3:
+                self.input_rate = _ewma(self.input_rate, units / dt, 0.3)
+        self._last_text_s = now_s
+
+    def on_synth(self, units: int, synth_s: float, audio_s: float) -> None:
+        if units <= 0 or audio_s <= 0:
+            return
+        self.audio_s_per_unit = _ewma(self.audio_s_per_unit, audio_s / units, 0.3)
+        self.rtf = _ewma(self.rtf, synth_s / audio_s, 0.3)
+
+    def on_chunk(self, audio_s: float, now_s: Optional[float] = None) -> bool:
+        """chunk 放入送出佇列時呼叫；回傳此 chunk 是否造成 underrun（播放中斷）。"""
+        now_s = time.monotonic() if now_s is None else now_s
+        underrun = False
+        if self.play_end_s is None or now_s > self.play_end_s:
+            if self.play_end_s is not None and now_s - self.play_end_s > 0.02:
+                underrun = True
+                self.underruns += 1
+                self.underrun_s += now_s - self.play_end_s
+            self.play_end_s = now_s + audio_s
+        else:
+            self.play_end_s += audio_s
+        return underrun
+
+    def first_deadline_s(self) -> Optional[float]:
+        if self.first_text_s is None:
+            return None
+        return self.first_text_s + self.first_wait_s
+
+    def underrun_deadline_s(self, pending_units: int) -> Optional[float]:
+        """
+        pending 文字若在此時間點前仍未切出，合成完成時已送出的音訊會播完（underrun）。
+
+        輸入比播放慢時 underrun 無法避免，此時不為了追趕而切出過小的段落（< first_min_chars）。
+        """
+        if self.play_end_s is None or self.audio_s_per_unit is None or self.rtf is None:
+            return None
+        if pending_units < self.config.first_min_chars:
+            return None
+        synth_s = pending_units * self.audio_s_per_unit * self.rtf
+        return self.play_end_s - synth_s - 0.05
+
+    def min_chars(self, pending_units: int, now_s: Optional[float] = None) -> int:
+        """之後段落的最少字數（第一段由 segmenter 的 first_* 門檻與 first_deadline_s 處理）。"""
+        cfg = self.config
+        if self.play_end_s is None or self.audio_s_per_unit is None or self.rtf is None:
+            return cfg.min_chars
+        now_s = time.monotonic() if now_s is None else now_s
+        lead_s = max(0.0, self.play_end_s - now_s) * self.safety
+        synth_s_per_unit = self.audio_s_per_unit * self.rtf
+        wait_s_per_unit = 1.0 / self.input_rate if self.input_rate else 0.0
+        # n 個 unit 備妥所需時間 ≈ 等待未到的文字 + 合成；取能在 lead 內完成的最大 n
+        denom = synth_s_per_unit + wait_s_per_unit
+        if denom <= 0:
+            return cfg.max_chars
+        n = (lead_s + min(pending_units, cfg.max_chars) * wait_s_per_unit) / denom
+        return int(max(cfg.first_min_chars, min(cfg.max_chars, n)))
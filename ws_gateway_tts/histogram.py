@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+
+def _prom_escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt_prom_line(name: str, value: float, labels: Optional[Dict[str, str]] = None) -> str:
+    if labels:
+        labels_str = ",".join(f'{k}="{_prom_escape_label_value(str(v))}"' for k, v in sorted(labels.items()))
+        return f"{name}{{{labels_str}}} {value}"
+    return f"{name} {value}"
+
+
+@dataclass(frozen=True)
+class LogBuckets:
+    """
+    對數刻度的固定 bucket 上界：lo, lo*r, lo*r^2, ... ≤ hi（r = 10^(1/per_decade)）。
+
+    per_decade=10 時相鄰上界差約 26%，與 HDR histogram 相同以相對誤差界定精度；
+    bucket 位置直接由 log 算出，記錄為 O(1)。上界只取 4 位有效數字，方便閱讀。
+    """
+
+    lo: float
+    hi: float
+    per_decade: int = 10
+    bounds: Tuple[float, ...] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        n = int(math.floor(math.log10(self.hi / self.lo) * self.per_decade + 1e-9)) + 1
+        bounds = tuple(float(f"{self.lo * 10 ** (i / self.per_decade):.4g}") for i in range(n))
+        object.__setattr__(self, "bounds", bounds)
+
+    def index(self, value: float) -> int:
+        """value 所屬的 bucket（value ≤ bounds[i] 的最小 i；超過 hi 為 len(bounds)）。"""
+        bounds = self.bounds
+        if value <= bounds[0]:
+            return 0
+        if value > bounds[-1]:
+            return len(bounds)
+        i = int(math.ceil(math.log10(value / self.lo) * self.per_decade - 1e-9))
+        # 上界經過四捨五入，log 算出的位置最多差一格
+        if i > 0 and value <= bounds[i - 1]:
+            i -= 1
+        elif value > bounds[i]:
+            i += 1
+        return i
+
+
+class Histogram:
+    """
+    Prometheus histogram（累積至行程結束，不取樣）。
+
+    snapshot 為 JSON 可序列化的各 bucket 次數與總和；多個 worker 的 snapshot 逐欄相加即可合併。
+    """
+
+    def __init__(self, buckets: LogBuckets) -> None:
+        self.buckets = buckets
+        self.counts: List[int] = [0] * (len(buckets.bounds) + 1)  # 最後一格為 +Inf
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[self.buckets.index(value)] += 1
+        self.sum += value
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"counts": list(self.counts), "sum": self.sum}
+
+
+def render_histogram(name: str, help_text: str, buckets: LogBuckets, snap: Optional[Dict[str, Any]]) -> List[str]:
+    counts = snap["counts"] if snap is not None else [0] * (len(buckets.bounds) + 1)
+    total_sum = snap["sum"] if snap is not None else 0.0
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+    cumulative = 0
+    for bound, count in zip(buckets.bounds, counts):
+        cumulative += count
+        lines.append(_fmt_prom_line(f"{name}_bucket", float(cumulative), {"le": repr(bound)}))
+    cumulative += counts[len(buckets.bounds)]
+    lines.append(_fmt_prom_line(f"{name}_bucket", float(cumulative), {"le": "+Inf"}))
+    lines.append(_fmt_prom_line(f"{name}_sum", float(total_sum)))
+    lines.append(_fmt_prom_line(f"{name}_count", float(cumulative)))
+    return lines
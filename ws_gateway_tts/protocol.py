@@ -1,8 +1,18 @@
 from __future__ import annotations
 
+import struct
 from dataclasses import dataclass
 from typing import Any, Dict, Optional
 
+# Binary audio frame（start 時以 binary_audio=true 協商）：
+#   固定 header（little-endian，24 bytes）
+#     magic "TA" | version u8 | flags u8 | seq u32 | chunk_seq u32
+#     | unit_index_start u32 | unit_index_end u32 | session_id_len u16 | units_text_len u16
+#   接著 session_id（UTF-8）、units_text（UTF-8）、raw PCM16。
+AUDIO_FRAME_MAGIC = b"TA"
+AUDIO_FRAME_VERSION = 1
+AUDIO_FRAME_HEADER = struct.Struct("<2sBBIIIIHH")
+
 
 def require_str(obj: Dict[str, Any], key: str) -> str:
     val = obj.get(key)
@@ -27,6 +37,15 @@ def optional_int(obj: Dict[str, Any], key: str) -> Optional[int]:
     return val
 
 
+def optional_bool(obj: Dict[str, Any], key: str, default: bool = False) -> bool:
+    val = obj.get(key)
+    if val is None:
+        return default
+    if not isinstance(val, bool):
+        raise ValueError(f"欄位 {key} 必須是布林值")
+    return val
+
+
 def require_float(obj: Dict[str, Any], key: str) -> float:
     val = obj.get(key)
     if not isinstance(val, (int, float)):
@@ -40,6 +59,7 @@ class StartMessage:
     audio_format: str
     sample_rate: int
     channels: int
+    binary_audio: bool = False
 
     @staticmethod
     def parse(obj: Dict[str, Any]) -> "StartMessage":
@@ -48,6 +68,7 @@ class StartMessage:
             audio_format=require_str(obj, "audio_format"),
             sample_rate=require_int(obj, "sample_rate"),
             channels=require_int(obj, "channels"),
+            binary_audio=optional_bool(obj, "binary_audio"),
         )
 
 
@@ -104,3 +125,78 @@ class ResumeMessage:
             last_unit_index_received=require_int(obj, "last_unit_index_received"),
         )
 
+
+@dataclass(frozen=True)
+class AudioFrame:
+    session_id: str
+    seq: int
+    chunk_seq: int
+    unit_index_start: int
+    unit_index_end: int
+    units_text: str
+    audio: bytes
+
+    def encode(self) -> bytes:
+        return encode_audio_frame(
+            session_id=self.session_id,
+            seq=self.seq,
+            chunk_seq=self.chunk_seq,
+            unit_index_start=self.unit_index_start,
+            unit_index_end=self.unit_index_end,
+            units_text=self.units_text,
+            audio=self.audio,
+        )
+
+    @staticmethod
+    def decode(data: bytes) -> "AudioFrame":
+        if len(data) < AUDIO_FRAME_HEADER.size:
+            raise ValueError("binary frame 長度不足")
+        magic, version, _flags, seq, chunk_seq, start, end, sid_len, text_len = AUDIO_FRAME_HEADER.unpack_from(data)
+        if magic != AUDIO_FRAME_MAGIC or version != AUDIO_FRAME_VERSION:
+            raise ValueError("不支援的 binary frame")
+        off = AUDIO_FRAME_HEADER.size
+        if len(data) < off + sid_len + text_len:
+            raise ValueError("binary frame 長度不足")
+        sid = bytes(data[off : off + sid_len]).decode("utf-8")
+        off += sid_len
+        text = bytes(data[off : off + text_len]).decode("utf-8")
+        off += text_len
+        return AudioFrame(sid, seq, chunk_seq, start, end, text, bytes(data[off:]))
+
+
+def encode_audio_frame(
+    *,
+    session_id: str,
+    seq: int,
+    chunk_seq: int,
+    unit_index_start: int,
+    unit_index_end: int,
+    units_text: str,
+    audio: bytes,
+) -> bytes:
+    sid = session_id.encode("utf-8")
+    text = units_text.encode("utf-8")
+    header = AUDIO_FRAME_HEADER.pack(
+        AUDIO_FRAME_MAGIC,
+        AUDIO_FRAME_VERSION,
+        0,
+        seq,
+        chunk_seq,
+        unit_index_start,
+        unit_index_end,
+        len(sid),
+        len(text),
+    )
+    return b"".join((header, sid, text, audio))
+
+
+def audio_frame_session_id(data: bytes) -> Optional[str]:
+    """只取出 binary audio frame 的 session_id（轉送用，不複製音訊）。"""
+    if len(data) < AUDIO_FRAME_HEADER.size or data[:2] != AUDIO_FRAME_MAGIC:
+        return None
+    sid_len = AUDIO_FRAME_HEADER.unpack_from(data)[7]
+    off = AUDIO_FRAME_HEADER.size
+    try:
+        return bytes(data[off : off + sid_len]).decode("utf-8")
+    except UnicodeDecodeError:
+        return None
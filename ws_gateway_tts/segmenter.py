@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+# 句末（強）與子句（弱）邊界；ASCII 的 . , : 需看下一個字元才能判斷（3.14、1,000、12:30 不切）
+STRONG_BOUNDARIES = frozenset("。！？!?；;\n…")
+WEAK_BOUNDARIES = frozenset("，、,：:")
+_AMBIGUOUS = frozenset(".,:")
+
+
+def _is_word_char(ch: str) -> bool:
+    # 英數字（含數字的小數點/千分位由 _AMBIGUOUS 處理）；CJK 字元之間可任意切
+    return ch.isascii() and ch.isalnum()
+
+
+def _joins(text: str, k: int) -> bool:
+    """在 text[k] 之前切是否會切開英數 token（單字，或 3.14、1,000、12:30 這類數字）。"""
+    a, b = text[k - 1], text[k]
+    if _is_word_char(a):
+        if _is_word_char(b):
+            return True
+        # 英數字後接 . , : 再接英數字；下一字元還沒到時保守視為相連
+        return b in _AMBIGUOUS and (k + 1 >= len(text) or _is_word_char(text[k + 1]))
+    return a in _AMBIGUOUS and _is_word_char(b) and k >= 2 and _is_word_char(text[k - 2])
+
+
+# 單一英數 token 超過 max_chars 時延伸到 token 結尾，但最多到 max_chars 的這個倍數（URL、亂碼等）
+_TOKEN_HARD_MAX_FACTOR = 4
+
+
+@dataclass(frozen=True)
+class SegmenterConfig:
+    first_min_chars: int = 4  # 第一段：子句邊界達此長度即切（句末不限長度），壓低 TTFA
+    first_max_chars: int = 16  # 第一段：無邊界時最長等到此長度就切
+    min_chars: int = 12  # 之後：邊界需達此長度才切，短句合併以減少引擎呼叫
+    max_chars: int = 64  # 之後：無合格邊界時最長長度（單一英數 token 可延伸，見 _TOKEN_HARD_MAX_FACTOR）
+
+
+class TextSegmenter:
+    """
+    中英混合文字的增量分段器（每個 session 一個）。
+
+    - 以子句/句末標點為切點，不切開英文單字與數字
+    - 第一段用較小門檻（快出第一段音訊），之後用較大門檻並盡量取到最後一個合格切點
+    - pending 文字以字串片段累積（string builder），邊界只在新文字進來時增量掃描
+    - unit index 以 Unicode code point 計
+    """
+
+    def __init__(self, config: Optional[SegmenterConfig] = None) -> None:
+        self.config = config or SegmenterConfig()
+        self.next_unit_index = 0
+        self.segments_emitted = 0
+        self._parts: List[str] = []
+        self._len = 0
+        self._start = 0  # pending 第一個字元的 unit index
+        # (切點 offset：邊界字元之後的位置, 是否為句末)；offset 相對於 pending 開頭
+        self._boundaries: List[Tuple[int, bool]] = []
+        self._prev = ""
+        self._ambiguous_at: Optional[int] = None  # 待下一字元判斷的 ASCII 標點 offset
+        self._ambiguous_strong = False
+
+    def __len__(self) -> int:
+        return self._len
+
+    def push(self, text: str) -> None:
+        if not text:
+            return
+        offset = self._len
+        for ch in text:
+            if self._ambiguous_at is not None:
+                if not _is_word_char(ch):
+                    self._boundaries.append((self._ambiguous_at + 1, self._ambiguous_strong))
+                self._ambiguous_at = None
+            if ch in _AMBIGUOUS:
+                if _is_word_char(self._prev) or ch != ".":
+                    self._ambiguous_at = offset
+                    self._ambiguous_strong = ch == "."
+                else:
+                    self._boundaries.append((offset + 1, True))
+            elif ch in STRONG_BOUNDARIES:
+                self._boundaries.append((offset + 1, True))
+            elif ch in WEAK_BOUNDARIES:
+                self._boundaries.append((offset + 1, False))
+            self._prev = ch
+            offset += 1
+        self._parts.append(text)
+        self._len = offset
+        self.next_unit_index += len(text)
+
+    def has_ready(self, min_chars: Optional[int] = None) -> bool:
+        return self._ready_cut(min_chars) is not None
+
+    def pop(self, *, final: bool = False, force: bool = False, min_chars: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """
+        取出下一段 {"start", "end", "text"}；沒有可切的段落時回 None。
+
+        - final=True（收到 text_end）：剩餘文字全部吐出（超過上限時仍依上限分段）
+        - force=True：不等門檻，切出目前可安全切的最長前綴（不切在英數字中間）
+        - min_chars：覆寫之後段落的最少字數（自適應策略用）
+        """
+        if not self._len:
+            return None
+        if final and self._ambiguous_at is not None:
+            self._boundaries.append((self._ambiguous_at + 1, self._ambiguous_strong))
+            self._ambiguous_at = None
+        cut = self._ready_cut(min_chars)
+        if cut is None and final:
+            cut = self._len if self._len <= self._max_chars() else self._forced_cut(self._text(), final=True)
+        if cut is None and force:
+            cut = self._safe_prefix_cut()
+        if cut is None:
+            return None
+        return self._take(cut)
+
+    def _max_chars(self) -> int:
+        return self.config.first_max_chars if self.segments_emitted == 0 else self.config.max_chars
+
+    def _ready_cut(self, min_chars: Optional[int] = None) -> Optional[int]:
+        cfg = self.config
+        max_chars = self._max_chars()
+        if self.segments_emitted == 0:
+            # 第一段：最早的合格切點
+            for off, strong in self._boundaries:
+                if off > max_chars:
+                    break
+                if strong or off >= cfg.first_min_chars:
+                    return off
+        else:
+            # 之後：上限內最後一個合格切點（累積越多、段落越大）
+            best = None
+            floor = cfg.min_chars if min_chars is None else min_chars
+            for off, _ in self._boundaries:
+                if off > max_chars:
+                    break
+                if off >= floor:
+                    best = off
+            if best is not None:
+                return best
+        if self._len < max_chars:
+            return None
+        return self._forced_cut(self._text())
+
+    def _forced_cut(self, text: str, *, final: bool = False) -> Optional[int]:
+        max_chars = self._max_chars()
+        within = [off for off, _ in self._boundaries if off <= max_chars]
+        if within:
+            return within[-1]
+        # 無任何標點：在上限內找不切斷英數 token 的位置（優先空白之後）；
+        # 不切在 pending 結尾，下一段 delta 可能是同一個單字的後半
+        upper = min(max_chars, len(text) - 1)
+        for k in range(upper, 0, -1):
+            if text[k - 1].isspace():
+                return k
+        for k in range(upper, 0, -1):
+            if not _joins(text, k):
+                return k
+        # 開頭的英數 token 本身超過上限：延伸到 token 結尾；token 可能還沒收完時先不切
+        hard_max = max_chars * _TOKEN_HARD_MAX_FACTOR
+        for k in range(upper + 1, min(len(text), hard_max + 1)):
+            if not _joins(text, k):
+                return k
+        if len(text) >= hard_max:
+            return hard_max
+        return len(text) if final else None
+
+    def _safe_prefix_cut(self) -> Optional[int]:
+        within = [off for off, _ in self._boundaries if off <= self._max_chars()]
+        if within:
+            return within[-1]
+        text = self._text()
+        end = min(self._len, self._max_chars())
+        # 結尾是英數字時可能還沒收完（單字/數字的後半在下一個 delta），往前找；
+        # 英數字後接 . , : 也不切（可能是 3.5、1,000）
+        if self._ambiguous_at is not None:
+            end = min(end, self._ambiguous_at)
+        elif end == self._len and _is_word_char(text[end - 1]):
+            end -= 1
+        for k in range(end, 0, -1):
+            if k == self._len or not _joins(text, k):
+                return k
+        return None
+
+    def _text(self) -> str:
+        if len(self._parts) > 1:
+            self._parts = ["".join(self._parts)]
+        return self._parts[0] if self._parts else ""
+
+    def _take(self, cut: int) -> Dict[str, Any]:
+        text = self._text()
+        head, rest = text[:cut], text[cut:]
+        start = self._start
+        self._parts = [rest] if rest else []
+        self._len -= cut
+        self._start += cut
+        self._boundaries = [(off - cut, strong) for off, strong in self._boundaries if off > cut]
+        if self._ambiguous_at is not None:
+            self._ambiguous_at = self._ambiguous_at - cut if self._ambiguous_at >= cut else None
+        self.segments_emitted += 1
+        return {"start": start, "end": start + cut - 1, "text": head}
@@ -5,12 +5,16 @@ import base64
 import datetime as dt
 import json
 import os
+import sys
 import time
-from collections import deque
-from typing import Any, Deque, Dict, Optional, Tuple
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence
 
 from aiohttp import WSMsgType, web
 
+from .audio_cache import CachedTtsEngine, PcmCache, cache_from_env
+from .audio_codec import is_supported_format
+from .histogram import Histogram, LogBuckets, _fmt_prom_line, render_histogram
 from .protocol import (
     CancelMessage,
     ResumeMessage,
@@ -18,50 +22,23 @@ from .protocol import (
     TextDeltaMessage,
     TextEndMessage,
 )
-from .session import SessionManager
+from .resample import resampler_name
+from .segmenter import SegmenterConfig
+from .session import RTF_BUCKETS, SYNTH_MS_BUCKETS, CachedChunk, SessionManager, SessionState
 from .tts_engines.base import AudioSpec
 from .tts_engines.dummy import DummyTtsEngine
 from .tts_engines.piper import PiperTtsEngine
 from .tts_engines.riva import RivaTtsEngine
+from .workers import PEER_HEADER, PeerRelay, PeerStream, WorkerTopology, run_workers
 
 
 def json_dumps(obj: Any) -> str:
     return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
 
 
-async def send_json(ws: web.WebSocketResponse, payload: Dict[str, Any]) -> None:
-    await ws.send_str(json_dumps(payload))
-
-
-def _prom_escape_label_value(value: str) -> str:
-    # Prometheus exposition format string escaping (minimal set we need).
-    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
-
-
-def _fmt_prom_line(name: str, value: float, labels: Optional[Dict[str, str]] = None) -> str:
-    if labels:
-        labels_str = ",".join(f'{k}="{_prom_escape_label_value(str(v))}"' for k, v in sorted(labels.items()))
-        return f"{name}{{{labels_str}}} {value}"
-    return f"{name} {value}"
-
-
-def _percentiles(values: Deque[float]) -> Tuple[float, float, float]:
-    if not values:
-        return 0.0, 0.0, 0.0
-    xs = sorted(values)
-
-    def pick(p: float) -> float:
-        if p <= 0:
-            return xs[0]
-        if p >= 100:
-            return xs[-1]
-        idx = (len(xs) - 1) * (p / 100.0)
-        lo = int(idx)
-        hi = min(lo + 1, len(xs) - 1)
-        frac = idx - lo
-        return xs[lo] * (1 - frac) + xs[hi] * frac
-
-    return pick(50), pick(95), pick(99)
+TTFA_MS_BUCKETS = LogBuckets(1.0, 60000.0)
+SEND_WAIT_MS_BUCKETS = LogBuckets(0.01, 10000.0)
+MESSAGE_BYTES_BUCKETS = LogBuckets(16.0, 16 * 1024 * 1024, per_decade=5)
 
 
 class Metrics:
@@ -70,8 +47,13 @@ class Metrics:
         self.sessions_total = 0
         self.backpressure_total = 0
         self.errors_total_by_code: Dict[str, int] = {}
-        self._ttfa_ms: Deque[float] = deque(maxlen=5000)
+        self.ttfa_ms = Histogram(TTFA_MS_BUCKETS)
+        # 以下兩者每則訊息記錄一次，只在 event loop 上更新，不取 lock
+        self.send_wait_ms = Histogram(SEND_WAIT_MS_BUCKETS)
+        self.message_bytes = Histogram(MESSAGE_BYTES_BUCKETS)
         self._lock = asyncio.Lock()
+        self.audio_cache: Optional[PcmCache] = None
+        self.sessions: Optional[SessionManager] = None
 
     async def inc_active(self, delta: int) -> None:
         async with self._lock:
@@ -89,47 +71,149 @@ class Metrics:
 
     async def observe_ttfa_ms(self, ttfa_ms: float) -> None:
         async with self._lock:
-            self._ttfa_ms.append(float(ttfa_ms))
+            self.ttfa_ms.observe(float(ttfa_ms))
 
-    async def render_prometheus(self) -> str:
+    async def snapshot(self) -> Dict[str, Any]:
+        """此行程的 metrics 狀態（JSON 可序列化）；多 worker 時由 merge_snapshots 合併。"""
         async with self._lock:
-            active = self.active_connections
-            sessions_total = self.sessions_total
-            backpressure_total = self.backpressure_total
-            errors_by_code = dict(self.errors_total_by_code)
-            ttfa_values = deque(self._ttfa_ms)
-
-        p50, p95, p99 = _percentiles(ttfa_values)
-        ttfa_sum = float(sum(ttfa_values)) if ttfa_values else 0.0
-        ttfa_count = float(len(ttfa_values))
-
-        lines = []
-        lines.append("# HELP ws_gateway_active_connections Active WebSocket connections.")
-        lines.append("# TYPE ws_gateway_active_connections gauge")
-        lines.append(_fmt_prom_line("ws_gateway_active_connections", float(active)))
-
-        lines.append("# HELP ws_gateway_sessions_total Total sessions started (start messages accepted).")
-        lines.append("# TYPE ws_gateway_sessions_total counter")
-        lines.append(_fmt_prom_line("ws_gateway_sessions_total", float(sessions_total)))
-
-        lines.append("# HELP ws_gateway_errors_total Total errors by code.")
-        lines.append("# TYPE ws_gateway_errors_total counter")
-        for code, count in sorted(errors_by_code.items()):
-            lines.append(_fmt_prom_line("ws_gateway_errors_total", float(count), {"code": code}))
-
-        lines.append("# HELP ws_gateway_backpressure_total Total backpressure errors.")
-        lines.append("# TYPE ws_gateway_backpressure_total counter")
-        lines.append(_fmt_prom_line("ws_gateway_backpressure_total", float(backpressure_total)))
+            snap: Dict[str, Any] = {
+                "workers": 1,
+                "active_connections": self.active_connections,
+                "sessions_total": self.sessions_total,
+                "backpressure_total": self.backpressure_total,
+                "errors_total_by_code": dict(self.errors_total_by_code),
+                "ttfa_ms": self.ttfa_ms.snapshot(),
+                "send_wait_ms": self.send_wait_ms.snapshot(),
+                "message_bytes": self.message_bytes.snapshot(),
+            }
+        if self.sessions is not None:
+            snap["sessions"] = {
+                "resume_cache_bytes": self.sessions.resume_cache_bytes_total(),
+                "underruns_total": self.sessions.underruns_total,
+                "underrun_seconds_total": self.sessions.underrun_seconds_total,
+                "synth_ms": self.sessions.synth_ms.snapshot(),
+                "rtf": self.sessions.rtf.snapshot(),
+            }
+        if self.audio_cache is not None:
+            snap["audio_cache"] = self.audio_cache.stats()
+        return snap
+
+    async def render_prometheus(self, peer_snapshots: Sequence[Dict[str, Any]] = ()) -> str:
+        return render_prometheus(merge_snapshots([await self.snapshot(), *peer_snapshots]))
+
+
+def merge_snapshots(snapshots: Sequence[Dict[str, Any]]) -> Dict[str, Any]:
+    """數值相加、list 逐項相加（histogram bucket）、dict 逐欄合併；各 worker 的 counter/gauge/histogram 皆可直接相加。"""
+    merged: Dict[str, Any] = {}
+    for snap in snapshots:
+        for key, value in snap.items():
+            prev = merged.get(key)
+            if prev is None:
+                merged[key] = value
+            elif isinstance(value, dict):
+                merged[key] = merge_snapshots([prev, value])
+            elif isinstance(value, list):
+                merged[key] = [a + b for a, b in zip(prev, value)]
+            elif isinstance(value, (int, float)):
+                merged[key] = prev + value
+    return merged
+
+
+def render_prometheus(snap: Dict[str, Any]) -> str:
+    active = snap["active_connections"]
+    sessions_total = snap["sessions_total"]
+    backpressure_total = snap["backpressure_total"]
+    errors_by_code = snap["errors_total_by_code"]
+
+    lines = []
+    lines.append("# HELP ws_gateway_active_connections Active WebSocket connections.")
+    lines.append("# TYPE ws_gateway_active_connections gauge")
+    lines.append(_fmt_prom_line("ws_gateway_active_connections", float(active)))
+
+    lines.append("# HELP ws_gateway_sessions_total Total sessions started (start messages accepted).")
+    lines.append("# TYPE ws_gateway_sessions_total counter")
+    lines.append(_fmt_prom_line("ws_gateway_sessions_total", float(sessions_total)))
+
+    lines.append("# HELP ws_gateway_errors_total Total errors by code.")
+    lines.append("# TYPE ws_gateway_errors_total counter")
+    for code, count in sorted(errors_by_code.items()):
+        lines.append(_fmt_prom_line("ws_gateway_errors_total", float(count), {"code": code}))
+
+    lines.append("# HELP ws_gateway_backpressure_total Total backpressure errors.")
+    lines.append("# TYPE ws_gateway_backpressure_total counter")
+    lines.append(_fmt_prom_line("ws_gateway_backpressure_total", float(backpressure_total)))
+
+    lines.extend(render_histogram("ws_gateway_ttfa_ms", "Time-to-first-audio in milliseconds.", TTFA_MS_BUCKETS, snap.get("ttfa_ms")))
+    lines.extend(
+        render_histogram(
+            "ws_gateway_send_queue_wait_ms",
+            "Time audio chunks wait in the per-session send queue before being written, in milliseconds.",
+            SEND_WAIT_MS_BUCKETS,
+            snap.get("send_wait_ms"),
+        )
+    )
+    lines.extend(
+        render_histogram(
+            "ws_gateway_message_bytes",
+            "Size of WebSocket messages sent to clients (text frames counted in characters).",
+            MESSAGE_BYTES_BUCKETS,
+            snap.get("message_bytes"),
+        )
+    )
 
-        lines.append("# HELP ws_gateway_ttfa_ms Time-to-first-audio in milliseconds (summary over recent samples).")
-        lines.append("# TYPE ws_gateway_ttfa_ms summary")
-        lines.append(_fmt_prom_line("ws_gateway_ttfa_ms", p50, {"quantile": "0.5"}))
-        lines.append(_fmt_prom_line("ws_gateway_ttfa_ms", p95, {"quantile": "0.95"}))
-        lines.append(_fmt_prom_line("ws_gateway_ttfa_ms", p99, {"quantile": "0.99"}))
-        lines.append(_fmt_prom_line("ws_gateway_ttfa_ms_sum", ttfa_sum))
-        lines.append(_fmt_prom_line("ws_gateway_ttfa_ms_count", ttfa_count))
+    lines.append("# HELP ws_gateway_workers Worker processes included in these metrics.")
+    lines.append("# TYPE ws_gateway_workers gauge")
+    lines.append(_fmt_prom_line("ws_gateway_workers", float(snap.get("workers", 1))))
+
+    sessions = snap.get("sessions")
+    if sessions is not None:
+        lines.append("# HELP ws_gateway_resume_cache_bytes PCM bytes held in per-session resume caches.")
+        lines.append("# TYPE ws_gateway_resume_cache_bytes gauge")
+        lines.append(_fmt_prom_line("ws_gateway_resume_cache_bytes", float(sessions["resume_cache_bytes"])))
+        lines.append("# HELP ws_gateway_tts_underruns_total Audio chunks queued after the previous audio would have finished playing.")
+        lines.append("# TYPE ws_gateway_tts_underruns_total counter")
+        lines.append(_fmt_prom_line("ws_gateway_tts_underruns_total", float(sessions["underruns_total"])))
+        lines.append("# HELP ws_gateway_tts_underrun_seconds_total Total playback gap caused by underruns (simulated real-time playback).")
+        lines.append("# TYPE ws_gateway_tts_underrun_seconds_total counter")
+        lines.append(_fmt_prom_line("ws_gateway_tts_underrun_seconds_total", float(sessions["underrun_seconds_total"])))
+        lines.extend(
+            render_histogram(
+                "ws_gateway_tts_synth_ms",
+                "Engine synthesis latency per segment in milliseconds.",
+                SYNTH_MS_BUCKETS,
+                sessions.get("synth_ms"),
+            )
+        )
+        lines.extend(
+            render_histogram(
+                "ws_gateway_tts_rtf",
+                "Engine real-time factor per segment (synthesis time / audio duration).",
+                RTF_BUCKETS,
+                sessions.get("rtf"),
+            )
+        )
 
-        return "\n".join(lines) + "\n"
+    cache = snap.get("audio_cache")
+    if cache is not None:
+        lookups = cache["hits"] + cache["misses"]
+        lines.append("# HELP ws_gateway_audio_cache_hits_total Synthesized-audio cache hits (engine skipped).")
+        lines.append("# TYPE ws_gateway_audio_cache_hits_total counter")
+        lines.append(_fmt_prom_line("ws_gateway_audio_cache_hits_total", float(cache["hits"])))
+        lines.append("# HELP ws_gateway_audio_cache_misses_total Synthesized-audio cache misses.")
+        lines.append("# TYPE ws_gateway_audio_cache_misses_total counter")
+        lines.append(_fmt_prom_line("ws_gateway_audio_cache_misses_total", float(cache["misses"])))
+        lines.append("# HELP ws_gateway_audio_cache_hit_ratio Cache hit ratio since start.")
+        lines.append("# TYPE ws_gateway_audio_cache_hit_ratio gauge")
+        lines.append(_fmt_prom_line("ws_gateway_audio_cache_hit_ratio", cache["hits"] / lookups if lookups else 0.0))
+        lines.append("# HELP ws_gateway_audio_cache_entries Entries in the in-memory audio cache.")
+        lines.append("# TYPE ws_gateway_audio_cache_entries gauge")
+        lines.append(_fmt_prom_line("ws_gateway_audio_cache_entries", float(cache["entries"])))
+        lines.append("# HELP ws_gateway_audio_cache_bytes Bytes held by the audio cache.")
+        lines.append("# TYPE ws_gateway_audio_cache_bytes gauge")
+        lines.append(_fmt_prom_line("ws_gateway_audio_cache_bytes", float(cache["bytes"]), {"tier": "memory"}))
+        lines.append(_fmt_prom_line("ws_gateway_audio_cache_bytes", float(cache["disk_bytes"]), {"tier": "disk"}))
+
+    return "\n".join(lines) + "\n"
 
 
 def build_wav_header(*, sample_rate: int, channels: int) -> bytes:
@@ -181,15 +265,54 @@ def build_engine() -> Any:
     raise ValueError(f"未知 WS_TTS_ENGINE: {engine_name}")
 
 
+@dataclass
+class _StreamBinding:
+    """一條 WS 連線上某個 session 的轉送狀態。"""
+
+    state: SessionState
+    start_monotonic_s: float
+    sender_task: Optional[asyncio.Task[None]] = None
+    ttfa_recorded: bool = False
+    binary_audio: bool = False  # start 時協商：audio_chunk 以 binary frame 送出
+
+
 class GatewayApp:
-    def __init__(self) -> None:
+    def __init__(self, *, worker: Optional[WorkerTopology] = None) -> None:
         self.started_at_utc = dt.datetime.now(dt.timezone.utc)
+        # 多 worker 模式：不屬於本 worker 的 session 轉給 owner（resume 才找得到快取）
+        self.worker = worker
+        self.peers = PeerRelay(worker) if worker is not None and worker.count > 1 else None
         self.engine_name, self.engine = build_engine()
-        self.sessions = SessionManager(self.engine)
+        self.audio_cache = cache_from_env()
+        synth_engine: Any = self.engine
+        if self.audio_cache is not None:
+            voice = getattr(self.engine, "voice_id", "")
+            synth_engine = CachedTtsEngine(self.engine, self.audio_cache, engine_name=self.engine_name, voice=voice)
+        self.sessions = SessionManager(
+            synth_engine,
+            synth_lookahead=int(os.getenv("WS_TTS_SYNTH_LOOKAHEAD", "2")),
+            resume_cache_bytes=int(float(os.getenv("WS_TTS_RESUME_CACHE_MB", "8")) * 1024 * 1024),
+            segmenter_config=SegmenterConfig(
+                first_min_chars=int(os.getenv("WS_TTS_SEGMENT_FIRST_MIN_CHARS", "4")),
+                first_max_chars=int(os.getenv("WS_TTS_SEGMENT_FIRST_MAX_CHARS", "16")),
+                min_chars=int(os.getenv("WS_TTS_SEGMENT_MIN_CHARS", "12")),
+                max_chars=int(os.getenv("WS_TTS_SEGMENT_MAX_CHARS", "64")),
+            ),
+            first_chunk_wait_s=float(os.getenv("WS_TTS_FIRST_CHUNK_WAIT_MS", "120")) / 1000.0,
+            encode_threads=int(os.getenv("WS_TTS_ENCODE_THREADS", "2")),
+        )
         self._cleanup_task: Optional[asyncio.Task[None]] = None
         self.metrics = Metrics()
+        self.metrics.audio_cache = self.audio_cache
+        self.metrics.sessions = self.sessions
 
     async def on_startup(self, app: web.Application) -> None:
+        if resampler_name() != "polyphase":
+            print(
+                f"[ws_gateway_tts] warning: NumPy 未安裝，取樣率轉換使用 {resampler_name()}（低品質，無 anti-alias）",
+                file=sys.stderr,
+                flush=True,
+            )
         self._cleanup_task = asyncio.create_task(self.sessions.cleanup_loop())
 
     async def on_cleanup(self, app: web.Application) -> None:
@@ -197,8 +320,14 @@ class GatewayApp:
             self._cleanup_task.cancel()
             try:
                 await self._cleanup_task
-            except Exception:
+            except (asyncio.CancelledError, Exception):
                 pass
+        aclose = getattr(self.engine, "aclose", None)
+        if aclose is not None:
+            await aclose()
+        self.sessions.encode_pool.shutdown()
+        if self.peers is not None:
+            await self.peers.close()
 
     async def healthz(self, request: web.Request) -> web.Response:
         now = dt.datetime.now(dt.timezone.utc)
@@ -206,6 +335,9 @@ class GatewayApp:
         from .piper_bootstrap import get_piper_health_fields
 
         piper_fields = get_piper_health_fields()
+        engine_health = getattr(self.engine, "health_fields", None)
+        if engine_health is not None:
+            piper_fields.update(engine_health())
         return web.json_response(
             {
                 "status": "ok",
@@ -214,40 +346,80 @@ class GatewayApp:
                 "version": os.getenv("WS_TTS_VERSION", "dev"),
                 "started_at": self.started_at_utc.isoformat(),
                 "uptime_s": uptime_s,
+                "resampler": resampler_name(),
+                **({"worker": self.worker.index, "workers": self.worker.count} if self.worker is not None else {}),
                 **piper_fields,
             }
         )
 
     async def metrics_endpoint(self, request: web.Request) -> web.Response:
-        payload = await self.metrics.render_prometheus()
+        # 多 worker 模式下由收到請求的 worker 收集其他 worker 的 snapshot 後合併輸出
+        peer_snapshots = await self.peers.snapshots() if self.peers is not None else []
+        payload = await self.metrics.render_prometheus(peer_snapshots)
         return web.Response(text=payload, content_type="text/plain; version=0.0.4")
 
+    async def metrics_snapshot(self, request: web.Request) -> web.Response:
+        return web.json_response(await self.metrics.snapshot())
+
     async def ws_tts(self, request: web.Request) -> web.WebSocketResponse:
+        return await self._serve_ws(request, mux=False)
+
+    async def ws_tts_mux(self, request: web.Request) -> web.WebSocketResponse:
+        # 多工模式：單一連線承載多個 session（以 session_id 分流），session 結束不關閉連線。
+        return await self._serve_ws(request, mux=True)
+
+    async def _serve_ws(self, request: web.Request, *, mux: bool) -> web.WebSocketResponse:
         ws = web.WebSocketResponse(heartbeat=30)
         await ws.prepare(request)
 
         send_lock = asyncio.Lock()
-        state = None
-        sender_task: Optional[asyncio.Task[None]] = None
-        start_monotonic_s: Optional[float] = None
-        ttfa_recorded = False
+        bindings: Dict[str, _StreamBinding] = {}
+        current: Optional[_StreamBinding] = None  # 非多工模式下唯一的 session
+        # 轉給其他 worker 的 session（多 worker 模式）；非多工模式下最多一個，且與 current 互斥
+        relays: Dict[str, PeerStream] = {}
+        relay_tasks: List[asyncio.Task[None]] = []
+        peer = request.headers.get(PEER_HEADER) == "1"
 
-        await self.metrics.inc_active(+1)
+        if not peer:
+            await self.metrics.inc_active(+1)
 
         async def send_json_locked(payload: Dict[str, Any]) -> None:
+            data = json_dumps(payload)
+            self.metrics.message_bytes.observe(len(data))
             async with send_lock:
-                await send_json(ws, payload)
-
-        async def sender_loop() -> None:
-            assert state is not None
+                await ws.send_str(data)
+
+        async def send_chunk_locked(binding: _StreamBinding, chunk: CachedChunk, seq: int) -> None:
+            session_id = binding.state.session_id
+            if binding.binary_audio:
+                frame = chunk.to_binary_frame(session_id=session_id, seq=seq)
+                self.metrics.message_bytes.observe(len(frame))
+                async with send_lock:
+                    await ws.send_bytes(frame)
+            else:
+                await send_json_locked(chunk.to_ws_message(session_id=session_id, seq=seq))
+
+        def release(binding: _StreamBinding) -> None:
+            if bindings.get(binding.state.session_id) is binding:
+                del bindings[binding.state.session_id]
+
+        async def sender_loop(binding: _StreamBinding) -> None:
+            state = binding.state
             while not ws.closed:
                 msg = await state.send_queue.get()
+                if isinstance(msg, CachedChunk):
+                    try:
+                        if not binding.ttfa_recorded:
+                            binding.ttfa_recorded = True
+                            ttfa_ms = (time.monotonic() - binding.start_monotonic_s) * 1000.0
+                            await self.metrics.observe_ttfa_ms(ttfa_ms)
+                        self.metrics.send_wait_ms.observe((time.monotonic() - msg.created_s) * 1000.0)
+                        await send_chunk_locked(binding, msg, msg.seq)
+                    except Exception:
+                        await ws.close()
+                        break
+                    continue
                 try:
-                    nonlocal ttfa_recorded
-                    if not ttfa_recorded and msg.get("type") == "audio_chunk" and start_monotonic_s is not None:
-                        ttfa_recorded = True
-                        ttfa_ms = (time.monotonic() - start_monotonic_s) * 1000.0
-                        await self.metrics.observe_ttfa_ms(ttfa_ms)
                     if msg.get("type") == "error":
                         code = msg.get("code")
                         if isinstance(code, str) and code:
@@ -257,15 +429,59 @@ class GatewayApp:
                     await ws.close()
                     break
                 if msg.get("type") in ("tts_end", "error"):
+                    if mux:
+                        release(binding)
+                    else:
+                        await ws.close()
+                    break
+
+        async def relay_loop(stream: PeerStream) -> None:
+            # owner worker 的回應原樣轉給 client（JSON 或 binary frame）
+            while not ws.closed:
+                data = await stream.queue.get()
+                if data is None:
+                    if relays.get(stream.session_id) is stream:
+                        del relays[stream.session_id]
+                    if stream.link.closed and not stream.ended:
+                        await fail("internal_error", "session 所在的 worker 連線中斷", session_id=stream.session_id, close=not mux)
+                    elif not mux:
+                        await ws.close()
+                    break
+                try:
+                    async with send_lock:
+                        if isinstance(data, bytes):
+                            await ws.send_bytes(data)
+                        else:
+                            await ws.send_str(data)
+                except Exception:
                     await ws.close()
                     break
+                if stream.ended and stream.queue.empty():
+                    if relays.get(stream.session_id) is stream:
+                        del relays[stream.session_id]
+                    if not mux:
+                        await ws.close()
+                    break
 
-        async def fail(code: str, message: str, *, seq: Optional[int] = None) -> None:
-            nonlocal state
+        async def close_relays() -> None:
+            for stream in list(relays.values()):
+                await stream.close()
+            relays.clear()
+
+        async def fail(
+            code: str,
+            message: str,
+            *,
+            session_id: Optional[str] = None,
+            seq: Optional[int] = None,
+            close: bool = True,
+        ) -> None:
             await self.metrics.inc_error(code)
+            # 非多工連線只有一個 session：未指定時帶上目前 session 的 id/seq，client 才能對應錯誤
+            state = current.state if not mux and current is not None else None
             payload = {
                 "type": "error",
-                "session_id": state.session_id if state else "",
+                "session_id": session_id if session_id is not None else (state.session_id if state else ""),
                 "seq": seq if seq is not None else (state.seq if state else 0),
                 "code": code,
                 "message": message,
@@ -273,7 +489,8 @@ class GatewayApp:
             try:
                 await send_json_locked(payload)
             finally:
-                await ws.close()
+                if close:
+                    await ws.close()
 
         try:
             async for msg in ws:
@@ -293,98 +510,184 @@ class GatewayApp:
                     await fail("bad_request", "缺少 type 欄位")
                     break
 
-                if msg_type == "start":
-                    start = StartMessage.parse(obj)
-                    audio_spec = AudioSpec(
-                        audio_format=start.audio_format,
-                        sample_rate=start.sample_rate,
-                        channels=start.channels,
-                    )
-                    state = await self.sessions.get_or_create(start.session_id, audio_spec)
-                    state.touch()
-                    start_monotonic_s = time.monotonic()
-                    await self.metrics.inc_sessions()
-
-                    if sender_task is None or sender_task.done():
-                        sender_task = asyncio.create_task(sender_loop())
-
-                    start_ack: Dict[str, Any] = {
-                        "type": "start_ack",
-                        "session_id": state.session_id,
-                        "audio_format": state.audio_spec.audio_format,
-                        "sample_rate": state.audio_spec.sample_rate,
-                        "channels": state.audio_spec.channels,
-                        "ttl_s": state.ttl_s,
-                    }
-                    # 若 client 指定 pcm16_wav：audio_chunk 仍傳 raw PCM16，並提供 wav header 方便 client 組檔/播放。
-                    if state.audio_spec.audio_format == "pcm16_wav":
-                        hdr = build_wav_header(
-                            sample_rate=state.audio_spec.sample_rate,
-                            channels=state.audio_spec.channels,
-                        )
-                        start_ack["wav_header_base64"] = base64.b64encode(hdr).decode("ascii")
-
-                    await send_json_locked(start_ack)
-                    continue
-
-                if state is None:
-                    await fail("bad_request", "請先送 start")
-                    break
-
-                state.touch()
+                if self.peers is not None and self.worker is not None:
+                    session_id = obj.get("session_id")
+                    owned = not isinstance(session_id, str) or self.worker.owner_of(session_id) == self.worker.index
+                    if msg_type == "start" and not owned:
+                        if not mux:
+                            if current is not None and current.sender_task is not None:
+                                current.sender_task.cancel()
+                                release(current)
+                            current = None
+                            if session_id not in relays:
+                                await close_relays()
+                        stream = relays.get(session_id)
+                        if stream is None:
+                            try:
+                                stream = await self.peers.open(session_id)
+                            except Exception as e:
+                                await fail("internal_error", f"無法連線到 session 所在的 worker: {e}", session_id=session_id, close=not mux)
+                                if mux:
+                                    continue
+                                break
+                            relays[session_id] = stream
+                            relay_tasks.append(asyncio.create_task(relay_loop(stream)))
+                        await stream.send(msg.data)
+                        continue
+                    if msg_type == "start" and not mux:
+                        await close_relays()
+                    stream = relays.get(session_id) if mux else next(iter(relays.values()), None)
+                    if stream is not None and msg_type != "start":
+                        await stream.send(msg.data)
+                        if msg_type == "detach":
+                            await stream.close()
+                            relays.pop(stream.session_id, None)
+                        continue
 
-                if msg_type == "text_delta":
-                    delta = TextDeltaMessage.parse(obj)
-                    if delta.session_id != state.session_id:
-                        await fail("bad_request", "session_id 不一致", seq=delta.seq)
-                        break
-                    state.seq = delta.seq
-                    state.enqueue_text_units(delta.text)
-                    await self.sessions.start_synth_loop_if_needed(state)
-                    continue
-
-                if msg_type == "text_end":
-                    end = TextEndMessage.parse(obj)
-                    if end.session_id != state.session_id:
-                        await fail("bad_request", "session_id 不一致", seq=end.seq)
-                        break
-                    state.seq = end.seq
-                    state.finished = True
-                    await self.sessions.start_synth_loop_if_needed(state)
-                    # tts_end 會由 synth loop 放入 send_queue，sender_loop 送出後自動關閉連線。
-                    continue
+                try:
+                    if msg_type == "start":
+                        start = StartMessage.parse(obj)
+                        if not is_supported_format(start.audio_format):
+                            raise ValueError(f"不支援的 audio_format: {start.audio_format}")
+                        audio_spec = AudioSpec(
+                            audio_format=start.audio_format,
+                            sample_rate=start.sample_rate,
+                            channels=start.channels,
+                        )
+                        state = await self.sessions.get_or_create(start.session_id, audio_spec)
+                        state.touch()
+                        await self.metrics.inc_sessions()
+
+                        binding = bindings.get(state.session_id)
+                        if binding is None:
+                            if not mux and current is not None and current.sender_task is not None:
+                                current.sender_task.cancel()
+                                release(current)
+                            binding = _StreamBinding(state=state, start_monotonic_s=time.monotonic())
+                            bindings[state.session_id] = binding
+                        else:
+                            binding.start_monotonic_s = time.monotonic()
+                            binding.ttfa_recorded = False
+                        binding.binary_audio = start.binary_audio
+                        current = binding
+
+                        if binding.sender_task is None or binding.sender_task.done():
+                            binding.sender_task = asyncio.create_task(sender_loop(binding))
+
+                        start_ack: Dict[str, Any] = {
+                            "type": "start_ack",
+                            "session_id": state.session_id,
+                            "audio_format": state.audio_spec.audio_format,
+                            "sample_rate": state.audio_spec.sample_rate,
+                            "channels": state.audio_spec.channels,
+                            "ttl_s": state.ttl_s,
+                            "binary_audio": binding.binary_audio,
+                        }
+                        # 若 client 指定 pcm16_wav：audio_chunk 仍傳 raw PCM16，並提供 wav header 方便 client 組檔/播放。
+                        if state.audio_spec.audio_format == "pcm16_wav":
+                            hdr = build_wav_header(
+                                sample_rate=state.audio_spec.sample_rate,
+                                channels=state.audio_spec.channels,
+                            )
+                            start_ack["wav_header_base64"] = base64.b64encode(hdr).decode("ascii")
+
+                        await send_json_locked(start_ack)
+                        continue
+
+                    if mux:
+                        session_id = obj.get("session_id")
+                        binding = bindings.get(session_id) if isinstance(session_id, str) else None
+                        if binding is None and msg_type == "detach":
+                            continue  # session 已結束（tts_end/error 與 detach 交錯）
+                        if binding is None:
+                            seq = obj.get("seq")
+                            await fail(
+                                "bad_request",
+                                "請先送 start",
+                                session_id=session_id if isinstance(session_id, str) else "",
+                                seq=seq if isinstance(seq, int) else 0,
+                                close=False,
+                            )
+                            continue
+                    else:
+                        binding = current
+                        if binding is None:
+                            await fail("bad_request", "請先送 start")
+                            break
 
-                if msg_type == "cancel":
-                    cancel = CancelMessage.parse(obj)
-                    state.seq = cancel.seq
-                    await self.sessions.cancel(state)
-                    await state.send_queue.put(
-                        {"type": "tts_end", "session_id": state.session_id, "seq": state.seq, "cancelled": True}
-                    )
-                    continue
+                    state = binding.state
+                    state.touch()
 
-                if msg_type == "resume":
-                    resume = ResumeMessage.parse(obj)
-                    if resume.session_id != state.session_id:
-                        await fail("bad_request", "session_id 不一致")
-                        break
-                    last = resume.last_unit_index_received
-                    resent = 0
-                    for chunk in state.cache:
-                        if chunk.unit_index_end <= last:
-                            continue
-                        await send_json_locked(chunk.to_ws_message(session_id=state.session_id, seq=state.seq))
-                        resent += 1
-                    if resent == 0:
-                        await send_json_locked(
-                            {
-                                "type": "error",
-                                "session_id": state.session_id,
-                                "seq": state.seq,
-                                "code": "resume_not_available",
-                                "message": "快取窗外或無可續傳內容，請重新開始",
-                            },
+                    if msg_type == "text_delta":
+                        delta = TextDeltaMessage.parse(obj)
+                        if delta.session_id != state.session_id:
+                            await fail("bad_request", "session_id 不一致", session_id=state.session_id, seq=delta.seq)
+                            break
+                        state.seq = delta.seq
+                        state.enqueue_text_units(delta.text)
+                        await self.sessions.start_synth_loop_if_needed(state)
+                        continue
+
+                    if msg_type == "text_end":
+                        end = TextEndMessage.parse(obj)
+                        if end.session_id != state.session_id:
+                            await fail("bad_request", "session_id 不一致", session_id=state.session_id, seq=end.seq)
+                            break
+                        state.seq = end.seq
+                        state.mark_finished()
+                        await self.sessions.start_synth_loop_if_needed(state)
+                        # tts_end 會由 synth loop 放入 send_queue，sender_loop 送出後結束此 session（非多工模式會關閉連線）。
+                        continue
+
+                    if msg_type == "cancel":
+                        cancel = CancelMessage.parse(obj)
+                        state.seq = cancel.seq
+                        await self.sessions.cancel(state)
+                        await state.send_queue.put(
+                            {"type": "tts_end", "session_id": state.session_id, "seq": state.seq, "cancelled": True}
                         )
+                        continue
+
+                    if msg_type == "resume":
+                        resume = ResumeMessage.parse(obj)
+                        if resume.session_id != state.session_id:
+                            await fail("bad_request", "session_id 不一致", session_id=state.session_id, seq=state.seq)
+                            break
+                        last = resume.last_unit_index_received
+                        resent = 0
+                        state.cache.evict()
+                        for chunk in state.cache.after_unit(last):
+                            await send_chunk_locked(binding, chunk, state.seq)
+                            resent += 1
+                        if resent == 0:
+                            await send_json_locked(
+                                {
+                                    "type": "error",
+                                    "session_id": state.session_id,
+                                    "seq": state.seq,
+                                    "code": "resume_not_available",
+                                    "message": "快取窗外或無可續傳內容，請重新開始",
+                                },
+                            )
+                        continue
+
+                    if mux and msg_type == "detach":
+                        # 等同單一連線斷線：停止轉送此 session，合成與快取保留（可 resume）。
+                        release(binding)
+                        if binding.sender_task is not None:
+                            binding.sender_task.cancel()
+                        continue
+                except ValueError as e:
+                    if not mux:
+                        raise
+                    # 多工模式下欄位錯誤只影響該 session，不中斷其他 session。
+                    session_id = obj.get("session_id")
+                    await fail(
+                        "bad_request",
+                        str(e),
+                        session_id=session_id if isinstance(session_id, str) else "",
+                        close=False,
+                    )
                     continue
 
                 await fail("bad_request", f"未知 type: {msg_type}")
@@ -395,32 +698,45 @@ class GatewayApp:
             except Exception:
                 pass
         finally:
-            if sender_task:
-                sender_task.cancel()
-                try:
-                    await sender_task
-                except Exception:
-                    pass
-            await self.metrics.inc_active(-1)
+            for binding in list(bindings.values()):
+                if binding.sender_task:
+                    binding.sender_task.cancel()
+                    try:
+                        await binding.sender_task
+                    except (asyncio.CancelledError, Exception):
+                        pass
+            await close_relays()
+            for task in relay_tasks:
+                task.cancel()
+            if relay_tasks:
+                await asyncio.gather(*relay_tasks, return_exceptions=True)
+            if not peer:
+                await self.metrics.inc_active(-1)
             await ws.close()
 
         return ws
 
 
-def create_app() -> web.Application:
-    gateway = GatewayApp()
+def create_app(*, worker: Optional[WorkerTopology] = None) -> web.Application:
+    gateway = GatewayApp(worker=worker)
     app = web.Application()
     app.on_startup.append(gateway.on_startup)
     app.on_cleanup.append(gateway.on_cleanup)
     app.router.add_get("/healthz", gateway.healthz)
     app.router.add_get("/metrics", gateway.metrics_endpoint)
+    app.router.add_get("/metrics/snapshot", gateway.metrics_snapshot)
     app.router.add_get("/tts", gateway.ws_tts)
+    app.router.add_get("/tts/mux", gateway.ws_tts_mux)
     return app
 
 
 def main() -> None:
     host = os.getenv("WS_TTS_HOST", "0.0.0.0")
     port = int(os.getenv("WS_TTS_PORT", "9000"))
+    workers = int(os.getenv("WS_TTS_WORKERS", "1"))
+    if workers > 1:
+        run_workers(workers, host=host, port=port)
+        return
     app = create_app()
     web.run_app(app, host=host, port=port)
 
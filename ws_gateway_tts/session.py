@@ -2,20 +2,27 @@ from __future__ import annotations
 
 import asyncio
 import base64
+import bisect
+import functools
 import json
 import time
+from collections import deque
 from dataclasses import dataclass, field
-from typing import Any, Deque, Dict, List, Optional
+from typing import Any, Deque, Dict, Iterator, List, Optional, Union
 
-from .tts_engines.base import AudioSpec, TtsEngine
+from .audio_codec import AdpcmEncoder, AudioEncodePool, new_encoder
+from .protocol import encode_audio_frame
+from .chunk_policy import AdaptiveChunkPolicy
+from .histogram import Histogram, LogBuckets
+from .resample import PcmConverter
+from .segmenter import SegmenterConfig, TextSegmenter
+from .tts_engines.base import AudioSpec, TtsEngine, engine_output_spec, iter_pcm16
 
 
 def json_dumps(obj: Any) -> str:
     return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
 
 
-PUNCTUATION = set("，。！？；：,.!?;\n")
-
 
 @dataclass
 class CachedChunk:
@@ -28,6 +35,18 @@ class CachedChunk:
     sample_rate: int
     channels: int
     audio_bytes: bytes
+    seq: int = 0  # 產生此 chunk 時 session 的輸入 seq
+
+    def to_binary_frame(self, *, session_id: str, seq: int) -> bytes:
+        return encode_audio_frame(
+            session_id=session_id,
+            seq=seq,
+            chunk_seq=self.chunk_seq,
+            unit_index_start=self.unit_index_start,
+            unit_index_end=self.unit_index_end,
+            units_text=self.units_text,
+            audio=self.audio_bytes,
+        )
 
     def to_ws_message(self, *, session_id: str, seq: int) -> Dict[str, Any]:
         return {
@@ -45,13 +64,71 @@ class CachedChunk:
         }
 
 
+class ResumeCache:
+    """
+    resume 用的近期 chunk ring buffer，同時受 TTL 與 byte 上限約束。
+
+    chunk 依 chunk_seq 遞增加入；以 list + head 位移實作（淘汰攤銷 O(1)），
+    另存 unit_index_end 陣列供 bisect 查詢（O(log n)）。
+    """
+
+    def __init__(self, *, ttl_s: float, max_bytes: int) -> None:
+        self.ttl_s = ttl_s
+        self.max_bytes = max(0, max_bytes)
+        self.bytes = 0
+        self._chunks: List[CachedChunk] = []
+        self._unit_ends: List[int] = []
+        self._head = 0
+
+    def __len__(self) -> int:
+        return len(self._chunks) - self._head
+
+    def __iter__(self) -> Iterator[CachedChunk]:
+        return iter(self._chunks[self._head :])
+
+    def append(self, chunk: CachedChunk) -> None:
+        self._chunks.append(chunk)
+        self._unit_ends.append(chunk.unit_index_end)
+        self.bytes += len(chunk.audio_bytes)
+        self.evict()
+
+    def evict(self, now_s: Optional[float] = None) -> None:
+        cutoff = (time.monotonic() if now_s is None else now_s) - self.ttl_s
+        # 最新一個 chunk 一律保留（即使單獨超過 byte 上限）
+        while len(self) > 1:
+            oldest = self._chunks[self._head]
+            if oldest.created_s >= cutoff and self.bytes <= self.max_bytes:
+                break
+            self.bytes -= len(oldest.audio_bytes)
+            self._head += 1
+        if len(self) == 1 and self._chunks[self._head].created_s < cutoff:
+            self.bytes -= len(self._chunks[self._head].audio_bytes)
+            self._head += 1
+        if self._head and self._head * 2 >= len(self._chunks):
+            del self._chunks[: self._head]
+            del self._unit_ends[: self._head]
+            self._head = 0
+
+    def after_unit(self, last_unit_index: int) -> List[CachedChunk]:
+        """unit_index_end > last_unit_index 的 chunk（依序）。"""
+        i = bisect.bisect_right(self._unit_ends, last_unit_index, lo=self._head)
+        return self._chunks[i:]
+
+    def clear(self) -> None:
+        self._chunks, self._unit_ends, self._head, self.bytes = [], [], 0, 0
+
+
 @dataclass
 class SessionState:
     session_id: str
     audio_spec: AudioSpec
     ttl_s: float = 120.0
-    max_pending_units: int = 24
+    segmenter_config: SegmenterConfig = field(default_factory=SegmenterConfig)
+    first_chunk_wait_s: float = 0.12
     max_send_queue: int = 200
+    max_cache_bytes: int = 8 * 1024 * 1024
+    # 引擎實際輸出的格式（None = 與 audio_spec 相同）；不同時由 converter 轉成 client 的格式
+    engine_spec: Optional[AudioSpec] = None
 
     created_s: float = field(default_factory=lambda: time.monotonic())
     last_activity_s: float = field(default_factory=lambda: time.monotonic())
@@ -60,21 +137,40 @@ class SessionState:
     cancelled: bool = False
     finished: bool = False
 
-    next_unit_index: int = 0
-    _pending_units: List[str] = field(default_factory=list)
-    _pending_start_index: Optional[int] = None
+    segmenter: TextSegmenter = field(init=False)
+    policy: AdaptiveChunkPolicy = field(init=False)
 
     chunk_seq: int = 0
-    cache: List[CachedChunk] = field(default_factory=list)
+    cache: ResumeCache = field(init=False)
+    # 取樣率/聲道轉換與壓縮編碼（狀態都跨 chunk 延續）；不需要時為 None
+    converter: Optional[PcmConverter] = field(init=False)
+    encoder: Optional[AdpcmEncoder] = field(init=False)
 
-    send_queue: "asyncio.Queue[Dict[str, Any]]" = field(init=False)
+    # 控制訊息（dict）或 CachedChunk；音訊格式（JSON/binary）由送出端依協商決定
+    send_queue: "asyncio.Queue[Union[Dict[str, Any], CachedChunk]]" = field(init=False)
     cancel_event: asyncio.Event = field(default_factory=asyncio.Event)
+    # 有新文字或 text_end 時喚醒 synth loop（閒置 session 不輪詢）
+    input_event: asyncio.Event = field(default_factory=asyncio.Event)
     synth_task: Optional[asyncio.Task[None]] = None
     synth_done: asyncio.Event = field(default_factory=asyncio.Event)
 
     def __post_init__(self) -> None:
         # +1：保留一個位置給 terminal 訊息（error/tts_end），避免在慢 client 時無限制成長。
         self.send_queue = asyncio.Queue(maxsize=self.max_send_queue + 1)
+        self.cache = ResumeCache(ttl_s=self.ttl_s, max_bytes=self.max_cache_bytes)
+        self.segmenter = TextSegmenter(self.segmenter_config)
+        self.policy = AdaptiveChunkPolicy(self.segmenter_config, first_wait_s=self.first_chunk_wait_s)
+        if self.engine_spec is None:
+            self.engine_spec = self.audio_spec
+        self.converter = None
+        if (self.engine_spec.sample_rate, self.engine_spec.channels) != (self.audio_spec.sample_rate, self.audio_spec.channels):
+            self.converter = PcmConverter(
+                in_rate=self.engine_spec.sample_rate,
+                in_channels=self.engine_spec.channels,
+                out_rate=self.audio_spec.sample_rate,
+                out_channels=self.audio_spec.channels,
+            )
+        self.encoder = new_encoder(self.audio_spec)
 
     def touch(self) -> None:
         self.last_activity_s = time.monotonic()
@@ -82,45 +178,112 @@ class SessionState:
     def is_expired(self) -> bool:
         return (time.monotonic() - self.last_activity_s) > self.ttl_s
 
+    @property
+    def next_unit_index(self) -> int:
+        return self.segmenter.next_unit_index
+
     def enqueue_text_units(self, text: str) -> None:
         if not text:
             return
-        for ch in list(text):
-            if self._pending_start_index is None:
-                self._pending_start_index = self.next_unit_index
-            self._pending_units.append(ch)
-            self.next_unit_index += 1
+        self.segmenter.push(text)
+        self.policy.on_text(len(text))
+        self.input_event.set()
+
+    def mark_finished(self) -> None:
+        self.finished = True
+        self.input_event.set()
 
     def should_flush(self) -> bool:
-        if not self._pending_units:
-            return False
-        if len(self._pending_units) >= self.max_pending_units:
-            return True
-        last = self._pending_units[-1]
-        return last in PUNCTUATION
+        return self.segmenter.has_ready(self.policy.min_chars(len(self.segmenter)))
 
-    def pop_pending_segment(self) -> Optional[Dict[str, Any]]:
-        if not self._pending_units:
-            return None
-        start = self._pending_start_index
-        if start is None:
+    def pop_pending_segment(self, *, final: bool = False, force: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        下一個可合成的段落。
+
+        final=True（已收到 text_end）時吐出剩餘文字；force=True 時不等門檻（首段逾時或即將 underrun）。
+        """
+        return self.segmenter.pop(final=final, force=force, min_chars=self.policy.min_chars(len(self.segmenter)))
+
+    def flush_deadline_s(self) -> Optional[float]:
+        """pending 文字最晚該強制切出的時間點；None = 只等門檻。"""
+        if not len(self.segmenter):
             return None
-        units = "".join(self._pending_units)
-        end = start + len(self._pending_units) - 1
-        self._pending_units = []
-        self._pending_start_index = None
-        return {"start": start, "end": end, "text": units}
+        if self.segmenter.segments_emitted == 0:
+            return self.policy.first_deadline_s()
+        return self.policy.underrun_deadline_s(len(self.segmenter))
+
+    def client_audio(self, pcm: bytes, *, final: bool = False) -> bytes:
+        """
+        引擎輸出的 PCM16 → client 要求的取樣率/聲道/格式（須依 chunk 順序呼叫）。
+
+        final=True 為 tts_end 前的最後一個 chunk：一併取出重取樣濾波器延遲中的尾端音訊。
+        """
+        if self.converter is not None:
+            pcm = self.converter.convert(pcm)
+            if final:
+                pcm += self.converter.flush()
+        if self.encoder is not None:
+            pcm = self.encoder.encode(pcm)
+        return pcm
 
     def cache_chunk(self, chunk: CachedChunk) -> None:
         self.cache.append(chunk)
-        # Trim cache by TTL window (keep recent chunks)
-        cutoff = time.monotonic() - self.ttl_s
-        self.cache = [c for c in self.cache if c.created_s >= cutoff]
+
+
+def _audio_seconds(n_bytes: int, spec: AudioSpec) -> float:
+    return n_bytes / float(2 * spec.channels * spec.sample_rate) if spec.sample_rate > 0 else 0.0
+
+
+# 尚無估計值時，串流片段每個 unit 對應的音訊秒數（中文約 0.2~0.25s/字；取大值，寧可少標 unit）
+_DEFAULT_AUDIO_S_PER_UNIT = 0.25
+
+SYNTH_MS_BUCKETS = LogBuckets(1.0, 60000.0)
+RTF_BUCKETS = LogBuckets(0.001, 100.0)
+
+
+class _InflightSegment:
+    """合成中的 segment：引擎串流交出的音訊片段先暫存，輪到此 segment 時依序送出。"""
+
+    __slots__ = ("segment", "pieces", "ready", "task", "held", "units_sent", "bytes_sent")
+
+    def __init__(self, segment: Dict[str, Any]) -> None:
+        self.segment = segment
+        self.pieces: Deque[bytes] = deque()
+        self.ready = asyncio.Event()  # 有新片段或合成結束
+        self.task: Optional["asyncio.Task[None]"] = None
+        self.held = bytearray()  # 已收到、但還不足以對應到一個 unit 的音訊
+        self.units_sent = 0
+        self.bytes_sent = 0
+
+    @property
+    def done(self) -> bool:
+        return self.task is not None and self.task.done() and not self.pieces
 
 
 class SessionManager:
-    def __init__(self, engine: TtsEngine):
+    def __init__(
+        self,
+        engine: TtsEngine,
+        *,
+        synth_lookahead: int = 2,
+        resume_cache_bytes: int = 8 * 1024 * 1024,
+        segmenter_config: Optional[SegmenterConfig] = None,
+        first_chunk_wait_s: float = 0.12,
+        encode_threads: int = 2,
+    ):
         self.engine = engine
+        self.encode_pool = AudioEncodePool(threads=encode_threads)
+        self.resume_cache_bytes = resume_cache_bytes
+        self.segmenter_config = segmenter_config or SegmenterConfig()
+        self.first_chunk_wait_s = first_chunk_wait_s
+        # 模擬播放時鐘偵測到的播放中斷（跨 session 累計）
+        self.underruns_total = 0
+        self.underrun_seconds_total = 0.0
+        # 每個 segment 的合成耗時與 real-time factor（快取命中也計入）
+        self.synth_ms = Histogram(SYNTH_MS_BUCKETS)
+        self.rtf = Histogram(RTF_BUCKETS)
+        # 每個 session 同時合成的 segment 上限（look-ahead）；完成後仍依 chunk_seq 順序送出
+        self.synth_lookahead = max(1, synth_lookahead)
         self._sessions: Dict[str, SessionState] = {}
         self._lock = asyncio.Lock()
 
@@ -130,10 +293,20 @@ class SessionManager:
             if state is not None:
                 state.touch()
                 return state
-            state = SessionState(session_id=session_id, audio_spec=audio_spec)
+            state = SessionState(
+                session_id=session_id,
+                audio_spec=audio_spec,
+                max_cache_bytes=self.resume_cache_bytes,
+                engine_spec=engine_output_spec(self.engine, audio_spec),
+                segmenter_config=self.segmenter_config,
+                first_chunk_wait_s=self.first_chunk_wait_s,
+            )
             self._sessions[session_id] = state
             return state
 
+    def resume_cache_bytes_total(self) -> int:
+        return sum(s.cache.bytes for s in self._sessions.values())
+
     async def get(self, session_id: str) -> Optional[SessionState]:
         async with self._lock:
             return self._sessions.get(session_id)
@@ -148,11 +321,16 @@ class SessionManager:
                     state = self._sessions.pop(sid, None)
                     if state is not None:
                         expired_states.append(state)
+                # 仍存活的 session 也依 TTL 釋放過期的 resume chunk
+                now_s = time.monotonic()
+                for state in self._sessions.values():
+                    state.cache.evict(now_s)
             for state in expired_states:
                 try:
                     await self.cancel(state)
                 except Exception:
                     pass
+                state.cache.clear()
 
     async def start_synth_loop_if_needed(self, state: SessionState) -> None:
         if state.synth_task is not None and not state.synth_task.done():
@@ -168,12 +346,12 @@ class SessionManager:
             state.synth_task.cancel()
             try:
                 await state.synth_task
-            except Exception:
+            except (asyncio.CancelledError, Exception):
                 pass
         state.synth_done.set()
 
     async def finish(self, state: SessionState) -> None:
-        state.finished = True
+        state.mark_finished()
         state.touch()
         if state.synth_task:
             try:
@@ -183,8 +361,11 @@ class SessionManager:
 
     async def _synth_loop(self, state: SessionState) -> None:
         natural_end = False
+        inflight: Deque[_InflightSegment] = deque()
         try:
             while not state.cancelled:
+                # 先清除再檢查狀態；檢查之後才到的輸入會重新 set，不會漏掉
+                state.input_event.clear()
                 if state.send_queue.qsize() >= state.max_send_queue:
                     try:
                         state.send_queue.put_nowait(
@@ -201,22 +382,61 @@ class SessionManager:
                     state.cancelled = True
                     break
 
-                if not state.should_flush():
-                    if state.finished:
-                        segment = state.pop_pending_segment()
-                        if segment:
-                            await self._synthesize_and_enqueue(state, segment)
-                        natural_end = True
+                # 先把可 flush 的 segment 送去合成（最多 synth_lookahead 個同時進行）
+                while len(inflight) < self.synth_lookahead and state.should_flush():
+                    segment = state.pop_pending_segment()
+                    if segment is None:
                         break
-                    await asyncio.sleep(0.01)
-                    continue
+                    inflight.append(self._start_segment(state, segment))
+
+                if not state.should_flush() and state.finished:
+                    while True:
+                        segment = state.pop_pending_segment(final=True)
+                        if segment is None:
+                            break
+                        inflight.append(self._start_segment(state, segment))
+                    while inflight and not state.cancelled:
+                        if not await self._forward_head(state, inflight):
+                            await inflight[0].ready.wait()
+                    natural_end = True
+                    break
 
-                segment = state.pop_pending_segment()
-                if segment is None:
-                    await asyncio.sleep(0.01)
+                # 最前面的 segment 已合成的部分先送出（串流引擎可在整段完成前送出前幾句）
+                if inflight:
+                    if await self._forward_head(state, inflight):
+                        continue
+                if not inflight:
+                    # 沒有合成中的段落：文字未達門檻時，最晚在 deadline 強制切出（首段 TTFA / 避免 underrun）
+                    deadline = state.flush_deadline_s()
+                    timeout = None if deadline is None else deadline - time.monotonic()
+                    if timeout is not None and timeout <= 0:
+                        segment = state.pop_pending_segment(force=True)
+                        if segment is not None:
+                            inflight.append(self._start_segment(state, segment))
+                            continue
+                        timeout = None  # 目前無安全切點（例如單字未收完），等新文字
+                    try:
+                        await asyncio.wait_for(state.input_event.wait(), timeout=timeout)
+                    except asyncio.TimeoutError:
+                        pass
                     continue
-                await self._synthesize_and_enqueue(state, segment)
+                if len(inflight) >= self.synth_lookahead:
+                    await inflight[0].ready.wait()
+                    continue
+                # 等最前面的 segment 有新音訊或新文字到達（可再送出合成），兩者先到者為準
+                head_waiter = asyncio.ensure_future(inflight[0].ready.wait())
+                input_waiter = asyncio.ensure_future(state.input_event.wait())
+                try:
+                    await asyncio.wait((head_waiter, input_waiter), return_when=asyncio.FIRST_COMPLETED)
+                finally:
+                    head_waiter.cancel()
+                    input_waiter.cancel()
         finally:
+            tasks = [job.task for job in inflight if job.task is not None]
+            for task in tasks:
+                task.cancel()
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
             state.synth_done.set()
             if natural_end and not state.cancelled:
                 try:
@@ -231,25 +451,102 @@ class SessionManager:
                 except Exception:
                     pass
 
-    async def _synthesize_and_enqueue(self, state: SessionState, segment: Dict[str, Any]) -> None:
-        if state.cancelled:
-            return
-        text = segment["text"]
-        unit_start = segment["start"]
-        unit_end = segment["end"]
+    def _start_segment(self, state: SessionState, segment: Dict[str, Any]) -> _InflightSegment:
+        job = _InflightSegment(segment)
+        job.task = asyncio.create_task(self._synthesize_segment(state, job))
+        return job
 
-        pcm = await self.engine.synthesize_pcm16(text, spec=state.audio_spec)
+    async def _synthesize_segment(self, state: SessionState, job: _InflightSegment) -> None:
+        text = job.segment["text"]
+        t0 = time.monotonic()
+        audio_bytes = 0
+        pieces = iter_pcm16(self.engine, text, spec=state.engine_spec)
+        try:
+            async for pcm in pieces:
+                if pcm:
+                    job.pieces.append(pcm)
+                    audio_bytes += len(pcm)
+                    job.ready.set()
+        finally:
+            await pieces.aclose()
+            job.ready.set()
+        synth_s = time.monotonic() - t0
+        audio_s = _audio_seconds(audio_bytes, state.engine_spec)
+        state.policy.on_synth(len(text), synth_s, audio_s)
+        self.synth_ms.observe(synth_s * 1000.0)
+        if audio_s > 0:
+            self.rtf.observe(synth_s / audio_s)
+
+    async def _forward_head(self, state: SessionState, inflight: Deque[_InflightSegment]) -> bool:
+        """
+        送出最前面 segment 目前已合成的音訊；整段送完時移出 inflight 並回傳 True。
+
+        段落尚未合成完時，已收到的音訊依估計的「每 unit 音訊秒數」對應到前面的 unit
+        （至少 1 個 unit 才送，最後一個 unit 一律留給最後一片），unit 區間與文字維持連續不重疊。
+        """
+        job = inflight[0]
+        job.ready.clear()
+        while job.pieces:
+            job.held += job.pieces.popleft()
+        if state.cancelled:
+            return False
+        segment = job.segment
+        n_units = len(segment["text"])
+        if job.done:
+            assert job.task is not None
+            job.task.result()  # 合成失敗時拋出
+            inflight.popleft()
+            # 已收到 text_end 且沒有其他文字/段落：這是 tts_end 前的最後一個 chunk
+            final = state.finished and not inflight and not len(state.segmenter)
+            await self._enqueue_chunk(state, segment, job.units_sent, n_units, bytes(job.held), final=final)
+            return True
+        if not job.held:
+            return False
+        s_per_unit = state.policy.audio_s_per_unit or _DEFAULT_AUDIO_S_PER_UNIT
+        audio_s = _audio_seconds(job.bytes_sent + len(job.held), state.engine_spec)
+        units = min(n_units - 1, int(audio_s / s_per_unit))
+        if units <= job.units_sent:
+            return False
+        pcm = bytes(job.held)
+        job.held.clear()
+        unit_from, job.units_sent = job.units_sent, units
+        job.bytes_sent += len(pcm)
+        await self._enqueue_chunk(state, segment, unit_from, units, pcm)
+        return False
+
+    async def _enqueue_chunk(
+        self,
+        state: SessionState,
+        segment: Dict[str, Any],
+        unit_from: int,
+        unit_to: int,
+        pcm: bytes,
+        *,
+        final: bool = False,
+    ) -> None:
+        """送出 segment 的 [unit_from, unit_to) 部分（相對於 segment 開頭）；chunk_seq 依送出順序遞增。"""
+        audio_s = _audio_seconds(len(pcm), state.engine_spec)
+        # resume 快取與送出的都是轉換/編碼後的音訊
+        if state.converter is None and state.encoder is None:
+            audio = pcm
+        else:
+            audio = await self.encode_pool.run(functools.partial(state.client_audio, final=final), pcm)
         state.chunk_seq += 1
         chunk = CachedChunk(
             created_s=time.monotonic(),
             chunk_seq=state.chunk_seq,
-            unit_index_start=unit_start,
-            unit_index_end=unit_end,
-            units_text=text,
+            unit_index_start=segment["start"] + unit_from,
+            unit_index_end=segment["start"] + unit_to - 1,
+            units_text=segment["text"][unit_from:unit_to],
             audio_format=state.audio_spec.audio_format,
             sample_rate=state.audio_spec.sample_rate,
             channels=state.audio_spec.channels,
-            audio_bytes=pcm,
+            audio_bytes=audio,
+            seq=state.seq,
         )
         state.cache_chunk(chunk)
-        await state.send_queue.put(chunk.to_ws_message(session_id=state.session_id, seq=state.seq))
+        await state.send_queue.put(chunk)
+        underrun_before = state.policy.underrun_s
+        if state.policy.on_chunk(audio_s):
+            self.underruns_total += 1
+            self.underrun_seconds_total += state.policy.underrun_s - underrun_before
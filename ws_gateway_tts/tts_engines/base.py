@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Protocol
+from typing import AsyncIterator, Protocol
 
 
 @dataclass(frozen=True)
@@ -15,3 +15,31 @@ class TtsEngine(Protocol):
     async def synthesize_pcm16(self, text: str, *, spec: AudioSpec) -> bytes:
         """Return PCM16 (s16le) bytes for the given text."""
 
+
+class StreamingTtsEngine(TtsEngine, Protocol):
+    def synthesize_pcm16_stream(self, text: str, *, spec: AudioSpec) -> AsyncIterator[bytes]:
+        """Yield PCM16 (s16le) pieces as the engine produces them; each piece holds whole frames."""
+
+
+def engine_output_spec(engine: TtsEngine, spec: AudioSpec) -> AudioSpec:
+    """
+    引擎對此 spec 實際輸出的格式。
+
+    引擎可實作 output_spec(spec)（例如固定取樣率的模型）；沒有時視為可依 spec 直接輸出。
+    """
+    output_spec = getattr(engine, "output_spec", None)
+    return output_spec(spec) if output_spec is not None else spec
+
+
+async def iter_pcm16(engine: TtsEngine, text: str, *, spec: AudioSpec) -> AsyncIterator[bytes]:
+    """引擎有 synthesize_pcm16_stream 時逐段交出，否則整段合成後一次交出。"""
+    stream = getattr(engine, "synthesize_pcm16_stream", None)
+    if stream is None:
+        yield await engine.synthesize_pcm16(text, spec=spec)
+        return
+    pieces = stream(text, spec=spec)
+    try:
+        async for pcm in pieces:
+            yield pcm
+    finally:
+        await pieces.aclose()
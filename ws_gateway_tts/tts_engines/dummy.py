@@ -1,7 +1,9 @@
 from __future__ import annotations
 
 import math
-from typing import Final
+import sys
+from array import array
+from typing import Dict, Final, Tuple
 
 from .base import AudioSpec
 
@@ -9,22 +11,42 @@ from .base import AudioSpec
 class DummyTtsEngine:
     """
     產生可播放的簡單音訊（非真實 TTS），用於驗證 WS 協定 / cancel / resume / 壓測流程。
+
+    正弦波只在每個 (sample_rate, channels) 第一次使用時算出一個完整週期（PCM16 bytes），
+    之後以 bytes 重複 + 切片產生任意長度，壓測時 gateway 不會被音訊產生本身吃滿 CPU。
     """
 
     _AMP: Final[int] = 8000
-    _FREQ_HZ: Final[float] = 440.0
+    _FREQ_HZ: Final[int] = 440
+
+    def __init__(self) -> None:
+        self._periods: Dict[Tuple[int, int], bytes] = {}
+
+    def _period(self, sample_rate: int, channels: int) -> bytes:
+        key = (sample_rate, channels)
+        table = self._periods.get(key)
+        if table is None:
+            # 440 Hz 在 sample_rate 下的最短整數週期：sample_rate / gcd(sample_rate, 440) 個 sample
+            n = sample_rate // math.gcd(sample_rate, self._FREQ_HZ)
+            samples = array("h", (int(self._AMP * math.sin(2.0 * math.pi * self._FREQ_HZ * i / sample_rate)) for i in range(n)))
+            if channels == 2:
+                stereo = array("h", bytes(4 * n))
+                stereo[0::2] = samples
+                stereo[1::2] = samples
+                samples = stereo
+            if sys.byteorder != "little":
+                samples.byteswap()
+            table = self._periods[key] = samples.tobytes()
+        return table
 
     async def synthesize_pcm16(self, text: str, *, spec: AudioSpec) -> bytes:
         # 每個字給固定長度音訊，確保逐字對齊可驗證。
         ms_per_unit = 40
         total_ms = max(ms_per_unit, len(text) * ms_per_unit)
         total_samples = int(spec.sample_rate * (total_ms / 1000.0))
+        if total_samples <= 0:
+            return b""
 
-        pcm = bytearray()
-        for i in range(total_samples):
-            t = i / spec.sample_rate
-            sample = int(self._AMP * math.sin(2.0 * math.pi * self._FREQ_HZ * t))
-            pcm += int(sample).to_bytes(2, byteorder="little", signed=True)
-            if spec.channels == 2:
-                pcm += int(sample).to_bytes(2, byteorder="little", signed=True)
-        return bytes(pcm)
+        period = self._period(spec.sample_rate, spec.channels)
+        total_bytes = total_samples * (4 if spec.channels == 2 else 2)
+        return (period * -(-total_bytes // len(period)))[:total_bytes]
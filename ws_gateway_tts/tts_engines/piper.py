@@ -1,12 +1,15 @@
 from __future__ import annotations
 
 import asyncio
+import json
 import os
+import sys
 import tempfile
 from dataclasses import dataclass
 from typing import AsyncIterator, Optional, Tuple
 
 from .base import AudioSpec
+from .piper_pool import PiperProcessPool, log_suppressing_args
 
 
 def _is_riff_wav(b: bytes) -> bool:
@@ -65,12 +68,24 @@ def _parse_wav_pcm16(wav: bytes) -> Tuple[int, int, bytes]:
     return sample_rate, channels, data
 
 
+def _read_model_sample_rate(model_path: str) -> Optional[int]:
+    # piper 的模型設定檔與模型同名：<model>.onnx.json
+    try:
+        with open(model_path + ".json", "r", encoding="utf-8") as f:
+            return int(json.load(f)["audio"]["sample_rate"])
+    except Exception:
+        return None
+
+
 @dataclass(frozen=True)
 class PiperConfig:
     bin_path: str
     model_path: str
     speaker_id: Optional[int] = None
     extra_args: Tuple[str, ...] = ()
+    output_mode: str = "pool"
+    pool_size: int = 2
+    request_timeout_s: float = 30.0
 
 
 class PiperTtsEngine:
@@ -82,12 +97,29 @@ class PiperTtsEngine:
     - 下載對應語音模型（.onnx；用 PIPER_MODEL 指定）
 
     說明：
-    - Piper 模型通常有固定 sample_rate / channels；本引擎會要求與 AudioSpec 相同，否則報錯。
-    - 目前實作以「每次輸入文字 → 產生一段 PCM16」為主；串流語音的粒度由 Gateway flush 規則與 Orchestrator buffering 決定。
+    - Piper 模型有固定 sample_rate / channels；output_spec() 回報模型格式，由 gateway 轉成 client 的 AudioSpec（無 .onnx.json 時要求兩者相同）。
+    - 每次輸入文字 → 一段 PCM16；pool 模式另提供 synthesize_pcm16_stream，長段落的第一句合成完即可送出。
+    - PIPER_OUTPUT_MODE=pool（預設）：常駐 piper 行程池（--output-raw），模型只載入一次；
+      file/stdout 為每段文字各啟動一次 piper 的舊模式（Windows 的 asyncio loop 不支援 pool，自動退回 file）。
     """
 
     def __init__(self, cfg: PiperConfig):
         self.cfg = cfg
+        self.output_mode = cfg.output_mode
+        if self.output_mode == "pool" and (sys.platform == "win32" or cfg.pool_size <= 0):
+            self.output_mode = "file"
+        self.pool: Optional[PiperProcessPool] = None
+        if self.output_mode == "pool":
+            suppressing = log_suppressing_args(cfg.extra_args)
+            if suppressing:
+                raise RuntimeError(
+                    f"PIPER_OUTPUT_MODE=pool 需要 piper 的 info log 判斷每段合成結束，PIPER_EXTRA_ARGS 不可包含 {' '.join(suppressing)}"
+                )
+            self.pool = PiperProcessPool(
+                self._build_raw_args(), size=cfg.pool_size, request_timeout_s=cfg.request_timeout_s
+            )
+        # raw PCM 沒有 header，sample_rate 以模型的 .onnx.json 為準
+        self.model_sample_rate = _read_model_sample_rate(cfg.model_path)
 
     @staticmethod
     def from_env() -> "PiperTtsEngine":
@@ -104,17 +136,52 @@ class PiperTtsEngine:
         extra = os.getenv("PIPER_EXTRA_ARGS", "").strip()
         extra_args = tuple(x for x in extra.split() if x) if extra else ()
 
-        return PiperTtsEngine(PiperConfig(bin_path=bin_path, model_path=model_path, speaker_id=speaker_id, extra_args=extra_args))
+        out_mode = os.getenv("PIPER_OUTPUT_MODE", "pool").strip().lower()
+        if out_mode not in {"pool", "file", "stdout"}:
+            out_mode = "pool"
+
+        return PiperTtsEngine(
+            PiperConfig(
+                bin_path=bin_path,
+                model_path=model_path,
+                speaker_id=speaker_id,
+                extra_args=extra_args,
+                output_mode=out_mode,
+                pool_size=int(os.getenv("PIPER_POOL_SIZE", "2")),
+                request_timeout_s=float(os.getenv("PIPER_REQUEST_TIMEOUT_S", "30")),
+            )
+        )
+
+    @property
+    def voice_id(self) -> str:
+        # 供跨 session 音訊 cache 區分聲音：模型、說話人與額外參數（語速等）都會影響輸出
+        return "|".join([self.cfg.model_path, str(self.cfg.speaker_id), " ".join(self.cfg.extra_args)])
+
+    def output_spec(self, spec: AudioSpec) -> AudioSpec:
+        # 模型固定為單聲道、.onnx.json 的 sample_rate；gateway 依此轉成 client 要求的格式
+        if self.model_sample_rate is None:
+            return spec
+        return AudioSpec(audio_format=spec.audio_format, sample_rate=self.model_sample_rate, channels=1)
+
+    def health_fields(self) -> dict:
+        fields: dict = {"piper_output_mode": self.output_mode}
+        if self.pool is not None:
+            fields.update(self.pool.health_fields())
+        return fields
+
+    async def aclose(self) -> None:
+        if self.pool is not None:
+            await self.pool.aclose()
 
     async def synthesize_pcm16(self, text: str, *, spec: AudioSpec) -> bytes:
         if not text:
             return b""
 
-        out_mode = os.getenv("PIPER_OUTPUT_MODE", "file").strip().lower()
-        if out_mode not in {"file", "stdout"}:
-            out_mode = "file"
+        if self.pool is not None:
+            self._check_pool_spec(spec)
+            return await self.pool.synthesize(text)
 
-        if out_mode == "stdout":
+        if self.output_mode == "stdout":
             wav = await self._run_stdout(text)
         else:
             wav = await self._run_tempfile(text)
@@ -130,13 +197,30 @@ class PiperTtsEngine:
         # 若 CLI 直接輸出 raw PCM16（少數版本/參數），則直接回傳。
         return wav
 
-    async def synthesize_pcm16_stream(self, text: str, *, spec: AudioSpec, chunk_bytes: int = 8192) -> AsyncIterator[bytes]:
-        pcm = await self.synthesize_pcm16(text, spec=spec)
-        for i in range(0, len(pcm), chunk_bytes):
-            yield pcm[i : i + chunk_bytes]
+    async def synthesize_pcm16_stream(self, text: str, *, spec: AudioSpec) -> AsyncIterator[bytes]:
+        """pool 模式：piper 每寫出一句音訊就交出；file/stdout 模式需等整段 WAV 完成。"""
+        if not text:
+            return
+        if self.pool is None:
+            yield await self.synthesize_pcm16(text, spec=spec)
+            return
+        self._check_pool_spec(spec)
+        async for pcm in self.pool.synthesize_stream(text):
+            yield pcm
+
+    def _check_pool_spec(self, spec: AudioSpec) -> None:
+        if self.model_sample_rate is not None and self.model_sample_rate != spec.sample_rate:
+            raise RuntimeError(f"piper sample_rate={self.model_sample_rate} 與 spec.sample_rate={spec.sample_rate} 不一致")
+        if spec.channels != 1:
+            raise RuntimeError(f"piper channels=1 與 spec.channels={spec.channels} 不一致")
 
     def _build_args(self, *, output_file: str) -> Tuple[str, ...]:
-        args = [self.cfg.bin_path, "--model", self.cfg.model_path, "--output_file", output_file]
+        return self._with_common_args([self.cfg.bin_path, "--model", self.cfg.model_path, "--output_file", output_file])
+
+    def _build_raw_args(self) -> Tuple[str, ...]:
+        return self._with_common_args([self.cfg.bin_path, "--model", self.cfg.model_path, "--output-raw"])
+
+    def _with_common_args(self, args: list) -> Tuple[str, ...]:
         if self.cfg.speaker_id is not None:
             args += ["--speaker", str(self.cfg.speaker_id)]
         if self.cfg.extra_args:
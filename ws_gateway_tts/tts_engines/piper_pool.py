@@ -0,0 +1,274 @@
+from __future__ import annotations
+
+import asyncio
+import os
+from collections import deque
+from typing import AsyncIterator, Deque, List, Optional, Sequence
+
+# piper 每處理完一行輸入會在 stderr 記一行 "Real-time factor: ..."；
+# --output-raw 模式下該行在 raw audio 輸出執行緒 join（stdout 已 flush）之後才寫出，
+# 因此可作為單一 request 的結束標記。
+_DONE_MARKER = b"Real-time factor"
+
+# 會關掉上述 info log 的 piper 參數；pool 模式下少了結束標記，每個 request 都會等到逾時
+_LOG_SUPPRESSING_FLAGS = ("-q", "--quiet", "--log-level", "--log_level")
+
+
+def log_suppressing_args(args: Sequence[str]) -> List[str]:
+    """args 中會讓 piper 不寫出結束標記的參數（含 `--log-level=warn` 形式）。"""
+    return [a for a in args if a.split("=", 1)[0] in _LOG_SUPPRESSING_FLAGS]
+
+
+class PiperProcess:
+    """
+    常駐的 piper 行程（--output-raw）：stdin 一行文字 = 一個 request，stdout 為 raw PCM16。
+
+    stdout 以 non-blocking pipe + add_reader 讀取；收到 stderr 結束標記時同步把 pipe
+    中剩餘的 bytes 讀完，確保 request 之間的音訊邊界正確。
+    piper 每合成完一句就寫出該句音訊，synthesize_stream 會在 stdout 有資料時立即交出。
+    """
+
+    def __init__(self, args: Sequence[str], *, index: int = 0) -> None:
+        self.args = tuple(args)
+        self.index = index
+        self.proc: Optional[asyncio.subprocess.Process] = None
+        self.requests_served = 0
+        self._stdout_fd: Optional[int] = None
+        self._buf = bytearray()
+        self._pending: Optional[asyncio.Future[bytes]] = None
+        self._stderr_tail: Deque[str] = deque(maxlen=20)
+        self._stderr_task: Optional[asyncio.Task[None]] = None
+        self._eof = False
+        # stdout 有新資料、request 結束或行程結束時 set
+        self._readable = asyncio.Event()
+
+    @property
+    def alive(self) -> bool:
+        return self.proc is not None and self.proc.returncode is None and not self._eof
+
+    @property
+    def busy(self) -> bool:
+        """仍有已送出、尚未收到結束標記的 request（呼叫端已取消時）。"""
+        return self._pending is not None and not self._pending.done()
+
+    async def start(self) -> None:
+        loop = asyncio.get_running_loop()
+        r_fd, w_fd = os.pipe()
+        try:
+            self.proc = await asyncio.create_subprocess_exec(
+                *self.args,
+                stdin=asyncio.subprocess.PIPE,
+                stdout=w_fd,
+                stderr=asyncio.subprocess.PIPE,
+            )
+        except Exception:
+            os.close(r_fd)
+            raise
+        finally:
+            os.close(w_fd)
+        os.set_blocking(r_fd, False)
+        self._stdout_fd = r_fd
+        self._eof = False
+        loop.add_reader(r_fd, self._on_stdout)
+        self._stderr_task = asyncio.create_task(self._read_stderr())
+
+    def _on_stdout(self) -> None:
+        assert self._stdout_fd is not None
+        try:
+            data = os.read(self._stdout_fd, 1 << 16)
+        except BlockingIOError:
+            return
+        except OSError:
+            data = b""
+        if not data:
+            self._on_eof()
+            return
+        self._buf += data
+        self._readable.set()
+
+    def _drain_stdout(self) -> None:
+        if self._stdout_fd is None:
+            return
+        while True:
+            try:
+                data = os.read(self._stdout_fd, 1 << 16)
+            except (BlockingIOError, OSError):
+                return
+            if not data:
+                return
+            self._buf += data
+
+    async def _read_stderr(self) -> None:
+        assert self.proc is not None and self.proc.stderr is not None
+        stderr = self.proc.stderr
+        while True:
+            line = await stderr.readline()
+            if not line:
+                break
+            self._stderr_tail.append(line.decode("utf-8", errors="replace").rstrip())
+            if _DONE_MARKER in line:
+                self._drain_stdout()
+                pcm, self._buf = bytes(self._buf), bytearray()
+                if self._pending is not None and not self._pending.done():
+                    self._pending.set_result(pcm)
+                self._readable.set()
+        self._on_eof()
+
+    def _on_eof(self) -> None:
+        if self._eof:
+            return
+        self._eof = True
+        if self._stdout_fd is not None:
+            asyncio.get_running_loop().remove_reader(self._stdout_fd)
+        if self._pending is not None and not self._pending.done():
+            self._pending.set_exception(RuntimeError(f"piper 行程已結束: {self.stderr_tail()}"))
+        self._readable.set()
+
+    def stderr_tail(self) -> str:
+        return " | ".join(self._stderr_tail)[-2000:]
+
+    async def synthesize(self, text: str, *, timeout_s: float) -> bytes:
+        return b"".join([pcm async for pcm in self.synthesize_stream(text, timeout_s=timeout_s)])
+
+    async def synthesize_stream(self, text: str, *, timeout_s: float) -> AsyncIterator[bytes]:
+        """逐段交出 PCM16（每段為完整 sample）；timeout_s 為整個 request 的上限。"""
+        if not self.alive or self.proc is None or self.proc.stdin is None:
+            raise RuntimeError("piper 行程未啟動")
+        # 換行是 request 分隔符號
+        line = " ".join(text.splitlines()).strip()
+        if not line:
+            return
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout_s
+        pending = self._pending = loop.create_future()
+        self.proc.stdin.write((line + "\n").encode("utf-8"))
+        try:
+            await self.proc.stdin.drain()
+            while not pending.done():
+                n = len(self._buf) & ~1
+                if n:
+                    pcm = bytes(self._buf[:n])
+                    del self._buf[:n]
+                    yield pcm
+                    continue
+                self._readable.clear()
+                # 呼叫端取消（例如 session cancel）時不動 pending：行程照常跑完這行，
+                # 由 wait_idle() 等到結束標記後再交還 pool，不必重載模型
+                await asyncio.wait_for(self._readable.wait(), timeout=deadline - loop.time())
+        except asyncio.TimeoutError:
+            # 行程狀態不明（輸出可能與下一個 request 混在一起），直接淘汰
+            self._pending = None
+            await self.close()
+            raise RuntimeError(f"piper 合成逾時（>{timeout_s}s）")
+        self._pending = None
+        pcm = pending.result()
+        self.requests_served += 1
+        if pcm:
+            yield pcm
+
+    async def wait_idle(self, *, timeout_s: float) -> None:
+        """等待被放棄的 request 跑完（結果丟棄）；逾時或出錯則淘汰行程。"""
+        pending = self._pending
+        if pending is None:
+            return
+        try:
+            await asyncio.wait_for(asyncio.shield(pending), timeout=timeout_s)
+        except Exception:
+            self._pending = None
+            await self.close()
+        self._pending = None
+
+    async def close(self) -> None:
+        proc = self.proc
+        if proc is not None and proc.returncode is None:
+            try:
+                if proc.stdin is not None:
+                    proc.stdin.close()
+                proc.kill()
+            except ProcessLookupError:
+                pass
+            try:
+                await asyncio.wait_for(proc.wait(), timeout=5.0)
+            except Exception:
+                pass
+        if self._stdout_fd is not None:
+            if not self._eof:
+                self._eof = True
+                asyncio.get_running_loop().remove_reader(self._stdout_fd)
+            os.close(self._stdout_fd)
+            self._stdout_fd = None
+        if self._stderr_task is not None:
+            self._stderr_task.cancel()
+            try:
+                await self._stderr_task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._stderr_task = None
+
+
+class PiperProcessPool:
+    """固定數量的常駐 piper 行程；每個行程一次處理一個 request，掛掉時於下次取用前重啟。"""
+
+    def __init__(self, args: Sequence[str], *, size: int = 2, request_timeout_s: float = 30.0) -> None:
+        self.args = tuple(args)
+        self.size = max(1, size)
+        self.request_timeout_s = request_timeout_s
+        self.restarts_total = 0
+        self._procs: List[PiperProcess] = []
+        self._idle: Optional["asyncio.Queue[PiperProcess]"] = None
+        self._start_lock: Optional[asyncio.Lock] = None
+
+    async def _ensure_started(self) -> "asyncio.Queue[PiperProcess]":
+        if self._idle is not None:
+            return self._idle
+        if self._start_lock is None:
+            self._start_lock = asyncio.Lock()
+        async with self._start_lock:
+            if self._idle is None:
+                idle: "asyncio.Queue[PiperProcess]" = asyncio.Queue()
+                for i in range(self.size):
+                    p = PiperProcess(self.args, index=i)
+                    await p.start()
+                    self._procs.append(p)
+                    idle.put_nowait(p)
+                self._idle = idle
+        return self._idle
+
+    async def synthesize(self, text: str) -> bytes:
+        return b"".join([pcm async for pcm in self.synthesize_stream(text)])
+
+    async def synthesize_stream(self, text: str) -> AsyncIterator[bytes]:
+        idle = await self._ensure_started()
+        proc = await idle.get()
+        try:
+            if not proc.alive:
+                # 健康檢查：行程已結束（crash/逾時淘汰）則重啟
+                await proc.close()
+                self.restarts_total += 1
+                await proc.start()
+            async for pcm in proc.synthesize_stream(text, timeout_s=self.request_timeout_s):
+                yield pcm
+        finally:
+            if proc.busy:
+                asyncio.create_task(self._release_when_idle(proc, idle))
+            else:
+                idle.put_nowait(proc)
+
+    async def _release_when_idle(self, proc: PiperProcess, idle: "asyncio.Queue[PiperProcess]") -> None:
+        try:
+            await proc.wait_idle(timeout_s=self.request_timeout_s)
+        finally:
+            idle.put_nowait(proc)
+
+    def health_fields(self) -> dict:
+        return {
+            "piper_pool_size": self.size,
+            "piper_pool_alive": sum(1 for p in self._procs if p.alive),
+            "piper_pool_restarts_total": self.restarts_total,
+        }
+
+    async def aclose(self) -> None:
+        for p in self._procs:
+            await p.close()
+        self._procs = []
+        self._idle = None
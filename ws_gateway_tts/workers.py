@@ -0,0 +1,271 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import multiprocessing
+import os
+import shutil
+import signal
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from multiprocessing.connection import wait as wait_sentinels
+from typing import Any, Dict, List, Optional, Union
+
+import aiohttp
+from aiohttp import WSMsgType, web
+
+from .protocol import audio_frame_session_id
+
+# worker 之間的內部連線帶此 header（不計入 active connections）
+PEER_HEADER = "X-WS-TTS-Peer"
+
+
+@dataclass(frozen=True)
+class WorkerTopology:
+    index: int
+    count: int
+    socket_dir: str
+
+    def socket_path(self, index: int) -> str:
+        return os.path.join(self.socket_dir, f"worker-{index}.sock")
+
+    def owner_of(self, session_id: str) -> int:
+        return owner_of(session_id, self.count)
+
+
+def owner_of(session_id: str, workers: int) -> int:
+    """
+    session 所屬的 worker（rendezvous hashing）。
+
+    同一個 session_id 永遠對應同一個 worker，resume 因此能找到持有快取的行程；
+    worker 數改變時只有約 1/N 的 session 換手。
+    """
+    best, best_score = 0, b""
+    for i in range(workers):
+        score = hashlib.blake2b(f"{i}:{session_id}".encode("utf-8"), digest_size=8).digest()
+        if score > best_score:
+            best, best_score = i, score
+    return best
+
+
+# 由 owner 轉回的訊息：JSON 字串、binary audio frame，或 None（與 owner 的連線中斷）
+PeerMessage = Optional[Union[str, bytes]]
+
+# owner 以多工模式處理轉送的 session：這些錯誤只回報該則訊息，session 仍在，轉送不能結束
+_NON_TERMINAL_ERRORS = ("resume_not_available", "bad_request")
+
+
+class PeerStream:
+    """由其他 worker 負責的 session：client 訊息原樣轉給 owner，owner 的回應放進 queue。"""
+
+    def __init__(self, link: "_PeerLink", session_id: str) -> None:
+        self.link = link
+        self.session_id = session_id
+        self.queue: "asyncio.Queue[PeerMessage]" = asyncio.Queue()
+        self.ended = False
+
+    async def send(self, data: str) -> None:
+        await self.link.send(data)
+
+    async def close(self) -> None:
+        """client 離開：尚未結束的 session 通知 owner detach（合成與快取保留，可 resume）。"""
+        if self.link.streams.get(self.session_id) is not self:
+            return
+        del self.link.streams[self.session_id]
+        if not self.ended and not self.link.closed:
+            try:
+                await self.link.send(json.dumps({"type": "detach", "session_id": self.session_id}))
+            except Exception:
+                pass
+
+
+class _PeerLink:
+    """到某個 worker 的 `/tts/mux` 長連線，承載所有轉給該 worker 的 session。"""
+
+    def __init__(self, ws: aiohttp.ClientWebSocketResponse) -> None:
+        self.ws = ws
+        self.streams: Dict[str, PeerStream] = {}
+        self.closed = False
+        self._send_lock = asyncio.Lock()
+        self._reader_task = asyncio.create_task(self._reader())
+
+    async def send(self, data: str) -> None:
+        async with self._send_lock:
+            await self.ws.send_str(data)
+
+    async def _reader(self) -> None:
+        try:
+            async for msg in self.ws:
+                if msg.type == WSMsgType.BINARY:
+                    stream = self.streams.get(audio_frame_session_id(msg.data) or "")
+                    if stream is not None:
+                        stream.queue.put_nowait(msg.data)
+                    continue
+                if msg.type != WSMsgType.TEXT:
+                    continue
+                try:
+                    obj = json.loads(msg.data)
+                except ValueError:
+                    continue
+                stream = self.streams.get(obj.get("session_id") or "") if isinstance(obj, dict) else None
+                if stream is None:
+                    continue
+                if obj.get("type") == "tts_end" or (
+                    obj.get("type") == "error" and obj.get("code") not in _NON_TERMINAL_ERRORS
+                ):
+                    stream.ended = True
+                    del self.streams[stream.session_id]
+                stream.queue.put_nowait(msg.data)
+        finally:
+            self.closed = True
+            for stream in list(self.streams.values()):
+                stream.queue.put_nowait(None)
+            self.streams.clear()
+
+    async def close(self) -> None:
+        self.closed = True
+        await self.ws.close()
+        self._reader_task.cancel()
+        try:
+            await self._reader_task
+        except (asyncio.CancelledError, Exception):
+            pass
+
+
+class PeerRelay:
+    """worker 之間的轉送：session 轉給 owner worker，以及收集各 worker 的 metrics。"""
+
+    def __init__(self, topology: WorkerTopology) -> None:
+        self.topology = topology
+        self._clients: Dict[int, aiohttp.ClientSession] = {}
+        self._links: Dict[int, _PeerLink] = {}
+        # 各 owner 進行中的 handshake；同一 owner 的 open 共用，不同 owner 互不阻擋
+        self._connecting: Dict[int, "asyncio.Task[_PeerLink]"] = {}
+
+    def _client(self, index: int) -> aiohttp.ClientSession:
+        client = self._clients.get(index)
+        if client is None:
+            connector = aiohttp.UnixConnector(path=self.topology.socket_path(index))
+            client = self._clients[index] = aiohttp.ClientSession(connector=connector)
+        return client
+
+    async def open(self, session_id: str) -> PeerStream:
+        owner = self.topology.owner_of(session_id)
+        link = self._links.get(owner)
+        while link is None or link.closed:
+            task = self._connecting.get(owner)
+            if task is None:
+                task = self._connecting[owner] = asyncio.create_task(self._connect(owner))
+            link = await asyncio.shield(task)
+        old = link.streams.get(session_id)
+        if old is not None:
+            # 同一 session 從另一條 client 連線重新 start（例如重連後 resume）：舊的轉送停止
+            old.queue.put_nowait(None)
+        stream = link.streams[session_id] = PeerStream(link, session_id)
+        return stream
+
+    async def _connect(self, owner: int) -> _PeerLink:
+        try:
+            ws = await self._client(owner).ws_connect("http://worker/tts/mux", headers={PEER_HEADER: "1"}, heartbeat=20)
+            link = self._links[owner] = _PeerLink(ws)
+            return link
+        finally:
+            del self._connecting[owner]
+
+    async def snapshots(self, *, timeout_s: float = 2.0) -> List[Dict[str, Any]]:
+        """其他 worker 的 metrics snapshot；沒回應的 worker 略過。"""
+
+        async def fetch(index: int) -> Optional[Dict[str, Any]]:
+            try:
+                async with self._client(index).get(
+                    "http://worker/metrics/snapshot", timeout=aiohttp.ClientTimeout(total=timeout_s)
+                ) as resp:
+                    return await resp.json()
+            except Exception:
+                return None
+
+        peers = [i for i in range(self.topology.count) if i != self.topology.index]
+        results = await asyncio.gather(*(fetch(i) for i in peers))
+        return [r for r in results if isinstance(r, dict)]
+
+    async def close(self) -> None:
+        for link in list(self._links.values()):
+            await link.close()
+        self._links.clear()
+        for client in list(self._clients.values()):
+            await client.close()
+        self._clients.clear()
+
+
+def run_workers(count: int, *, host: str, port: int) -> None:
+    """
+    啟動 count 個 worker 行程，共用同一個 listen port（SO_REUSEPORT，由 kernel 分配連線）。
+
+    每個 worker 另外聽一個 unix socket 供 session 轉送與 metrics 收集；worker 異常結束時重新啟動。
+    """
+    socket_dir = tempfile.mkdtemp(prefix="ws_gateway_tts.")
+    ctx = multiprocessing.get_context("spawn")
+    procs: Dict[int, Any] = {}
+    stopping = False
+
+    def spawn(index: int) -> None:
+        topology = WorkerTopology(index=index, count=count, socket_dir=socket_dir)
+        proc = ctx.Process(target=_worker_main, args=(topology, host, port), name=f"ws-tts-worker-{index}")
+        proc.start()
+        procs[index] = proc
+
+    def stop(signum: int, frame: Any) -> None:
+        nonlocal stopping
+        stopping = True
+        for proc in procs.values():
+            if proc.is_alive():
+                proc.terminate()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    try:
+        for i in range(count):
+            spawn(i)
+        print(f"[ws_gateway_tts] {count} workers on {host}:{port} (SO_REUSEPORT)", flush=True)
+        while not stopping:
+            wait_sentinels([p.sentinel for p in procs.values()], timeout=1.0)
+            for index, proc in list(procs.items()):
+                if stopping or proc.is_alive():
+                    continue
+                print(f"[ws_gateway_tts] worker {index} exited (code={proc.exitcode}); restarting", file=sys.stderr, flush=True)
+                time.sleep(1.0)
+                spawn(index)
+    finally:
+        for proc in procs.values():
+            proc.join(timeout=10.0)
+            if proc.is_alive():
+                proc.kill()
+        shutil.rmtree(socket_dir, ignore_errors=True)
+
+
+def _worker_main(topology: WorkerTopology, host: str, port: int) -> None:
+    from .server import create_app
+
+    app = create_app(worker=topology)
+    asyncio.run(_serve_worker(app, topology, host, port))
+
+
+async def _serve_worker(app: web.Application, topology: WorkerTopology, host: str, port: int) -> None:
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop.set)
+    runner = web.AppRunner(app, handle_signals=False)
+    await runner.setup()
+    try:
+        path = topology.socket_path(topology.index)
+        if os.path.exists(path):
+            os.unlink(path)  # 重啟的 worker：前一個行程留下的 socket
+        await web.TCPSite(runner, host, port, reuse_port=True).start()
+        await web.UnixSite(runner, path).start()
+        await stop.wait()
+    finally:
+        await runner.cleanup()